@@ -10,10 +10,18 @@ import src.Map as Map
 import src.AutonomusControl as AutonomusControl
 import src.MapCreator as MapCreator
 import src.Vanet as Vanet
+import src.Snapshot as Snapshot
 
 # Control variables
 TIME_FACTOR = 1 # 1 second of simulation, equals TIME_FACTOR seconds
 LIMIT_VEHICLES = 50
+COOPERATIVE_BRAKING = False # Vehicles brake using the leader state received through the VANET
+MAX_FRAME_WALL_TIME = 250000000 # In ns of real time, longer frames (grabbing the window, breakpoints) are clamped before applying the speed, so only stalls lose simulated time
+
+# Snapshots of the simulation
+CHECKPOINT_PERIOD = 5 * 60 * 1000000000 # In ns of simulated time between two checkpoints, 0 to disable them
+CHECKPOINT_PATH = "snapshots/checkpoint.npz"
+WARM_START_SNAPSHOT = None # Snapshot to start the simulation from instead of an empty map, e.g. CHECKPOINT_PATH
 
 # Initialize pygame fonts
 pygame.font.init()
@@ -79,6 +87,18 @@ total_number_of_collisions = 0
 total_number_of_cars = 0
 collision_rate = 0
 
+# Continue from a previous snapshot
+simulation_time = 0
+if WARM_START_SNAPSHOT != None:
+    snapshot = Snapshot.load_snapshot(WARM_START_SNAPSHOT, test_map)
+    vehicles_list = snapshot["vehicles"]
+    latest_vehicle_id = snapshot["new_id"]
+    simulation_time = snapshot["time"]
+    total_number_of_collisions = snapshot["extra"].get("collisions", 0)
+    total_number_of_cars = snapshot["extra"].get("cars", 0)
+    last_time = time.time_ns()
+last_checkpoint_time = simulation_time
+
 """
 Probabilidades:
 Sin nada: ~4%
@@ -88,14 +108,10 @@ Con algoritmo:
 
 while True:
 
-    # Time delta calculations
-    time_delta = (time.time_ns() - last_time) * dynamic_multiplier
+    # Time delta calculations, clamping the real time of stalls so they are not replayed in short sub-steps
+    time_delta = min(time.time_ns() - last_time, MAX_FRAME_WALL_TIME) * dynamic_multiplier
     last_time = time.time_ns()
 
-    # Avoid jumps when grabbing the window
-    if time_delta > 10000000 * dynamic_multiplier:
-        time_delta = 0
-
     # Detect pygame events
     for event in pygame.event.get():
         if event.type == pygame.QUIT:
@@ -121,26 +137,44 @@ while True:
             elif event.key == pygame.K_PLUS:
                 dynamic_multiplier += 0.1
 
-    # Making sure the we only have a certain amount of vehicles
-    if len(vehicles_list) < LIMIT_VEHICLES:
+    # Advance the simulation in sub-steps, short ones around stop lines, turns and close vehicles
+    time_left = time_delta
+    while time_left > 0:
+        time_step = AutonomusControl.adaptive_time_step(vehicles_list, test_map, time_left)
+        time_left -= time_step
 
-        # Spawn vehicles on the spawn points
-        new_sapwns = AutonomusControl.spawn_vehicles(test_map, time_delta, latest_vehicle_id, distances)
-        total_number_of_cars += len(new_sapwns)
-        vehicles_list.extend(new_sapwns["vehicles"])
-        latest_vehicle_id = new_sapwns["new_id"]
-    
-    # Update all elements on the map
-    test_map.tick(time_delta)
+        # Making sure the we only have a certain amount of vehicles
+        if len(vehicles_list) < LIMIT_VEHICLES:
 
-    # Despawn vehicles if needed
-    vehicles_list = AutonomusControl.despawn_vehicles(test_map, vehicles_list, map_size)
+            # Spawn vehicles on the spawn points
+            new_sapwns = AutonomusControl.spawn_vehicles(test_map, time_step, latest_vehicle_id, distances)
+            total_number_of_cars += len(new_sapwns)
+            vehicles_list.extend(new_sapwns["vehicles"])
+            latest_vehicle_id = new_sapwns["new_id"]
+    
+        # Update all elements on the map
+        test_map.tick(time_step)
 
-    # Move all vehicles
-    AutonomusControl.move_vehicles(vehicles_list, test_map, time_delta, set_vehicle)
+        # Despawn vehicles if needed
+        vehicles_list = AutonomusControl.despawn_vehicles(test_map, vehicles_list, map_size)
 
-    # Check the collisions between the vehicles
-    total_number_of_collisions += AutonomusControl.check_collisions(vehicles_list)
+        # Broadcast the beacons of all vehicles and move them
+        if COOPERATIVE_BRAKING:
+            vanet.broadcast(vehicles_list, time_step)
+            AutonomusControl.move_vehicles(vehicles_list, test_map, time_step, set_vehicle, vanet)
+    
+        else:
+            AutonomusControl.move_vehicles(vehicles_list, test_map, time_step, set_vehicle)
+
+        # Check the collisions between the vehicles
+        total_number_of_collisions += AutonomusControl.check_collisions(vehicles_list)
+
+    # Save a checkpoint every period of simulated time
+    simulation_time += time_delta
+    if CHECKPOINT_PERIOD > 0 and simulation_time - last_checkpoint_time >= CHECKPOINT_PERIOD:
+        Snapshot.save_snapshot(CHECKPOINT_PATH, test_map, vehicles_list, latest_vehicle_id, simulation_time,
+                               {"collisions": total_number_of_collisions, "cars": total_number_of_cars})
+        last_checkpoint_time = simulation_time
 
     # Calculate the collision rate
     collision_rate = (total_number_of_collisions / total_number_of_cars) * 100
@@ -8,10 +8,7 @@ Description:
 """
 
 import numpy as np
-import random
-import komm
 import math
-import matplotlib.pyplot as plt
 import cmath
 import libs.ComsChannelsSim.utils as utils
 import libs.ComsChannelsSim.Gaussian as Gaussian
@@ -48,31 +45,51 @@ class channelElement:
     # Violations
     if self.type == "DMC" and self.transitionMatrix == None: raise Exception("Transition matrix parameter is missing")
 
-    if self.type == "AWGN": self.model = komm.AWGNChannel(self.snr, self.signalPower)
-    elif self.type == "DMC": self.model = komm.DiscreteMemorylessChannel(self.transitionMatrix)
-    elif self.type == "BSC": self.model = komm.BinarySymmetricChannel(self.crossoverProbability)
-    elif self.type == "BEC": self.model = komm.BinaryErasureChannel(self.erasureProbability)
-    else: self.model = None
+    # The komm model is only created when it is first needed
+    self._model = None
 
     # Declaring the attenuation arrays
     self.totalAttenuation_dB = 0
     self.attenuationErrorModel = 0
     self.totalGain_dB = 0
   
+  @property
+  def model(self):
+    """
+    The komm model of the channel, komm is imported the first time it is used.
+    """
+    if self._model == None:
+      import komm
+
+      if self.type == "AWGN": self._model = komm.AWGNChannel(self.snr, self.signalPower)
+      elif self.type == "DMC": self._model = komm.DiscreteMemorylessChannel(self.transitionMatrix)
+      elif self.type == "BSC": self._model = komm.BinarySymmetricChannel(self.crossoverProbability)
+      elif self.type == "BEC": self._model = komm.BinaryErasureChannel(self.erasureProbability)
+
+    return self._model
+
   def getCapacity(self):
     return self.model.capacity()
   
-  def generateNoise(self, N):
-    if self.type == "AWGN":
-      if self.band == "BB":
-        noise = [math.sqrt(self.noisePower/2) * random.random() for it in range(N)]
-      
-      elif self.band == "PB":
-        noise_I = [math.sqrt(self.noisePower/2) * random.random() for it in range(N)]
-        noise_Q = [math.sqrt(self.noisePower/2) * random.random() for it in range(N)]
-        noise = [complex(noise_I[it], noise_Q[it]) for it in range(N)]
-
-    return noise
+  def generateNoise(self, N, **kwargs):
+    """
+    Generates the gaussian noise added by the channel, real in base band and complex in pass band.
+
+    Parameters:
+    * N -> Number of noise samples
+    * generator(?) -> np.random.Generator used to generate the noise
+    * seed(?) -> Seed of a new generator, if no generator is provided
+    * out(?) -> Preallocated array of N elements to write the noise into
+
+    Returns:
+    * noise -> Array with the noise samples
+    """
+    if self.type != "AWGN": raise Exception("Noise generation is only supported in AWGN channels")
+
+    generator = kwargs.get("generator", None)
+    if generator == None: generator = np.random.default_rng(kwargs.get("seed", None))
+
+    return utils.generateGaussianNoise(N, self.noisePower, complexNoise = self.band == "PB", generator = generator, out = kwargs.get("out", None))
   
   def friisAttenuation(self, distance, **kwargs):
     """
@@ -90,8 +107,9 @@ class channelElement:
     wavelength = kwargs.get("wavelength", None)
     n = kwargs.get("n", 2)
 
-    if wavelength == None or distance == None: raise Exception("Parameters missing")
+    if wavelength == None or distance is None: raise Exception("Parameters missing")
 
+    if np.ndim(distance) > 0: return utils.NaturalToLogarithmic(np.power((4*math.pi*np.asarray(distance))/(wavelength), n)) # Same formula for arrays of distances
     return utils.NaturalToLogarithmic(math.pow((4*math.pi*distance)/(wavelength), n)) # Friis formula to obtain attenuation in dB
   
   def hataUrbanAttenuation(self, distance, **kwargs):
@@ -117,7 +135,7 @@ class channelElement:
     mobileHeight = kwargs.get("mobileHeight", None)
     frequency = kwargs.get("frequency", None)
     correctionFactorApplied = kwargs.get("correctionFactorApplied", "Small-Medium city")
-    if baseHeight == None or mobileHeight == None or frequency == None or distance == None: raise Exception("Parameters missing")
+    if baseHeight == None or mobileHeight == None or frequency == None or distance is None: raise Exception("Parameters missing")
 
     if correctionFactorApplied == "Small-Medium city": correctionFactor = 0.8 + (1.1*math.log(frequency, 10)-0.7)*mobileHeight-1.56*math.log(frequency, 10)
     elif correctionFactorApplied == "Large city":
@@ -125,7 +143,11 @@ class channelElement:
       elif frequency > 200: correctionFactor = 3.2*math.pow(math.log(11.75*mobileHeight, 10), 2)-4.97
       else: raise Exception("Unexpected exception, too bad")
 
-    return 69.55+26.16*math.log(frequency, 10)-13.82*math.log(baseHeight, 10)-correctionFactor+(44.9-6.55*math.log(baseHeight, 10))*math.log(distance/1000.0, 10)
+    # The distance can also be an array of distances
+    if np.ndim(distance) > 0: distanceTerm = np.log10(np.asarray(distance)/1000.0)
+    else: distanceTerm = math.log(distance/1000.0, 10)
+
+    return 69.55+26.16*math.log(frequency, 10)-13.82*math.log(baseHeight, 10)-correctionFactor+(44.9-6.55*math.log(baseHeight, 10))*distanceTerm
   
   def hataSuburbanAttenuation(self, distance, **kwargs):
     """
@@ -146,7 +168,7 @@ class channelElement:
     mobileHeight = kwargs.get("mobileHeight", None)
     frequency = kwargs.get("frequency", None)
 
-    if baseHeight == None or mobileHeight == None or frequency == None or distance == None: raise Exception("Parameters missing")
+    if baseHeight == None or mobileHeight == None or frequency == None or distance is None: raise Exception("Parameters missing")
 
     return self.hataUrbanAttenuation(distance, baseHeight = baseHeight, mobileHeight = mobileHeight, frequency = frequency) - 2*math.pow(math.log(frequency/28, 10), 2) - 5.4
   
@@ -169,7 +191,7 @@ class channelElement:
     mobileHeight = kwargs.get("mobileHeight", None)
     frequency = kwargs.get("frequency", None)
 
-    if baseHeight == None or mobileHeight == None or frequency == None or distance == None: raise Exception("Parameters missing")
+    if baseHeight == None or mobileHeight == None or frequency == None or distance is None: raise Exception("Parameters missing")
 
     return self.hataUrbanAttenuation(distance, baseHeight, mobileHeight, frequency) - 4.78*math.pow(math.log(frequency, 10), 2) + 18.33*math.log(frequency, 10) - 40.94
 
@@ -245,7 +267,7 @@ class channelElement:
     Calculates the loss attenuation at a given distance using a specific model
 
     Parameters:
-    * distance -> The distance of the receiver from the transmitter [m]
+    * distance -> The distance of the receiver from the transmitter, a number or an array [m]
     * lossModel -> The model we want to use to calculate path loss attenuation {"friis", "hataUrban", "hataSuburban", "hataOpen"}
     * If friis:
       - wavelength -> The wavelength of the signal being transmitted [m]
@@ -575,6 +597,20 @@ class channelElement:
     
     # All attenuations of path loss must have been added previous to this
     receivedPower_dB = self.calculateRecivedPower(transmittedPower_dB = transmittedPower_dB)
+    return self.solveReachProbability(receivedPower_dB, sensitivity_dB, standardDeviation_dB)
+
+  def solveReachProbability(self, receivedPower_dB, sensitivity_dB, standardDeviation_dB):
+    """
+    Calculates the probability of error for a given received power, does not use the state of the channel.
+
+    Parameters:
+    * receivedPower_dB -> The power received [dB]
+    * sensitivity_dB -> The sensitivity the receptor has [dB]
+    * standardDeviation_dB -> The standard deviation of the gaussian error that is in the attenuation of the channel [dB]
+
+    Returns:
+    * reachProbability -> The probability that can be achieved [%]
+    """
     errorModel = Gaussian.Gaussian(receivedPower_dB, math.pow(standardDeviation_dB, 2))
     #print("Received power {}, sensitivity {}".format(receivedPower_dB, sensitivity_dB))
     if receivedPower_dB < sensitivity_dB: errorProbability = 0.5
@@ -622,11 +658,24 @@ class channelElement:
     lossModel = kwargs.get("lossModel", None)
     if lossModel == None: raise Exception("Loss model parameter is missing")
 
-    ndigits = kwargs.get("ndigits", 9)
+    return self.solveDistance_sensitivity(transmittedPower_dB, sensitivity_dB, kwargs, attenuation_dB = self.totalAttenuation_dB, gain_dB = self.totalGain_dB,
+                                          ndigits = kwargs.get("ndigits", 9))
 
-    standardAttenuation_dB = self.totalAttenuation_dB
-    # print("Base attenuation: {:.2f}dB".format(standardAttenuation_dB))
+  def solveDistance_sensitivity(self, transmittedPower_dB, sensitivity_dB, lossParameters, attenuation_dB = 0, gain_dB = 0, ndigits = 9):
+    """
+    Distance maximun taking into account only the sensitivity, does not use nor modify the state of the channel.
 
+    Parameters:
+    * transmittedPower_dB -> The transmitted power by the transmitting station [dB]
+    * sensitivity_dB -> The sensitivity the receptor has [dB]
+    * lossParameters -> Dictionary with the lossModel and its parameters, as in lossAttenuation
+    * attenuation_dB -> The non path loss attenuations of the channel [dB]
+    * gain_dB -> The gains of the channel [dB]
+    * ndigits -> The number of decimals of the received power that must match the sensitivity
+
+    Returns:
+    * distance -> The distance obtained [m]
+    """
     receivedPower_dB = -1
     distance_testing = 1
     factor = 1000.0
@@ -634,10 +683,8 @@ class channelElement:
     action = 0
     while round(sensitivity_dB, ndigits) != round(receivedPower_dB, ndigits):
       # Calculating the new loss attenuation
-      self.setAttenuations(attenuation_dB = standardAttenuation_dB)
-      self.addAttenuation(attenuation_dB = self.lossAttenuation(distance = distance_testing, **kwargs))
-      receivedPower_dB = self.calculateRecivedPower(transmittedPower_dB = transmittedPower_dB)
-      #print("For length {}m, we have attenuation {}dB, with received power {}dB".format(distance_testing, self.totalAttenuation_dB, receivedPower_dB))
+      receivedPower_dB = transmittedPower_dB + gain_dB - (attenuation_dB + self.lossAttenuation(distance_testing, **lossParameters))
+      #print("For length {}m, we have received power {}dB".format(distance_testing, receivedPower_dB))
 
       # Calculating the new distance
       if receivedPower_dB > sensitivity_dB:
@@ -650,9 +697,6 @@ class channelElement:
 
       if action == 1 and prev_action == 0: factor /= 10.0
       prev_action = action
-    
-    # Resetting the attenuation to the begining
-    self.setAttenuations(attenuation_dB = standardAttenuation_dB)
 
     return distance_testing
   
@@ -706,10 +750,27 @@ class channelElement:
     lossModel = kwargs.get("lossModel", None)
     if lossModel == None: raise Exception("Loss model parameter is missing")
 
-    ndigits = kwargs.get("ndigits", 9)
+    return self.solveDistance_reachProbability(transmittedPower_dB, sensitivity_dB, reachProbability, standardDeviation_dB, kwargs,
+                                               attenuation_dB = self.totalAttenuation_dB, gain_dB = self.totalGain_dB, ndigits = kwargs.get("ndigits", 9))
+
+  def solveDistance_reachProbability(self, transmittedPower_dB, sensitivity_dB, reachProbability, standardDeviation_dB, lossParameters, attenuation_dB = 0, gain_dB = 0, ndigits = 9):
+    """
+    Calculates the maximun distance that can be reached with the probability of error indicated as maximun,
+    does not use nor modify the state of the channel.
 
-    standardAttenuation = self.totalAttenuation_dB
+    Parameters:
+    * transmittedPower_dB -> The transmitted power by the transmitting station [dB]
+    * sensitivity_dB -> The sensitivity the receptor has [dB]
+    * reachProbability -> The probability we want to achieve [%]
+    * standardDeviation_dB -> The standard deviation of the gaussian error that is in the attenuation of the channel [dB]
+    * lossParameters -> Dictionary with the lossModel and its parameters, as in lossAttenuation
+    * attenuation_dB -> The non path loss attenuations of the channel [dB]
+    * gain_dB -> The gains of the channel [dB]
+    * ndigits -> The number of decimals of the probability that must match the reach probability
 
+    Returns:
+    * distance -> The distance obtained [m]
+    """
     probability_obatained = 0
     distance_testing = 1
     factor = 1000.0
@@ -717,10 +778,9 @@ class channelElement:
     action = 0
     while round(probability_obatained, ndigits) != round(reachProbability, ndigits):
       # Calculating the new attenuation
-      self.setAttenuations(attenuation_dB = standardAttenuation)
-      self.addAttenuation(attenuation_dB = self.lossAttenuation(distance = distance_testing, **kwargs))
-      probability_obatained = self.calculateReachProbability(transmittedPower_dB = transmittedPower_dB, sensitivity_dB = sensitivity_dB, standardDeviation_dB = standardDeviation_dB)
-      #print("For length {}, we have attenuation {}, with error probability {}".format(distance_testing, self.totalAttenuation_dB, probability_obatained))
+      receivedPower_dB = transmittedPower_dB + gain_dB - (attenuation_dB + self.lossAttenuation(distance_testing, **lossParameters))
+      probability_obatained = self.solveReachProbability(receivedPower_dB, sensitivity_dB, standardDeviation_dB)
+      #print("For length {}, we have error probability {}".format(distance_testing, probability_obatained))
       #time.sleep(0.1)
       # Calculating the new distance
       if probability_obatained > reachProbability:
@@ -732,9 +792,6 @@ class channelElement:
 
       if action == 1 and prev_action == 0: factor /= 10.0
       prev_action = action
-    
-    # Resetting the attenuation to the begining
-    self.setAttenuations(attenuation_dB = standardAttenuation)
 
     return distance_testing
 
@@ -787,9 +844,30 @@ class channelElement:
     lossModel = kwargs.get("lossModel", None)
     if lossModel == None: raise Exception("Loss model parameter is missing")
 
-    ndigits = kwargs.get("ndigits", 9)
+    return self.solvePower_reachProbability(distance, sensitivity_dB, reachProbability, standardDeviation_dB, kwargs,
+                                            attenuation_dB = self.totalAttenuation_dB, gain_dB = self.totalGain_dB, ndigits = kwargs.get("ndigits", 9))
+
+  def solvePower_reachProbability(self, distance, sensitivity_dB, reachProbability, standardDeviation_dB, lossParameters, attenuation_dB = 0, gain_dB = 0, ndigits = 9):
+    """
+    Calculates the transmitted power needed to reach a distance with the probability of error indicated as maximun,
+    does not use nor modify the state of the channel.
+
+    Parameters:
+    * distance -> The distance from transmitter to receiver [m]
+    * sensitivity_dB -> The sensitivity the receptor has [dB]
+    * reachProbability -> The probability we want to achieve [%]
+    * standardDeviation_dB -> The standard deviation of the gaussian error that is in the attenuation of the channel [dB]
+    * lossParameters -> Dictionary with the lossModel and its parameters, as in lossAttenuation
+    * attenuation_dB -> The non path loss attenuations of the channel [dB]
+    * gain_dB -> The gains of the channel [dB]
+    * ndigits -> The number of decimals of the probability that must match the reach probability
 
-    standardAttenuation = self.totalAttenuation_dB
+    Returns:
+    * transmittedPower -> The transmitted power by the transmitting station [dB]
+    """
+
+    # The attenuation does not change with the transmitted power
+    totalAttenuation_dB = attenuation_dB + self.lossAttenuation(distance, **{key: value for key, value in lossParameters.items() if key != "distance"})
 
     probability_obatained = 0
     transmittedPower_testing = 1
@@ -797,11 +875,10 @@ class channelElement:
     prev_action = 0 # 0 stands for distance dec, 1 stands for distance inc
     action = 0
     while round(probability_obatained, ndigits) != round(reachProbability, ndigits):
-      # Calculating the new attenuation
-      self.setAttenuations(attenuation_dB = standardAttenuation)
-      self.addAttenuation(attenuation_dB = self.lossAttenuation(**kwargs))
-      probability_obatained = self.calculateReachProbability(transmittedPower_dB = transmittedPower_testing, sensitivity_dB = sensitivity_dB, standardDeviation_dB = standardDeviation_dB)
-      #print("For length {}, we have attenuation {}, with error probability {}".format(transmittedPower_testing, self.totalAttenuation_dB, probability_obatained))
+      # Calculating the new received power
+      receivedPower_dB = transmittedPower_testing + gain_dB - totalAttenuation_dB
+      probability_obatained = self.solveReachProbability(receivedPower_dB, sensitivity_dB, standardDeviation_dB)
+      #print("For power {}, we have error probability {}".format(transmittedPower_testing, probability_obatained))
       #time.sleep(0.1)
       # Calculating the new distance
       if probability_obatained < reachProbability:
@@ -813,12 +890,73 @@ class channelElement:
 
       if action == 1 and prev_action == 0: factor /= 10.0
       prev_action = action
-    
-    # Resetting the attenuation to the begining
-    self.setAttenuations(attenuation_dB = standardAttenuation)
 
     return transmittedPower_testing
   
+  def sweepDistance(self, **kwargs):
+    """
+    Calculates the link budget at many distances at once, the state of the channel is not modified. All attenuations
+    except loss attenuations must be added previous to this method.
+
+    Parameters:
+    * transmittedPower -> The transmitted power by the transmitting station [W] or [dB]
+    * sensitivity(?) -> The sensitivity the receptor has, needed for the error probability [W] or [dB]
+    * standardDeviation_dB(?) -> The standard deviation of the gaussian error that is in the attenuation of the channel, needed for the error probability [dB]
+    * distances(?) -> Array with the distances to evaluate [m]
+    * If no distances are provided:
+      - minDistance -> The stating distance [m]
+      - maxDistance -> The ending distance, not included [m]
+      - distanceStep -> The distance between two evaluated points, by default 0.1 [m]
+    * lossModel -> The model we want to use to calculate path loss attenuation {"friis", "hataUrban", "hataSuburban", "hataOpen"}
+      and its parameters, as in lossAttenuation
+
+    Returns:
+    * sweep -> Dictionary with the arrays:
+      - "distance" -> Distances evaluated [m]
+      - "lossAttenuation" -> Loss attenuation at each distance [dB]
+      - "receivedPower" -> Received power at each distance [dB]
+      - "errorProbability" -> Probability of error at each distance, only if sensitivity and standard deviation are provided [%]
+    """
+    transmittedPower = kwargs.get("transmittedPower", None)
+    transmittedPower_dB = kwargs.get("transmittedPower_dB", None)
+    if transmittedPower_dB == None and transmittedPower != None: transmittedPower_dB = utils.NaturalToLogarithmic(transmittedPower)
+    elif transmittedPower_dB == None and transmittedPower == None: raise Exception("Transmitted power parameter is missing")
+
+    sensitivity = kwargs.get("sensitivity", None)
+    sensitivity_dB = kwargs.get("sensitivity_dB", None)
+    if sensitivity_dB == None and sensitivity != None: sensitivity_dB = utils.NaturalToLogarithmic(sensitivity)
+
+    standardDeviation_dB = kwargs.get("standardDeviation_dB", None)
+
+    lossModel = kwargs.get("lossModel", None)
+    if lossModel == None: raise Exception("Loss model parameter is missing")
+
+    distances = kwargs.get("distances", None)
+    if distances is None:
+      minDistance = kwargs.get("minDistance", 1)
+      if minDistance == None: raise Exception("Minimun distance parameter is missing")
+      elif minDistance <= 0: raise Exception("Minimun distance must be higher than 0")
+
+      maxDistance = kwargs.get("maxDistance", 10000)
+      if maxDistance == None: raise Exception("Maximun distance parameter is missing")
+
+      distances = np.arange(minDistance, maxDistance, kwargs.get("distanceStep", 0.1))
+    
+    else: distances = np.asarray(distances, dtype = float)
+
+    # Same link budget as calculateRecivedPower, with the loss attenuation of each distance
+    lossAttenuations = self.lossAttenuation(distances, **{key: value for key, value in kwargs.items() if key != "distance"})
+    receivedPowers = transmittedPower_dB + self.totalGain_dB - (self.totalAttenuation_dB + lossAttenuations)
+
+    sweep = {"distance": distances, "lossAttenuation": lossAttenuations, "receivedPower": receivedPowers}
+
+    # Same error model as calculateReachProbability
+    if sensitivity_dB != None and standardDeviation_dB != None:
+      errorModel = Gaussian.Gaussian(receivedPowers, math.pow(standardDeviation_dB, 2))
+      sweep["errorProbability"] = np.where(receivedPowers < sensitivity_dB, 0.5, errorModel.probabilityNormalizedRange(min = sensitivity_dB))
+
+    return sweep
+
   def plotDistance_ErrorProbability(self, **kwargs):
     """
     Plots a graph relating the distnace with the probability of error. All attenuations except loss attenuations must be added previous to this method
@@ -830,6 +968,8 @@ class channelElement:
     * minDistance -> The stating distance for calculating the probability of error [m]
     * maxDistance -> The ending distance for calculating the probability of error [m]
     """
+    import matplotlib.pyplot as plt
+
     transmittedPower = kwargs.get("transmittedPower", None)
     transmittedPower_dB = kwargs.get("transmittedPower_dB", None)
     if transmittedPower_dB == None and transmittedPower != None: transmittedPower_dB = utils.NaturalToLogarithmic(transmittedPower)
@@ -853,19 +993,9 @@ class channelElement:
     maxDistance = kwargs.get("maxDistance", 10000)
     if maxDistance == None: raise Exception("Maximun distance parameter is missing")
 
-    distances = np.arange(minDistance, maxDistance, 0.1)
-
-    standardAttenuation = self.totalAttenuation_dB
-
-    pE = []
-
-    for distance in distances:
-        self.setAttenuations(attenuation_dB = standardAttenuation)
-        self.addAttenuation(attenuation_dB = self.lossAttenuation(distance = distance, **kwargs))
-        pE.append(self.calculateReachProbability(transmittedPower_dB = transmittedPower_dB, sensitivity_dB = sensitivity_dB, standardDeviation_dB = standardDeviation_dB))
-
-    # Resetting the attenuation to the begining
-    self.setAttenuations(attenuation_dB = standardAttenuation)
+    sweep = self.sweepDistance(**{**kwargs, "transmittedPower_dB": transmittedPower_dB, "sensitivity_dB": sensitivity_dB})
+    distances = sweep["distance"]
+    pE = sweep["errorProbability"]
 
     plt.plot(distances, pE, 'b')
     plt.axis([minDistance, maxDistance, min(pE), max(pE)])
@@ -903,6 +1033,8 @@ class channelElement:
       - mobileHeight -> The height of the mobile station antenna, recommended from 1 to 10m [m]
       - frequency -> The frequency used in the transmission, recommended from 150 to 1500MHz [MHz]
     """
+    import matplotlib.pyplot as plt
+
     transmittedPower = kwargs.get("transmittedPower", None)
     transmittedPower_dB = kwargs.get("transmittedPower_dB", None)
     if transmittedPower_dB == None and transmittedPower != None: transmittedPower_dB = utils.NaturalToLogarithmic(transmittedPower)
@@ -923,27 +1055,12 @@ class channelElement:
     maxDistance = kwargs.get("maxDistance", 10000)
     if maxDistance == None: raise Exception("Maximun distance parameter is missing")
 
-    distances = np.arange(minDistance, maxDistance, 0.1)
-
-    standardAttenuation = self.totalAttenuation_dB
-
-    receivedPowers = []
-    ind = 0
-    cmap = []
-    for distance in distances:
-        self.setAttenuations(attenuation_dB = standardAttenuation)
-        self.addAttenuation(attenuation_dB = self.lossAttenuation(distance = distance, **kwargs))
-        receivedPower = self.calculateRecivedPower(transmittedPower_dB = transmittedPower_dB)
-        receivedPowers.append(receivedPower)
-        if sensitivity_dB != None:
-          if receivedPower > sensitivity_dB: cmap.append('g')
-          else: cmap.append('r')
-          ind += 1
-    
-    if sensitivity_dB == None: cmap = 'b'
+    sweep = self.sweepDistance(**{**kwargs, "transmittedPower_dB": transmittedPower_dB, "sensitivity_dB": sensitivity_dB})
+    distances = sweep["distance"]
+    receivedPowers = sweep["receivedPower"]
 
-    # Resetting the attenuation to the begining
-    self.setAttenuations(attenuation_dB = standardAttenuation)
+    if sensitivity_dB != None: cmap = np.where(receivedPowers > sensitivity_dB, 'g', 'r')
+    else: cmap = 'b'
 
     plt.scatter(distances, receivedPowers, c=cmap, marker=",")
     plt.axis([minDistance, maxDistance, min(receivedPowers), max(receivedPowers)])
@@ -979,6 +1096,7 @@ class channelElement:
       - mobileHeight -> The height of the mobile station antenna, recommended from 1 to 10m [m]
       - frequency -> The frequency used in the transmission, recommended from 150 to 1500MHz [MHz]
     """
+    import matplotlib.pyplot as plt
 
     minDistance = kwargs.get("minDistance", 1)
     if minDistance == None: raise Exception("Minimun distance parameter is missing")
@@ -991,11 +1109,7 @@ class channelElement:
     if lossModel == None: raise Exception("Loss model parameter is missing")
 
     distances = np.arange(minDistance, maxDistance, 0.1)
-
-    attenuations = []
-
-    for distance in distances:
-      attenuations.append(self.lossAttenuation(distance = distance, **kwargs))
+    attenuations = self.lossAttenuation(distances, **kwargs)
 
     plt.plot(distances, attenuations, 'b')
     plt.axis([minDistance, maxDistance, min(attenuations), max(attenuations)])
@@ -1014,6 +1128,8 @@ class channelElement:
     * nMin -> The minimun fresnel parameter to plot
     * nMax -> The maximun fresnel parameter to plot
     """
+    import matplotlib.pyplot as plt
+
     v = np.arange(nMin, nMax, 0.01)
 
     F = []
@@ -9,8 +9,6 @@ Description:
 
 import numpy as np
 import libs.ComsChannelsSim.utils as utils
-import scipy.stats as sps
-import matplotlib.pyplot as plt
 
 class Gaussian:
   def __init__(self, mean, variance):
@@ -31,19 +29,24 @@ class Gaussian:
     Parameters:
     * Min -> The left most parameter. np.inf is allowed
     * Max -> The right most parameter. np.inf is allowed
+
+    The mean and both limits can also be arrays, the probabilities are then calculated element wise.
     """
 
-    if min != np.inf and max != np.inf:
-      if min <= self.mean: minProb = utils.Q(abs(min-self.mean)/self.variance)
-      elif min > self.mean: minProb = 1 - utils.Q(abs(min-self.mean)/self.variance)
-      if max <= self.mean: maxProb = utils.Q(abs(max-self.mean)/self.variance)
-      elif max > self.mean: maxProb = 1 - utils.Q(abs(max-self.mean)/self.variance)
+    minGiven = np.any(np.asarray(min) != np.inf)
+    maxGiven = np.any(np.asarray(max) != np.inf)
+
+    if minGiven and maxGiven:
+
+      # Q(-x) = 1 - Q(x), so the probability below each limit does not need any branching
+      minProb = utils.Q((self.mean-min)/self.variance)
+      maxProb = utils.Q((self.mean-max)/self.variance)
 
-      return abs(minProb - maxProb)
+      return np.abs(minProb - maxProb)
     
-    elif min == np.inf and max == np.inf: return 1
-    elif min != np.inf: return utils.Q(abs(min-self.mean)/self.variance)
-    elif max != np.inf: return 1 - utils.Q(abs(max-self.mean)/self.variance)
+    elif not minGiven and not maxGiven: return 1
+    elif minGiven: return utils.Q(np.abs(min-self.mean)/self.variance)
+    elif maxGiven: return 1 - utils.Q(np.abs(max-self.mean)/self.variance)
   
   def getMean(self):
     return self.mean
@@ -55,6 +58,8 @@ class Gaussian:
     return math.sqrt(self.variance)
   
   def plotGaussian(self, lowerBound = -10, upperBound = 10):
+    import matplotlib.pyplot as plt
+    import scipy.stats as sps
 
     # Calculating the Z transform
     z1 = (lowerBound - self.mean) / self.variance
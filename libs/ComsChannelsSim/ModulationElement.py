@@ -12,10 +12,17 @@ Acclarations:
 """
 
 import numpy as np
-import komm
 import math
 import libs.ComsChannelsSim.utils as utils
-import matplotlib.pyplot as plt
+import libs.ComsChannelsSim.ChannelElement as ChannelElement
+
+# Grid of the tables used to invert the Pe formulas [dB]
+INVERSE_TABLE_EBNO_DB_MIN = -20
+INVERSE_TABLE_EBNO_DB_MAX = 40
+INVERSE_TABLE_EBNO_DB_STEP = 0.01
+
+# Inverse tables already calculated, indexed by (modulation, M)
+inverseTables = {}
 
 class modulationElement:
   def __init__(self, modulation, M = 0, **kwargs):
@@ -69,13 +76,28 @@ class modulationElement:
     else:
       self.labeling = kwargs.get("labeling", "reflected")
     
-    if self.modulation == "PSK": self.model = komm.PSKModulation(self.M)
-    elif self.modulation == "QAM": self.model = komm.QAModulation(self.M)
-    elif self.modulation == "PAM": self.model = komm.PAModulation(self.M)
-    else: raise Exception("Modulation is not supported")
+    if self.modulation not in ("PSK", "DPSK", "FSK", "QAM", "PAM"): raise Exception("Modulation is not supported")
+
+    # The komm model is only created when it is first needed
+    self._model = None
 
     self.m = math.log(self.M, 2)
   
+  @property
+  def model(self):
+    """
+    The komm model of the modulation, komm is imported the first time it is used. DPSK and FSK
+    have no model, they can only be evaluated analytically.
+    """
+    if self._model == None:
+      import komm
+
+      if self.modulation == "PSK": self._model = komm.PSKModulation(self.M)
+      elif self.modulation == "QAM": self._model = komm.QAModulation(self.M)
+      elif self.modulation == "PAM": self._model = komm.PAModulation(self.M)
+
+    return self._model
+
   def codify(self, bits, **kwargs):
     """
     Converts a sequence of bits to a sequence of symbols
@@ -211,8 +233,8 @@ class modulationElement:
     EbNo = kwargs.get("EbNo", None)
     EbNo_dB = kwargs.get("EbNo_dB", None)
     
-    if EbNo == None and EbNo_dB != None: EbNo = utils.LogarithmicToNatural(EbNo_dB)
-    elif EbNo_dB == None and EbNo != None: EbNo_dB = utils.NaturalToLogarithmic(EbNo)
+    if EbNo is None and EbNo_dB is not None: EbNo = utils.LogarithmicToNatural(EbNo_dB)
+    elif EbNo_dB is None and EbNo is not None: EbNo_dB = utils.NaturalToLogarithmic(EbNo)
     else: raise Exception("Parameters EbNo or EbNo_dB missing")
 
     return self.model.energy_per_bit / utils.LogarithmicToNatural(EbNo_dB)
@@ -233,8 +255,8 @@ class modulationElement:
     SNR = kwargs.get("SNR", None)
     SNR_dB = kwargs.get("SNR_dB", None)
     
-    if SNR == None and SNR_dB != None: SNR = utils.LogarithmicToNatural(SNR_dB)
-    elif SNR_dB == None and SNR != None: SNR_dB = utils.NaturalToLogarithmic(SNR)
+    if SNR is None and SNR_dB is not None: SNR = utils.LogarithmicToNatural(SNR_dB)
+    elif SNR_dB is None and SNR is not None: SNR_dB = utils.NaturalToLogarithmic(SNR)
     else: raise Exception("Parameters SNR or SNR_dB missing")
 
     # Obtaining the other parameters
@@ -259,8 +281,8 @@ class modulationElement:
     EbNo = kwargs.get("EbNo", None)
     EbNo_dB = kwargs.get("EbNo_dB", None)
     
-    if EbNo == None and EbNo_dB != None: EbNo = utils.LogarithmicToNatural(EbNo_dB)
-    elif EbNo_dB == None and EbNo != None: EbNo_dB = utils.NaturalToLogarithmic(EbNo)
+    if EbNo is None and EbNo_dB is not None: EbNo = utils.LogarithmicToNatural(EbNo_dB)
+    elif EbNo_dB is None and EbNo is not None: EbNo_dB = utils.NaturalToLogarithmic(EbNo)
     else: raise Exception("Parameters EbNo or EbNo_dB missing")
 
     # Obtaining the other parameters
@@ -285,8 +307,8 @@ class modulationElement:
     EbNo = kwargs.get("EbNo", None)
     EbNo_dB = kwargs.get("EbNo_dB", None)
     
-    if EbNo == None and EbNo_dB != None: EbNo = utils.LogarithmicToNatural(EbNo_dB)
-    elif EbNo_dB == None and EbNo != None: EbNo_dB = utils.NaturalToLogarithmic(EbNo)
+    if EbNo is None and EbNo_dB is not None: EbNo = utils.LogarithmicToNatural(EbNo_dB)
+    elif EbNo_dB is None and EbNo is not None: EbNo_dB = utils.NaturalToLogarithmic(EbNo)
     else: raise Exception("Parameters EbNo or EbNo_dB missing")
 
     return utils.LogarithmicToNatural(EbNo_dB)*self.m
@@ -323,6 +345,12 @@ class modulationElement:
     * EbNo(?) -> Energy per bit to noise power spectral density ratio [bits/(s*Hz)]
     * EbNo_dB(?) -> Energy per bit to noise power spectral density ratio [dB]
     * method -> Method to perform the calculations. Options: {simulated, analytically}
+    * If analytically:
+      - EbNo and EbNo_dB can be arrays, a BER is calculated for each value
+    * If simulated:
+      - samples(?) -> Number of symbols sent through the channel, by default 1000000
+      - generator(?) -> np.random.Generator used for the bits and the noise
+      - seed(?) -> Seed of a new generator, if no generator is provided
 
     Returns:
     * BER -> Bit error rate [bit errors/s]
@@ -332,53 +360,76 @@ class modulationElement:
     EbNo = kwargs.get("EbNo", None)
     EbNo_dB = kwargs.get("EbNo_dB", None)
     
-    if EbNo == None and EbNo_dB != None: EbNo = utils.LogarithmicToNatural(EbNo_dB)
-    elif EbNo_dB == None and EbNo != None: EbNo_dB = utils.NaturalToLogarithmic(EbNo)
+    if EbNo is None and EbNo_dB is not None: EbNo = utils.LogarithmicToNatural(EbNo_dB)
+    elif EbNo_dB is None and EbNo is not None: EbNo_dB = utils.NaturalToLogarithmic(EbNo)
     else: raise Exception("Parameters EbNo or EbNo_dB missing")
 
     method = kwargs.get("method", "analytically")
 
     # Simulated method (Process N samples though a channel and calculate the number of errors obtained)
     if method == "simulated":
-      N = 1000000
+      if self.model == None: raise Exception("Modulation does not support this action")
+
+      N = kwargs.get("samples", 1000000)
+      generator = kwargs.get("generator", None)
+      if generator == None: generator = np.random.default_rng(kwargs.get("seed", None))
 
-      B = utils.generateSequenceBits(0.5, int(N*self.m))
+      B = utils.generateSequenceBits(0.5, int(N*self.m), generator = generator)
       A = self.model.modulate(B)
-      print("Noise power: {}".format(self.get_No_from_EbNo(EbNo_dB)))
+      print("Noise power: {}".format(self.get_No_from_EbNo(EbNo_dB = EbNo_dB)))
       if self.modulation == "PSK" or self.modulation == "QAM":
-        AWGN_channel = ChannelElement.channelElement("AWGN", noisePower = self.get_No_from_EbNo(EbNo_dB), band = "PB")
+        AWGN_channel = ChannelElement.channelElement("AWGN", noisePower = self.get_No_from_EbNo(EbNo_dB = EbNo_dB), band = "PB")
       
       elif self.modulation == "PAM" or self.modulation == "ASK":
-        AWGN_channel = ChannelElement.channelElement("AWGN", noisePower = self.get_No_from_EbNo(EbNo_dB), band = "BB")
+        AWGN_channel = ChannelElement.channelElement("AWGN", noisePower = self.get_No_from_EbNo(EbNo_dB = EbNo_dB), band = "BB")
 
-      z = AWGN_channel.generateNoise(N)
+      # Received symbols, the modulated symbols plus the channel noise
+      z = AWGN_channel.generateNoise(A.size, generator = generator)
       q = A + z
       B_r = self.model.demodulate(q)
       errors = (B != B_r).sum()
-      BER = (1.0 * errors / N*self.m)
+      BER = (1.0 * errors / (N*self.m))
       print("Errors detected {}".format(errors))
     
     # Using analytical formulas (Only for AWGN channels)
     elif method == "analytically":
-      if self.modulation == "PSK":
-        Pe = 2*utils.Q(math.sqrt(2*self.get_EsNo_from_EbNo(EbNo_dB = EbNo_dB))*math.sin(math.pi/self.M)) # 4.105 from Sklar
-      
-      elif self.modulation == "DPSK":
-        Pe = 2*utils.Q(math.sqrt(2*self.get_EsNo_from_EbNo(EbNo_dB = EbNo_dB))*math.sin(math.pi/(math.sqrt(2)*self.M))) # 4.106 from Sklar
-      
-      elif self.modulation == "FSK":
-        Pe = (self.M-1)*utils.Q(math.sqrt(self.get_EsNo_from_EbNo(EbNo_dB = EbNo_dB))) # 4.107 from Sklar
-      
-      elif self.modulation == "QAM":
-        Pe = 4*(1-1/math.sqrt(self.M))*utils.Q(math.sqrt((3*self.get_EsNo_from_EbNo(EbNo_dB = EbNo_dB))/(self.M-1)))-4*math.pow((1-1/math.sqrt(self.M)), 2)*math.pow(utils.Q(math.sqrt((3*self.get_EsNo_from_EbNo(EbNo_dB = EbNo_dB))/(self.M-1))), 2) # 3 from ISIT
-      
-      elif self.modulation == "PAM":
-        Pe = (2*(self.M-1)/self.M)*utils.Q(math.sqrt((6*self.m/(math.pow(self.M, 2)-1))*EbNo)) # 8 from BER
-
-      else: raise Exception("Modulation does not support this action")
-      BER = self.get_BER_from_Pe(Pe)
+      BER = self.get_BER_from_Pe(self.calculateSymbolErrorProbability(self.get_EsNo_from_EbNo(EbNo_dB = EbNo_dB)))
     
     return BER
+
+  def calculateSymbolErrorProbability(self, EsNo):
+    """
+    Calculates analytically the symbol error probability of the modulation in an AWGN channel. 
+
+    Parameters:
+    * EsNo -> Energy per symbol to noise power spectral density ratio, a number or an array [No units]
+
+    Returns:
+    * Pe -> Symbol error rate aka SER, with the same shape as EsNo [symbol errors/s]
+    """
+    EsNo = np.asarray(EsNo, dtype = float)
+
+    if self.modulation == "PSK":
+      Pe = 2*utils.Q(np.sqrt(2*EsNo)*math.sin(math.pi/self.M)) # 4.105 from Sklar
+    
+    elif self.modulation == "DPSK":
+      Pe = 2*utils.Q(np.sqrt(2*EsNo)*math.sin(math.pi/(math.sqrt(2)*self.M))) # 4.106 from Sklar
+    
+    elif self.modulation == "FSK":
+      Pe = (self.M-1)*utils.Q(np.sqrt(EsNo)) # 4.107 from Sklar
+    
+    elif self.modulation == "QAM":
+      q = utils.Q(np.sqrt((3*EsNo)/(self.M-1)))
+      Pe = 4*(1-1/math.sqrt(self.M))*q-4*math.pow((1-1/math.sqrt(self.M)), 2)*np.square(q) # 3 from ISIT
+    
+    elif self.modulation == "PAM":
+      Pe = (2*(self.M-1)/self.M)*utils.Q(np.sqrt((6/(math.pow(self.M, 2)-1))*EsNo)) # 8 from BER, with EsNo = EbNo*m
+
+    else: raise Exception("Modulation does not support this action")
+
+    # Keep numbers as numbers
+    if Pe.ndim == 0: return float(Pe)
+    return Pe
   
   def get_Pe_from_EbNo(self, **kwargs):
     """
@@ -423,58 +474,110 @@ class modulationElement:
     return self.get_Pe_from_BER(self.get_BER_from_EbNo(EbNo = self.get_EbNo_from_SNR(**kwargs), **kwargs))
 
   def get_SNR_from_Pe(self, **kwargs):
+    """
+    Calculates the SNR needed to obtain a Pe. Analytical method supposes that AWGN channels are being used.
+
+    Parameters:
+    * Pe -> Symbol error rate aka SER [symbol errors/s]
 
+    Returns:
+    * SNR_dB -> Signal to noise ratio [dB]
+    """
     Pe = kwargs.get("Pe", None)
-    ndigits = kwargs.get("ndigits", 9)
-    Pe_obatained = 0
-    SNR_testing = 0
-    factor = 1.0
-    prev_action = 0 # 0 stands for EbNo inc, 1 stands for EbNo dec
-    action = 0
-    while round(Pe_obatained, ndigits) != round(Pe, ndigits):
-      Pe_obatained = self.get_Pe_from_SNR(SNR_dB = SNR_testing, method = "analytically", **kwargs)
-
-      if Pe_obatained > Pe:
-        action = 0
-        SNR_testing += factor
-      else:
-        action = 1
-        SNR_testing -= factor
-
-      if action == 1 and prev_action == 0: factor /= 10.0
-      prev_action = action
-
-    return SNR_testing
+    if Pe == None: raise Exception("Pe parameter is missing")
+
+    return float(self.solveSNR_dB(Pe, refine = True))
   
   def get_EbNo_from_Pe(self, **kwargs):
     """
+    Calculates the EbNo needed to obtain a Pe. Analytical method supposes that AWGN channels are being used.
+
+    Parameters:
+    * Pe -> Symbol error rate aka SER [symbol errors/s]
+
+    Returns:
+    * EbNo_dB -> Energy per bit to noise power spectral density ratio [dB]
     """
     Pe = kwargs.get("Pe", None)
-    ndigits = kwargs.get("ndigits", 9)
-    Pe_obatained = 0
-    EbNo_testing = 0
-    factor = 1.0
-    prev_action = 0 # 0 stands for EbNo inc, 1 stands for EbNo dec
-    action = 0
-    while round(Pe_obatained, ndigits) != round(Pe, ndigits):
-      Pe_obatained = self.get_Pe_from_EbNo(EbNo_dB = EbNo_testing)
-
-      if Pe_obatained > Pe:
-        action = 0
-        EbNo_testing += factor
-      else:
-        action = 1
-        EbNo_testing -= factor
-
-      if action == 1 and prev_action == 0: factor /= 10.0
-      prev_action = action
-
-    return EbNo_testing
+    if Pe == None: raise Exception("Pe parameter is missing")
+
+    return float(self.solveEbNo_dB(Pe, refine = True))
+
+  def getInverseTable(self):
+    """
+    Returns the table used to invert the Pe formula of this modulation, it is calculated only once for
+    every modulation and number of symbols.
+
+    Returns:
+    * EbNo_dB -> Array of EbNo, increasing [dB]
+    * logPe -> Array with the logarithm in base 10 of the Pe at each EbNo, decreasing
+    """
+    key = (self.modulation, self.M)
+    if key not in inverseTables:
+      EbNo_dB = np.arange(INVERSE_TABLE_EBNO_DB_MIN, INVERSE_TABLE_EBNO_DB_MAX + INVERSE_TABLE_EBNO_DB_STEP, INVERSE_TABLE_EBNO_DB_STEP)
+      Pe = self.get_Pe_from_EbNo(EbNo_dB = EbNo_dB, method = "analytically")
+
+      # Only the strictly decreasing part of the curve can be inverted, the end is lost when the Pe drops to 0
+      valid = (Pe > 0.0) & (np.minimum.accumulate(Pe) == Pe)
+      valid[1:] &= np.diff(Pe) < 0.0
+      inverseTables[key] = (EbNo_dB[valid], np.log10(Pe[valid]))
+
+    return inverseTables[key]
+
+  def solveEbNo_dB(self, Pe, refine = False):
+    """
+    Calculates the EbNo needed to obtain each Pe by interpolation in the inverse table.
+
+    Parameters:
+    * Pe -> Symbol error rate aka SER, a number or an array [symbol errors/s]
+    * refine -> If the interpolated values are refined with the exact formula [Boolean]
+
+    Returns:
+    * EbNo_dB -> Energy per bit to noise power spectral density ratio, nan if the Pe can not be obtained [dB]
+    """
+    EbNo_dB_table, logPe_table = self.getInverseTable()
+    logPe = np.log10(np.asarray(Pe, dtype = float))
+
+    # The interpolation needs an increasing horizontal axis
+    EbNo_dB = np.interp(logPe, logPe_table[::-1], EbNo_dB_table[::-1], left = np.nan, right = np.nan)
+
+    if refine:
+      import scipy.optimize as spo
+
+      EbNo_dB = np.atleast_1d(EbNo_dB)
+      logPe = np.broadcast_to(logPe, EbNo_dB.shape)
+      for i in np.flatnonzero(~np.isnan(EbNo_dB)):
+
+        # The solution is between the two table entries around the interpolated value
+        index = np.clip(np.searchsorted(EbNo_dB_table, EbNo_dB[i]), 1, EbNo_dB_table.size - 1)
+        lower, upper = EbNo_dB_table[index - 1], EbNo_dB_table[index]
+        error = lambda x: math.log10(self.get_Pe_from_EbNo(EbNo_dB = x, method = "analytically")) - logPe[i]
+        if error(lower) * error(upper) < 0: EbNo_dB[i] = spo.brentq(error, lower, upper)
+
+      EbNo_dB = EbNo_dB.reshape(np.shape(Pe))
+
+    return EbNo_dB
+
+  def solveSNR_dB(self, Pe, refine = False):
+    """
+    Calculates the SNR needed to obtain each Pe by interpolation in the inverse table.
+
+    Parameters:
+    * Pe -> Symbol error rate aka SER, a number or an array [symbol errors/s]
+    * refine -> If the interpolated values are refined with the exact formula [Boolean]
+
+    Returns:
+    * SNR_dB -> Signal to noise ratio, nan if the Pe can not be obtained [dB]
+    """
+
+    # Inverse of get_EbNo_from_SNR
+    return self.solveEbNo_dB(Pe, refine = refine) + math.log(self.m, 10)
   
   def drawConstellation(self, annotate = True):
     """
     Draws the constellations of the modulation being used
     """
+    import matplotlib.pyplot as plt
 
     pointConstellation = self.model.constellation
 
@@ -518,6 +621,7 @@ class modulationElement:
     * color -> Color of the curve to plot, using the matplotlib standrad
     * titleEnabled -> If this function adds a title to the graph [Boolean]
     """
+    import matplotlib.pyplot as plt
 
     # Unpacking the parameters
     EbNo_dB_min = kwargs.get("EbNo_dB_min", 0)
@@ -526,15 +630,9 @@ class modulationElement:
     color = kwargs.get("color", 'k')
     titleEnabled = kwargs.get("titleEnabled", True)
 
-    EbNo_dB = EbNo_dB_min
-    ber_range = [1]
-    i = 0
-    while EbNo_dB >= EbNo_dB_min and EbNo_dB < EbNo_dB_max+1 and ber_range[i] > 0.0:
-      ber_range.append(self.get_BER_from_EbNo(EbNo_dB = EbNo_dB, method = "analytically"))
-      i += 1
-      EbNo_dB += 1
-    ber_range.pop(0)
-    EbNo_dB_range = list(range(EbNo_dB_min, EbNo_dB))
+    EbNo_dB_range = np.arange(EbNo_dB_min, EbNo_dB_max+1)
+    ber_range = self.get_BER_from_EbNo(EbNo_dB = EbNo_dB_range, method = "analytically")
+    EbNo_dB_range, ber_range = cutCurveAtZero(EbNo_dB_range, ber_range)
     #print("BER: {}, EbNo: {}".format(ber_range, EbNo_dB_range))
     plt.plot(EbNo_dB_range, ber_range, color + 'o', EbNo_dB_range, ber_range, color)
     plt.axis([EbNo_dB_range[0], EbNo_dB_range[-1],  BER_min, 1])
@@ -546,6 +644,7 @@ class modulationElement:
     if titleEnabled: plt.title("{}{} Modulation".format(self.M, self.modulation))
   
   def draw_Pe_EbNo_curve(self, **kwargs):
+    import matplotlib.pyplot as plt
 
     # Unpacking the parameters
     EbNo_dB_min = kwargs.get("EbNo_dB_min", 0)
@@ -555,15 +654,9 @@ class modulationElement:
     titleEnabled = kwargs.get("titleEnabled", True)
     plot = kwargs.get("plt", plt)
 
-    EbNo_dB = EbNo_dB_min
-    pe_range = [1]
-    i = 0
-    while EbNo_dB >= EbNo_dB_min and EbNo_dB < EbNo_dB_max+1 and pe_range[i] > 0.0:
-      pe_range.append(self.get_Pe_from_EbNo(EbNo_dB = EbNo_dB, method = "analytically"))
-      i += 1
-      EbNo_dB += 1
-    pe_range.pop(0)
-    EbNo_dB_range = list(range(EbNo_dB_min, EbNo_dB))
+    EbNo_dB_range = np.arange(EbNo_dB_min, EbNo_dB_max+1)
+    pe_range = self.get_Pe_from_EbNo(EbNo_dB = EbNo_dB_range, method = "analytically")
+    EbNo_dB_range, pe_range = cutCurveAtZero(EbNo_dB_range, pe_range)
     #print("Pe: {}, EbNo: {}".format(pe_range, EbNo_dB_range))
     plot.plot(EbNo_dB_range, pe_range, color + 'o', EbNo_dB_range, pe_range, color)
     plot.axis([EbNo_dB_range[0], EbNo_dB_range[-1],  Pe_min, 1])
@@ -579,6 +672,7 @@ class modulationElement:
     pass
 
   def draw_Pe_SNR_curve(self, **kwargs):
+    import matplotlib.pyplot as plt
 
     # Unpacking the parameters
     SNR_dB_min = kwargs.get("SNR_dB_min", 0)
@@ -587,15 +681,9 @@ class modulationElement:
     color = kwargs.get("color", 'k')
     titleEnabled = kwargs.get("titleEnabled", True)
 
-    SNR_dB = SNR_dB_min
-    pe_range = [1]
-    i = 0
-    while SNR_dB >= SNR_dB_min and SNR_dB < SNR_dB_max+1 and pe_range[i] > 0.0:
-      pe_range.append(self.get_Pe_from_SNR(SNR_dB = SNR_dB, method = "analytically", **kwargs))
-      i += 1
-      SNR_dB += 1
-    pe_range.pop(0)
-    SNR_dB_range = list(range(SNR_dB_min, SNR_dB))
+    SNR_dB_range = np.arange(SNR_dB_min, SNR_dB_max+1)
+    pe_range = self.get_Pe_from_SNR(SNR_dB = SNR_dB_range, method = "analytically")
+    SNR_dB_range, pe_range = cutCurveAtZero(SNR_dB_range, pe_range)
     #print("Pe: {}, EbNo: {}".format(pe_range, SNR_dB_range))
     plt.plot(SNR_dB_range, pe_range, color + 'o', SNR_dB_range, pe_range, color)
     plt.axis([SNR_dB_range[0], SNR_dB_range[-1],  Pe_min, 1])
@@ -610,4 +698,21 @@ class modulationElement:
     if name != None: print("Information about {}".format(name))
     else: print("Information about modulation element")
     print("Modulation used: {}{}".format(self.M, self.modulation))
-    print("Es: {}, Eb: {}".format(self.model.energy_per_symbol, self.model.energy_per_bit))
\ No newline at end of file
+    print("Es: {}, Eb: {}".format(self.model.energy_per_symbol, self.model.energy_per_bit))
+
+def cutCurveAtZero(x, y):
+  """
+  Cuts a probability curve after its first value that drops to "0", as there is nothing to plot after it
+  in a logarithmic scale.
+
+  Parameters:
+  * x -> Array with the values of the horizontal axis
+  * y -> Array with the probabilities
+
+  Returns:
+  * x -> The horizontal values up to the first "0", included
+  * y -> The probabilities up to the first "0", included
+  """
+  zeros = np.flatnonzero(y <= 0.0)
+  if zeros.size > 0: return (x[:zeros[0]+1], y[:zeros[0]+1])
+  return (x, y)
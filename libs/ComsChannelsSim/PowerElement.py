@@ -8,6 +8,11 @@ Description:
 """
 
 import libs.ComsChannelsSim.utils as utils
+import numpy as np
+import weakref
+
+# Parameters that change the equivalent values of an element and all the elements after it
+CASCADE_PARAMETERS = ("gain_dB", "temperature", "previousElement")
 
 class powerElement:
   def __init__(self, **kwargs):
@@ -24,6 +29,11 @@ class powerElement:
     * attenuationDistance [dB/m]
     """
 
+    # Elements connected after this one, and cached equivalent values up to this element
+    self.nextElements = weakref.WeakSet()
+    self._equivalentGain_dB = None
+    self._equivalentTemperature = None
+
     self.distance = kwargs.get("distance", None)
 
     gain = kwargs.get("gain", None)
@@ -67,6 +77,30 @@ class powerElement:
     if self.temperature == None: self.temperature = (self.figure - 1) * 290
 
     self.previousElement = kwargs.get("previousElement", None)
+
+  def __setattr__(self, name, value):
+    """
+    Keeps the links to the next elements and invalidates the cached equivalent values when
+    a parameter of the cascade changes.
+    """
+    if name == "previousElement":
+      previousElement = self.__dict__.get("previousElement", None)
+      if previousElement != None: previousElement.nextElements.discard(self)
+      if value != None: value.nextElements.add(self)
+
+    object.__setattr__(self, name, value)
+
+    if name in CASCADE_PARAMETERS: self.invalidateEquivalentValues()
+
+  def invalidateEquivalentValues(self):
+    """
+    Forgets the cached equivalent values of this element and of all the elements after it.
+    """
+    self._equivalentGain_dB = None
+    self._equivalentTemperature = None
+
+    for nextElement in list(self.nextElements):
+      nextElement.invalidateEquivalentValues()
   
   def calculateEquivalentGain(self):
     """
@@ -76,8 +110,11 @@ class powerElement:
     * EquivalentGain -> The equivalent gain of all the system [dB]
     """
 
-    if self.previousElement == None: return self.gain_dB
-    else: return self.gain_dB + self.previousElement.calculateEquivalentGain()
+    if self._equivalentGain_dB == None:
+      if self.previousElement == None: self._equivalentGain_dB = self.gain_dB
+      else: self._equivalentGain_dB = self.gain_dB + self.previousElement.calculateEquivalentGain()
+
+    return self._equivalentGain_dB
   
   def calculateEquivalentTemperature(self):
     """
@@ -86,9 +123,12 @@ class powerElement:
     Returns:
     * EquivalentTemperature -> The equivalent temperature of all the system
     """
-    if self.previousElement == None: return self.temperature
-    else: 
-      return self.previousElement.calculateEquivalentTemperature() + (self.temperature/utils.LogarithmicToNatural(self.previousElement.calculateEquivalentGain()))
+    if self._equivalentTemperature == None:
+      if self.previousElement == None: self._equivalentTemperature = self.temperature
+      else: 
+        self._equivalentTemperature = self.previousElement.calculateEquivalentTemperature() + (self.temperature/utils.LogarithmicToNatural(self.previousElement.calculateEquivalentGain()))
+
+    return self._equivalentTemperature
   
   def printRelevantData(self, name = None):
     if name != None: print("Information about {}".format(name))
@@ -105,6 +145,23 @@ class powerElement:
     print("Temperature: {:.2f}K".format(self.temperature))
     print("Equivalent temperature up to this element: {:.2f}K".format(equivalent_temperature))
 
+def calculateEquivalentValues(elements):
+  """
+  Calculates the equivalent gain and temperature of many chains of power elements, elements shared
+  between chains are only calculated once.
+
+  Parameters:
+  * elements -> List with the last element of each chain
+
+  Returns:
+  * equivalentGains -> Array with the equivalent gain of each chain [dB]
+  * equivalentTemperatures -> Array with the equivalent temperature of each chain [K]
+  """
+  equivalentGains = np.array([element.calculateEquivalentGain() for element in elements], dtype = float)
+  equivalentTemperatures = np.array([element.calculateEquivalentTemperature() for element in elements], dtype = float)
+
+  return (equivalentGains, equivalentTemperatures)
+
 def plotAxis(ax):
   ax.set_aspect('equal')
   ax.grid(True, which='both')
@@ -9,18 +9,19 @@ Description:
 
 import numpy as np
 import random
-import matplotlib.pyplot as plt
 import scipy as sp
 import math
 
 k = 1.3803e-23 # Boltzman constant
 
-def generateSequenceBits(probabilityOnes, samples):
+def generateSequenceBits(probabilityOnes, samples, generator = None):
   """
   Generates a random sequenece of n samples with a probability of generating
-  a 1 provided.
+  a 1 provided. If a np.random.Generator is provided, the whole sequence is generated at once with it.
   """
 
+  if generator != None: return (generator.random(samples) < probabilityOnes).astype(int)
+
   arr = []
 
   for i in range(samples):
@@ -31,6 +32,33 @@ def generateSequenceBits(probabilityOnes, samples):
   
   return np.array(arr)
 
+def generateGaussianNoise(samples, noisePower, complexNoise = False, generator = None, out = None):
+  """
+  Generates zero mean gaussian noise with a variance of noisePower/2 in each dimension.
+
+  Parameters:
+  * samples -> Number of noise samples
+  * noisePower -> Noise power No [W]
+  * complexNoise -> If True the noise is complex, with independent real and imaginary parts
+  * generator -> np.random.Generator used to generate the noise, an unseeded one if not provided
+  * out -> Preallocated array of samples elements (float64, or complex128 if complexNoise) to write the noise into
+
+  Returns:
+  * noise -> Array with the noise samples
+  """
+  if generator == None: generator = np.random.default_rng()
+
+  dtype = np.complex128 if complexNoise else np.float64
+  if out is None: out = np.empty(samples, dtype = dtype)
+  elif out.dtype != dtype or out.size != samples: raise Exception("Output buffer does not match the noise samples")
+
+  # Writing the real and imaginary parts directly through a real view of the buffer
+  realOut = out.view(np.float64)
+  generator.standard_normal(out = realOut)
+  realOut *= math.sqrt(noisePower/2)
+
+  return out
+
 def changeZerosByNegatives(sequence):
   newSequence = np.zeros(sequence.size)
   for i in range(sequence.size):
@@ -58,9 +86,11 @@ def F(input):
   return 1-Q(input)
 
 def NaturalToLogarithmic(natural):
+  if np.ndim(natural) > 0: return 10 * np.log10(natural)
   return 10 * math.log(natural, 10)
 
 def LogarithmicToNatural(logarithmic):
+  if np.ndim(logarithmic) > 0: return np.power(10.0, np.asarray(logarithmic)/10.0)
   return math.pow(10, logarithmic/10.0)
 
 def FrequencyToWavelength(frequency, speed = 299792458):
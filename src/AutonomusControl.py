@@ -12,7 +12,81 @@ going_to_turn = True
 
 SAFE_DISTANCE = 3
 
-def move_vehicles(vehicle_list, map, time_delta, set_vehicle):
+# Give every spawned vehicle a route to a random road leaving the map, needs the tile road connections of the map
+USE_ROUTES = False
+
+# Adaptive time step, large steps while traffic flows freely and short ones around events
+MAX_TIME_STEP = 100000000 # In ns
+MIN_TIME_STEP = 1000000 # In ns
+EVENT_STEP_DISTANCE = 0.5 # In meters, maximum distance travelled in one step close to an event
+
+def adaptive_time_step(vehicle_list, map, time_left):
+    """
+    Calculates the next time step to simulate. Vehicles close to a stop line, a turn or another
+    vehicle bound the step so they travel at most EVENT_STEP_DISTANCE in it.
+
+    Args:
+        vehicle_list (list): List of vehicle objects.
+        map: Map object representing the environment.
+        time_left (float): Time left to simulate in the current frame in nanoseconds.
+
+    Returns:
+        float: The time step in nanoseconds, never longer than time_left.
+    """
+    time_step = min(time_left, MAX_TIME_STEP)
+
+    for vehicle in vehicle_list:
+        if not _close_to_event(vehicle, map):
+            continue
+
+        # Fastest speed the vehicle can reach during the step
+        speed = min(vehicle.speed + vehicle.acceleration * time_step / 1000000000, vehicle.max_speed)
+        if speed > 0:
+            time_step = min(time_step, max(EVENT_STEP_DISTANCE / speed * 1000000000, MIN_TIME_STEP))
+
+    return min(time_step, time_left)
+
+def _close_to_event(vehicle, map):
+    """
+    Checks if the vehicle is turning, braking, following another vehicle, or in a tile with stops or turns.
+    """
+    if vehicle.turning or vehicle.turning_turn_id != -1 or vehicle.braking or vehicle.closest_vehicle_id != -1:
+        return True
+
+    for tile_id in (vehicle.location_tile, vehicle.direction_tile):
+        if map.tile_contains(tile_id, "stop") or map.tile_contains(tile_id, "turn"):
+            return True
+
+    return False
+
+def cast_look_ahead_rays(vehicle_list, map):
+    """
+    Casts the outdated look-ahead rays of all the vehicles searching for a turn, intersecting them
+    with the turn borders in a single batch instead of one vehicle at a time.
+
+    Args:
+        vehicle_list (list): List of vehicle objects.
+        map: Map object representing the environment.
+    """
+    casting_vehicles = []
+    rays = []
+    for vehicle in vehicle_list:
+        if vehicle.turning or vehicle.collision_status != 0 or (not map.tile_contains(vehicle.location_tile, "turn") and not map.tile_contains(vehicle.direction_tile, "turn")):
+            continue
+
+        ray = vehicle.look_ahead_ray(map)
+        if ray != None:
+            casting_vehicles.append(vehicle)
+            rays.append(ray)
+
+    if len(casting_vehicles) == 0:
+        return
+
+    crossings = map.batch_collision_turns(casting_vehicles, [ray[0] for ray in rays], [ray[1] for ray in rays])
+    for vehicle, ray, (turn_ids, points) in zip(casting_vehicles, rays, crossings):
+        vehicle.set_look_ahead_crossings(ray[0], turn_ids, points)
+
+def move_vehicles(vehicle_list, map, time_delta, set_vehicle, vanet = None):
     """
     Autonomously move vehicles, handling turning and stopping as necessary.
 
@@ -24,12 +98,17 @@ def move_vehicles(vehicle_list, map, time_delta, set_vehicle):
         map: Map object representing the environment.
         time_delta (float): Time passed since the last update.
         set_vehicle (int): The ID of the vehicle for which debugging information is printed.
+        vanet (Vanet): When given, cooperative braking is used, taking the leader state from
+            the beacons each vehicle received instead of searching all vehicles (default is None).
     """
 
     # Debug reset
     for vehicle in vehicle_list:
         vehicle.debug_detected = False
 
+    # Cast the outdated look-ahead rays of the vehicles searching for turns together
+    cast_look_ahead_rays(vehicle_list, map)
+
     # Iterate through all vehicles
     for vehicle in vehicle_list:
 
@@ -51,7 +130,12 @@ def move_vehicles(vehicle_list, map, time_delta, set_vehicle):
         check_for_turns = map.tile_contains(vehicle.location_tile, "turn")# and vehicle.speed != 0
         if check_for_turns:
 
-            detected_turns_ids = map.crossed_turns(vehicle)
+            # Routed vehicles only look for the turns of their route and the one they selected
+            if vehicle.route != None:
+                detected_turns_ids = map.crossed_turns(vehicle, vehicle.route.turn_ids | {vehicle.turning_turn_id})
+            
+            else:
+                detected_turns_ids = map.crossed_turns(vehicle)
 
             # Check if the vehicle exited the turn it was navigating
             if not last_turn_id in detected_turns_ids and len(detected_turns_ids) != 0:
@@ -86,7 +170,7 @@ def move_vehicles(vehicle_list, map, time_delta, set_vehicle):
 
         # Rotate function
         if (new_turn or ended_turning) and not vehicle.skippingturn:
-            vehicle.turn_around_map_turn(map, time_delta, started_turning, ended_turning)
+            vehicle.turn_around_map_turn(map, started_turning, ended_turning)
 
         # Keep it turning to avoid end-of-turn bug
         elif vehicle.skippingturn and not ended_turning:
@@ -120,8 +204,12 @@ def move_vehicles(vehicle_list, map, time_delta, set_vehicle):
         # Check if the vehicle is not braking already to a stop sign and if is not on a optional turn
         if not vehicle.braking:# and abs(map.tile_get_coincidences(vehicle.location_tile, "turn")) <= 1:
 
-            # Detect for closest vehicle
-            closest_detected_vehicle, closest_vehicle_distance = vehicle.detect_closest_vehicle(map, vehicle_list, debug)
+            # Detect for closest vehicle, from the received beacons if braking cooperatively
+            if vanet != None:
+                closest_detected_vehicle, closest_vehicle_distance = vehicle.detect_closest_vehicle(map, vehicle_list, debug, vanet.received_beacons(vehicle), vanet.time)
+            
+            else:
+                closest_detected_vehicle, closest_vehicle_distance = vehicle.detect_closest_vehicle(map, vehicle_list, debug)
 
             if debug:
 
@@ -144,7 +232,7 @@ def move_vehicles(vehicle_list, map, time_delta, set_vehicle):
                 if total_braking_distance >= closest_vehicle_distance:
 
                     # Making sure we are going faster than the vehicle to stop to and that they are not stopping to us
-                    if vehicle.speed >= closest_detected_vehicle.speed and closest_detected_vehicle.closest_vehicle != vehicle:
+                    if vehicle.speed >= closest_detected_vehicle.speed and closest_detected_vehicle.closest_vehicle_id != vehicle.id:
                         
                         # Selecting the option to wait for vehicle
                         vehicle.waiting_for_vehicle = True
@@ -203,7 +291,7 @@ def render_vehicles(vehicle_list, screen, map, set_vehicle):
 
 def spawn_vehicles(map, time_delta, latest_vehicle_id, distances):
     """
-    Add new vehicles to the map following the probabilities of spawning for each spawn point.
+    Add new vehicles to the map following the demand of each spawn point.
 
     Args:
         map: Map object representing the environment.
@@ -215,10 +303,10 @@ def spawn_vehicles(map, time_delta, latest_vehicle_id, distances):
     """
     new_vehicles = []
 
-    # Getting the list of spawn points that will spawn vehicles in this execution
-    spawns_ids = map.spawns_this_execution(time_delta)
+    # Getting the spawn points and destinations of the vehicles spawning in this execution
+    spawns = map.spawns_this_execution(time_delta)
 
-    for spawn_id in spawns_ids:
+    for spawn_id, despawn_id in spawns:
         spawn = map.spawns[spawn_id]
         vehicle_type_random = random.random()
 
@@ -228,7 +316,13 @@ def spawn_vehicles(map, time_delta, latest_vehicle_id, distances):
             # Check if this vehicle should spawn
             if vehicle_type_random <= vehicle["Spawning-rate"]:
                 vehicle_speed = vehicle["Max-speed"] * spawn.speed  # The spawn speed is a percentage of the max speed
-                new_vehicle = Vehicle.Vehicle(vehicle, {"id": latest_vehicle_id, "x": spawn.x, "y": spawn.y, "direction": spawn.direction, "speed": vehicle_speed}, map, distances[vehicle_type_id])
+                new_vehicle = Vehicle.Vehicle(vehicle, {"id": latest_vehicle_id, "x": spawn.x, "y": spawn.y, "direction": spawn.direction, "speed": vehicle_speed, "transceiver": vehicle_type_id}, map, distances[vehicle_type_id])
+
+                # Route from the spawn point to its destination, or to a random exit of the map without one
+                if USE_ROUTES:
+                    path = map.tile_graph.shortest_path(spawn_id, despawn_id)
+                    new_vehicle.route = map.tile_graph.create_route(path) if path != None else map.tile_graph.random_route(spawn)
+
                 new_vehicles.append(new_vehicle)
                 latest_vehicle_id += 1
                 break
@@ -267,5 +361,8 @@ def despawn_vehicles(map, vehicles_list, map_size):
 
         if not vehicle_collides:
             new_vehicles_list.append(vehicle)
+        
+        else:
+            map.remove_vehicle(vehicle)
 
     return new_vehicles_list
@@ -0,0 +1,115 @@
+"""
+Originally designed by pasblo
+GNU GENERAL PUBLIC LICENSE
+Traffic demand of a map. The arrivals of every spawn point follow a Poisson process, sampled in advance
+into a priority queue, so the demand does not depend on the time step. Arrivals at a blocked spawn point
+wait in its pending queue until the entry is free, up to MAX_PENDING_ARRIVALS per spawn point, the arrivals
+beyond that are dropped and counted.
+"""
+
+import collections
+import heapq
+import random
+
+NO_DESTINATION = -1 # Despawn id of the arrivals without a destination
+MAX_PENDING_ARRIVALS = 10 # Arrivals waiting at a spawn point, the ones arriving at a full queue are dropped
+
+class DemandGenerator:
+    """
+    Class generating the arrivals of vehicles at the spawn points of a map, either with the rate of every
+    spawn point or with an origin-destination matrix.
+    """
+    def __init__(self, map, od_matrix = None):
+        """
+        Initializes a DemandGenerator object and samples the first arrival of every stream.
+
+        Args:
+            map (Map): The map with the spawn points.
+            od_matrix (list, optional): Vehicles per second from every spawn point (rows) to every despawn
+                point (columns). Without it every spawn point uses its own probability per second and
+                the arrivals have no destination. Pairs the tile graph knows to be unreachable are skipped.
+
+        Returns:
+            None
+        """
+        self.map = map
+        self.time = 0 # In ns
+
+        # Rate of every stream of arrivals (spawn id, despawn id), in vehicles per second
+        self.rates = {}
+        if od_matrix == None:
+            for spawn in map.spawns:
+                self.rates[(spawn.id, NO_DESTINATION)] = spawn.probability_per_second
+
+        else:
+            prune = len(map.tile_graph.spawn_states) != 0
+            for spawn_id, despawn_rates in enumerate(od_matrix):
+                for despawn_id, rate in enumerate(despawn_rates):
+                    if prune and not map.tile_graph.is_reachable(spawn_id, despawn_id):
+                        continue
+                    self.rates[(spawn_id, despawn_id)] = rate
+
+        # Next arrival time of every stream, sorted by time
+        self.arrivals = []
+        for stream in sorted(self.rates):
+            self._schedule(stream)
+
+        # Arrivals waiting for their spawn point to be free, destinations indexed by spawn id
+        self.pending = collections.defaultdict(collections.deque)
+
+        # Arrivals dropped because the pending queue of their spawn point was full, indexed by spawn id
+        self.dropped = collections.Counter()
+
+    def _schedule(self, stream, time = 0):
+        """
+        Samples the next arrival of a stream after the given time, streams without rate never arrive.
+        """
+        rate = self.rates[stream]
+        if rate <= 0:
+            return
+
+        heapq.heappush(self.arrivals, (time + random.expovariate(rate) * 1000000000, stream))
+
+    def spawns_this_execution(self, time_delta):
+        """
+        Advances the demand clock and returns the arrivals that can enter the map, at most one per spawn point.
+        Arrivals at a spawn point with MAX_PENDING_ARRIVALS already waiting are dropped and counted in dropped.
+
+        Parameters:
+            time_delta (float): The time passed since the last iteration in nanoseconds.
+
+        Returns:
+            list: Tuples (spawn id, despawn id) of the vehicles to spawn, the despawn id is NO_DESTINATION
+                without an origin-destination matrix.
+        """
+        self.time += time_delta
+
+        # Move the arrivals up to now to the pending queues, dropping them if the queue is full
+        while len(self.arrivals) != 0 and self.arrivals[0][0] <= self.time:
+            arrival_time, stream = heapq.heappop(self.arrivals)
+            if len(self.pending[stream[0]]) < MAX_PENDING_ARRIVALS:
+                self.pending[stream[0]].append(stream[1])
+            else:
+                self.dropped[stream[0]] += 1
+            self._schedule(stream, arrival_time)
+
+        # Release the first arrival of every free spawn point
+        spawns = []
+        for spawn_id in sorted(self.pending):
+            destinations = self.pending[spawn_id]
+            if len(destinations) != 0 and not self.map.spawn_busy(spawn_id):
+                spawns.append((spawn_id, destinations.popleft()))
+
+        return spawns
+
+    def pending_count(self):
+        """
+        Returns the amount of arrivals waiting for their spawn point to be free.
+        """
+        return sum(len(destinations) for destinations in self.pending.values())
+
+    def dropped_count(self):
+        """
+        Returns the amount of arrivals dropped because their spawn point had too many arrivals waiting.
+        """
+        return sum(self.dropped.values())
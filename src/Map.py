@@ -7,12 +7,18 @@ import pygame
 import json
 import math
 import src.math_utils as math_utils
-import random
+import src.turn_kernels as turn_kernels
+import src.math_kernels as math_kernels
+import src.Routing as Routing
+import src.Demand as Demand
+import numpy as np
 
 class Stop:
     """
     Class representing a stop line defined by a start point and an end point.
     """
+    __slots__ = ("id", "start_x", "start_y", "end_x", "end_y", "trigger_light_id")
+
     def __init__(self, specs):
         """
         Initializes a Stop object.
@@ -57,6 +63,9 @@ class Turn:
     two angles (start and end of the semicircle),
     and two distances indicating the semicircle's minor and major radius.
     """
+    __slots__ = ("id", "x", "y", "first_angle", "second_angle", "min_distance", "max_distance", "can_skip",
+                 "first_angle_segment", "second_angle_segment", "turn_span")
+
     def __init__(self, specs):
         """
         Initializes a Turn object.
@@ -74,7 +83,7 @@ class Turn:
         self.second_angle = math.radians(specs["second-angle"])
         self.min_distance = specs["min-distance"]
         self.max_distance = specs["max-distance"]
-        self.can_skip = specs["can-skip"]
+        self.can_skip = specs["can-skip"] in (True, "True")
         self.calculate_border_lines()
         self.calculate_turn_span()
     
@@ -96,7 +105,7 @@ class Turn:
             "second-angle": math.degrees(self.second_angle),
             "min-distance": self.min_distance,
             "max-distance": self.max_distance,
-            "can-skip": self.can_skip
+            "can-skip": "True" if self.can_skip else "False"
         }
     
     def calculate_border_lines(self):
@@ -126,6 +135,8 @@ class Spawn_Point:
     """
     Class representing a spawn point defined by an x and y coordinate.
     """
+    __slots__ = ("id", "x", "y", "direction", "speed", "probability_per_second")
+
     def __init__(self, specs):
         """
         Initializes a SpawnPoint object.
@@ -166,6 +177,8 @@ class Despawn_Line:
     """
     Class representing a line defined by a start point and an end point for despawning vehicles.
     """
+    __slots__ = ("id", "start_x", "start_y", "end_x", "end_y")
+
     def __init__(self, specs):
         """
         Initializes a DespawnLine object.
@@ -230,6 +243,8 @@ class Traffic_Light:
     AMBER = 1
     GREEN = 2
 
+    __slots__ = ("id", "x", "y", "time_red", "time_amber", "time_green", "color", "time_passed_since_last_change")
+
     def __init__(self, specs):
         """
         Initializes a TrafficLight object.
@@ -308,7 +323,94 @@ class Traffic_Light:
             self.color = self.RED
             self.time_passed_since_last_change = 0
 
+class Lane:
+    """
+    Class representing one direction of travel on a straight tile, with the vehicles on it
+    sorted by their longitudinal position, from the last one to the first one.
+    """
+    __slots__ = ("tile_id", "direction", "direction_x", "direction_y", "vehicles")
+
+    def __init__(self, tile_id, direction):
+        """
+        Initializes a Lane object.
+
+        Parameters:
+        - tile_id (int): The tile the lane is in.
+        - direction (int): The direction of travel in degrees, 0, 90, 180 or 270.
+        """
+        self.tile_id = tile_id
+        self.direction = direction
+        self.direction_x = round(math.cos(math.radians(direction)))
+        self.direction_y = round(math.sin(math.radians(direction)))
+        self.vehicles = []
+
+    def position(self, vehicle):
+        """
+        Returns the longitudinal position of a vehicle along the lane, minus for the fourth quadrant.
+        """
+        return vehicle.x * self.direction_x - vehicle.y * self.direction_y
+
+    def _update_indexes(self, start):
+        """
+        Updates the index stored in the vehicles from the given position onwards.
+        """
+        for index in range(start, len(self.vehicles)):
+            self.vehicles[index].lane_index = index
+
+    def insert(self, vehicle):
+        """
+        Inserts a vehicle keeping the lane sorted.
+        """
+        position = self.position(vehicle)
+        index = len(self.vehicles)
+        while index > 0 and self.position(self.vehicles[index - 1]) > position:
+            index -= 1
+
+        self.vehicles.insert(index, vehicle)
+        vehicle.lane = self
+        self._update_indexes(index)
+
+    def reorder(self, vehicle):
+        """
+        Moves a vehicle that moved along the lane past its neighbours, swapping it with them while
+        they are out of order. Called after every move so the lane stays sorted even when vehicles
+        overlap or pass each other on long steps.
+        """
+        index = vehicle.lane_index
+        position = self.position(vehicle)
+
+        # Passed the vehicles in front
+        while index + 1 < len(self.vehicles) and self.position(self.vehicles[index + 1]) < position:
+            self.vehicles[index] = self.vehicles[index + 1]
+            self.vehicles[index].lane_index = index
+            index += 1
+
+        # Passed by the vehicles behind
+        while index > 0 and self.position(self.vehicles[index - 1]) > position:
+            self.vehicles[index] = self.vehicles[index - 1]
+            self.vehicles[index].lane_index = index
+            index -= 1
+
+        self.vehicles[index] = vehicle
+        vehicle.lane_index = index
+
+    def remove(self, vehicle):
+        """
+        Removes a vehicle from the lane.
+        """
+        index = vehicle.lane_index
+        del self.vehicles[index]
+        vehicle.lane = None
+        vehicle.lane_index = -1
+        self._update_indexes(index)
+
 TURN_COLLISION_ERROR = 1
+BATCH_INTERSECTION_MIN_PAIRS = 32 # Vehicle and turn border pairs from which the intersections are vectorized, the scalar loop is faster below it
+LANE_DIRECTION_ERROR = 0.01 # In radians, maximum misalignment of a vehicle to be in a lane
+
+# Tile events of the vehicles, also the change of the amount of vehicles on the tile
+TILE_ENTER = 1
+TILE_EXIT = -1
 
 class Map:
     def __init__(self, name):
@@ -339,6 +441,9 @@ class Map:
         self.tile_row_count = self.json.get("tile-row-count", 0)
         self.tile_column_count = self.json.get("tile-column-count", 0)
 
+        # Store the road connections of each tile, in degrees
+        self.tile_road_connections = self.json.get("tile-road-connections", [])
+
         # Mobility map data
         try:
             self.stops_specs = self.json.get("stops", [])
@@ -351,12 +456,14 @@ class Map:
             self.traffic_lights = [Traffic_Light(specs) for specs in self.traffic_lights_specs]
         except Exception as e:
             self.traffic_lights = []
+        self.traffic_lights_by_id = {traffic_light.id: traffic_light for traffic_light in self.traffic_lights}
 
         try:
             self.turns_specs = self.json.get("turns", [])
             self.turns = [Turn(specs) for specs in self.turns_specs]
         except Exception as e:
             self.turns = []
+        self._create_turn_segments()
 
         try:
             self.spawns_specs = self.json.get("spawn-points", [])
@@ -369,8 +476,26 @@ class Map:
             self.despawns = [Despawn_Line(specs) for specs in self.despawns_specs]
         except Exception as e:
             self.despawns = []
-    
-        self.vehicles_at_spawn_tiles = []
+
+        # Amount of vehicles on every tile with spawn points, and tile of every spawn point
+        self.spawn_tile_occupancy = {tile_id: 0 for tile_id in range(len(self.tile_data)) if self.tile_contains(tile_id, "spawn")}
+        self.spawn_tiles = [-1] * len(self.spawns)
+        for tile_id in self.spawn_tile_occupancy:
+            for spawn_id in range(self.tile_data[tile_id][2][0], self.tile_data[tile_id][2][1]):
+                self.spawn_tiles[spawn_id] = tile_id
+
+        # Functions called with every tile event, as listener(vehicle, tile_id, event)
+        self.tile_listeners = []
+
+        # Lanes on straight tiles, indexed by tile id and direction
+        self.lanes = {}
+        self._create_lanes()
+
+        # Connectivity between tiles, to route the vehicles
+        self.tile_graph = Routing.TileGraph(self)
+
+        # Arrivals of vehicles at the spawn points, from the origin-destination matrix of the map if it has one
+        self.demand = Demand.DemandGenerator(self, self.json.get("od-matrix", None))
 
     # ==============================================================
     # SECTION: Internal functions
@@ -388,49 +513,128 @@ class Map:
         Returns:
             TrafficLight or None: The TrafficLight instance if found, None otherwise.
         """
-        for traffic_light_instance in self.traffic_lights:
-            if traffic_light_instance.id == target_id:
-                return traffic_light_instance
-        return None  # Return None if the ID is not found
+        return self.traffic_lights_by_id.get(target_id, None)  # Return None if the ID is not found
+
+    def _tiles_elements(self, elements, element_index, tile_ids):
+        """
+        Returns the elements placed on the given tiles, in id order, without checking the rest of the map.
+
+        Element ids are their position in the elements list, and each tile stores the range of ids
+        of its elements, so the elements of a tile are a slice of the list.
+
+        Args:
+            elements (list): The elements of the map (self.stops, self.turns or self.spawns).
+            element_index (int): Position of the elements id range in the tile data, 0 for stops, 1 for turns, 2 for spawns.
+            tile_ids (tuple): The tiles to get the elements from, invalid tiles (-1) are ignored.
+
+        Returns:
+            list: The elements placed on the tiles.
+        """
+        # Ranges of ids of the tiles, sorted so the elements are in id order
+        ranges = sorted({tuple(self.tile_data[tile_id][element_index]) for tile_id in tile_ids if tile_id >= 0})
+
+        tiles_elements = []
+        for start_id, end_id in ranges:
+            tiles_elements.extend(elements[start_id:end_id])
+
+        return tiles_elements
+
+    def _create_turn_segments(self):
+        """
+        Stores the border segments of every turn in arrays, to intersect them in batches.
+        The first and second angle segments of the turn with id i are the rows 2*i and 2*i + 1.
+        """
+        segments = [segment for turn in self.turns for segment in (turn.first_angle_segment, turn.second_angle_segment)]
+        self.turn_segment_starts = np.array([segment[0] for segment in segments], dtype=float).reshape(-1, 2)
+        self.turn_segment_ends = np.array([segment[1] for segment in segments], dtype=float).reshape(-1, 2)
+        self.turn_segment_ids = np.repeat(np.array([turn.id for turn in self.turns], dtype=int), 2)
+
+    def _create_lanes(self):
+        """
+        Creates the lanes of every straight tile, the ones connected on two opposite sides
+        without any stops or turns, one for each direction of travel.
+        """
+        for tile_id, road_connections in enumerate(self.tile_road_connections):
+
+            # Only tiles with two opposite connections and nothing in between
+            if len(road_connections) != 2 or (road_connections[0] - road_connections[1]) % 180 != 0 or road_connections[0] == road_connections[1]:
+                continue
+
+            if self.tile_contains(tile_id, "stop") or self.tile_contains(tile_id, "turn"):
+                continue
+
+            # Vehicles going towards each of the connections
+            for road_connection in road_connections:
+                self.lanes[(tile_id, road_connection)] = Lane(tile_id, road_connection)
 
     # ==============================================================
     # SECTION: Interact functions
     # Description: Functions that interact with the map
     # ==============================================================
 
-    def spawns_this_execution(self, time_delta):
+    def spawn_busy(self, spawn_id):
         """
-        Returns a list of spawn points that requested to spawn on this iteration based on probability.
+        Checks if the tile where a spawn point is located is occupied by a vehicle.
 
         Parameters:
-        - time_delta (float): The time passed since the last iteration in nanoseconds.
+        - spawn_id (int): The id of the spawn point.
 
         Returns:
-        - List[int]: A list of spawn point IDs that should spawn based on probability.
+        - bool: True if a vehicle is on the tile of the spawn point, False otherwise.
         """
-        spawns_ids = []
+        return self.spawn_tile_occupancy.get(self.spawn_tiles[spawn_id], 0) != 0
 
-        for spawn in self.spawns:
+    def add_tile_listener(self, listener):
+        """
+        Registers a function to be called every time a vehicle enters or exits a tile.
 
-            # Checking that the tile where this spawn is located is not occupied
-            spawn_busy = False
-            for occupied_tile in self.vehicles_at_spawn_tiles:
-                if self.tile_contains_specific(occupied_tile, "spawn", spawn.id):
-                    spawn_busy = True
-                    break
-            
-            # Skipping the spawn if the tile is occupied
-            if spawn_busy:
-                continue
+        Parameters:
+        - listener (function): Called as listener(vehicle, tile_id, event), with event TILE_ENTER or TILE_EXIT.
+        """
+        self.tile_listeners.append(listener)
 
-            # Calculate the probability of spawning based on time_delta
-            spawn_probability = spawn.probability_per_second * (time_delta / 1000000000)
-            
-            # Check if the spawn should occur based on a random number and probability
-            if random.random() < spawn_probability:
-                spawns_ids.append(spawn.id)
+    def vehicle_tile_transition(self, vehicle, old_tiles, new_tiles):
+        """
+        Emits the tile exit and enter events of a vehicle moving between the tiles it occupies,
+        tiles occupied twice by the same vehicle get a single event.
 
-        return spawns_ids
+        Parameters:
+        - vehicle: The vehicle changing tiles.
+        - old_tiles (tuple): The tiles the vehicle was on, empty for new vehicles.
+        - new_tiles (tuple): The tiles the vehicle is on, empty for vehicles leaving the map.
+        """
+        for tile_id in set(old_tiles).difference(new_tiles):
+            self._tile_event(vehicle, tile_id, TILE_EXIT)
+
+        for tile_id in set(new_tiles).difference(old_tiles):
+            self._tile_event(vehicle, tile_id, TILE_ENTER)
+
+    def _tile_event(self, vehicle, tile_id, event):
+        """
+        Updates the spawn occupancy with a tile event and passes it to the listeners, tiles outside of the map are ignored.
+        """
+        if tile_id < 0:
+            return
+
+        if tile_id in self.spawn_tile_occupancy:
+            self.spawn_tile_occupancy[tile_id] += event
+
+        for listener in self.tile_listeners:
+            listener(vehicle, tile_id, event)
+
+    def spawns_this_execution(self, time_delta):
+        """
+        Returns the vehicles arriving at the spawn points that can enter the map on this iteration.
+        Arrivals at occupied spawn points wait until the spawn point is free.
+
+        Parameters:
+        - time_delta (float): The time passed since the last iteration in nanoseconds.
+
+        Returns:
+        - List[tuple]: Spawn point id and destination despawn point id of every vehicle to spawn,
+          Demand.NO_DESTINATION when the map has no origin-destination matrix.
+        """
+        return self.demand.spawns_this_execution(time_delta)
     
     def tick(self, time_delta):
         """
@@ -442,9 +646,6 @@ class Map:
         # Update the state of all traffic lights
         for traffic_light in self.traffic_lights:
             traffic_light.tick(time_delta)
-        
-        # Update the tiles ids of vehicles on them by resetting the list
-        self.vehicles_at_spawn_tiles = []
     
     def render_tile(self, tile_id, color, screen):
 
@@ -543,11 +744,8 @@ class Map:
         """
         stop_ids_in_sight = []
 
-        for stop in self.stops:
-
-            # Check if stop is on same tile as vehicle or in next tile
-            if not self.tile_contains_specific(vehicle.location_tile, "stop", stop.id) and not self.tile_contains_specific(vehicle.direction_tile, "stop", stop.id):
-                continue
+        # Only stops on same tile as vehicle or in next tile
+        for stop in self._tiles_elements(self.stops, 0, (vehicle.location_tile, vehicle.direction_tile)):
 
             # Check if stop is in sight
             angle_point1 = math_utils.angle_point_to_point(vehicle.front_x, vehicle.front_y, stop.start_x, stop.start_y)
@@ -577,22 +775,23 @@ class Map:
             stop.end_x - vehicle.front_x, vehicle.front_y - stop.end_y
         )
 
-    def crossed_turns(self, vehicle):
+    def crossed_turns(self, vehicle, turn_ids=None):
         """
         Returns a list of turn IDs that the car is inside of based on its position and direction.
 
         Args:
             vehicle (Vehicle): The vehicle for which to check the crossed turns.
+            turn_ids (set): When given, only these turns are checked.
 
         Returns:
             list: A list of turn IDs that the vehicle is currently inside of.
         """
         crossed_turn_ids = []
 
-        for turn in self.turns:
+        # Only turns on the same tile as the vehicle
+        for turn in self._tiles_elements(self.turns, 1, (vehicle.location_tile,)):
 
-            # Checking if the turn is on the same tile as the vehicle
-            if not self.tile_contains_specific(vehicle.location_tile, "turn", turn.id):
+            if turn_ids != None and turn.id not in turn_ids:
                 continue
 
             # Calculate the distance to the turning point
@@ -613,56 +812,103 @@ class Map:
 
         return crossed_turn_ids
     
-    def collision_turns(self, vehicle):
+    def collision_turns(self, vehicle, start=None, end=None):
+        """
+        Finds the turn borders crossed by a line in front of the vehicle.
 
-        first_angle_segment_coordinate = None
-        second_angle_segment_coordinate = None
+        Parameters:
+        - vehicle: The vehicle, only turns in its location and direction tiles are checked.
+        - start: Start point of the line, defaults to the vehicle position.
+        - end: End point of the line, defaults to the vehicle collision point.
+
+        Returns:
+        - Tuple with the crossed turn ids and the crossing points.
+        """
+        if start == None:
+            start = (vehicle.x, vehicle.y)
         
-        angle_segment_coordinates = []
-        turn_ids = []
+        if end == None:
+            end = (vehicle.collision_x, vehicle.collision_y)
 
-        for turn in self.turns:
+        return self.batch_collision_turns([vehicle], [start], [end])[0]
 
-            # Checking if the turn is on the same tile as the vehicle
-            if not self.tile_contains_specific(vehicle.location_tile, "turn", turn.id) and not self.tile_contains_specific(vehicle.direction_tile, "turn", turn.id):
-                continue
-            
-            # Calculating the collision points with the turn segments
-            first_angle_segment_coordinate = math_utils.find_intersection(turn.first_angle_segment[0], turn.first_angle_segment[1], (vehicle.x, vehicle.y), (vehicle.collision_x, vehicle.collision_y))
-            second_angle_segment_coordinate = math_utils.find_intersection(turn.second_angle_segment[0], turn.second_angle_segment[1], (vehicle.x, vehicle.y), (vehicle.collision_x, vehicle.collision_y))
+    def batch_collision_turns(self, vehicles, starts, ends):
+        """
+        Finds the turn borders crossed by a line in front of each vehicle, intersecting all the lines
+        with the borders of the turns on their tiles at once.
 
-            if first_angle_segment_coordinate != None:
-                turn_ids.append(turn.id)
-                angle_segment_coordinates.append(first_angle_segment_coordinate)
-            
-            if second_angle_segment_coordinate != None:
-                turn_ids.append(turn.id)
-                angle_segment_coordinates.append(second_angle_segment_coordinate)
-        
-        return (turn_ids, angle_segment_coordinates)
+        Parameters:
+        - vehicles: The vehicles, only turns in their location and direction tiles are checked.
+        - starts: Start point of the line of each vehicle.
+        - ends: End point of the line of each vehicle.
 
-    def closest_collision_turns(self, vehicle):
+        Returns:
+        - List with a tuple of crossed turn ids and crossing points for each vehicle.
+        """
+        # Pairs of vehicles and border segments to intersect, in turn id order for each vehicle
+        vehicle_indices = []
+        segment_indices = []
+        for vehicle_index, vehicle in enumerate(vehicles):
+            for turn in self._tiles_elements(self.turns, 1, (vehicle.location_tile, vehicle.direction_tile)):
+                vehicle_indices.extend((vehicle_index, vehicle_index))
+                segment_indices.extend((2 * turn.id, 2 * turn.id + 1))
+
+        collision_turns = [([], []) for _ in vehicles]
+
+        # Few pairs are faster to intersect one by one than with the overhead of the arrays
+        if len(segment_indices) < BATCH_INTERSECTION_MIN_PAIRS:
+            for vehicle_index, segment_index in zip(vehicle_indices, segment_indices):
+                turn = self.turns[segment_index // 2]
+                segment = turn.first_angle_segment if segment_index % 2 == 0 else turn.second_angle_segment
+                point = math_utils.find_intersection(segment[0], segment[1], starts[vehicle_index], ends[vehicle_index])
+
+                if point != None:
+                    collision_turns[vehicle_index][0].append(turn.id)
+                    collision_turns[vehicle_index][1].append(point)
+
+            return collision_turns
+
+        # Intersecting all pairs at once
+        vehicle_indices = np.array(vehicle_indices, dtype=int)
+        segment_indices = np.array(segment_indices, dtype=int)
+        crossing_x, crossing_y, crossing = math_kernels.find_intersection(self.turn_segment_starts[segment_indices], self.turn_segment_ends[segment_indices],
+                                                                          np.array(starts, dtype=float)[vehicle_indices], np.array(ends, dtype=float)[vehicle_indices])
+
+        for vehicle_index, turn_id, x, y in zip(vehicle_indices[crossing].tolist(), self.turn_segment_ids[segment_indices[crossing]].tolist(),
+                                                crossing_x[crossing].tolist(), crossing_y[crossing].tolist()):
+            collision_turns[vehicle_index][0].append(turn_id)
+            collision_turns[vehicle_index][1].append((x, y))
+
+        return collision_turns
+
+    def closest_collision_turns(self, vehicle, collision_turns=None):
+        """
+        Selects the closest turn borders crossed by the line in front of the vehicle.
 
+        Parameters:
+        - vehicle: The vehicle looking ahead.
+        - collision_turns: Already known crossings (turn ids, points), computed with collision_turns if not given.
+
+        Returns:
+        - Tuple with the closest turn ids and their crossing points.
+        """
         # Get all turns that collide with the first line in sight
-        collision_turns = self.collision_turns(vehicle)
+        if collision_turns == None:
+            collision_turns = self.collision_turns(vehicle)
 
         if len(collision_turns[0]) == 0:
             return collision_turns
 
-        collision_turns_dict = dict(zip(collision_turns[1], collision_turns[0]))
-
         # Calculate the distances from all points to the vehicle
         collision_turns_distances = [math_utils.distance_point_to_point(vehicle.x, vehicle.y, collision_turn[0], collision_turn[1]) for collision_turn in collision_turns[1]]
 
         # Select only the minimun distance
         min_distance = min(collision_turns_distances)
 
-        # Select a subset of points that are very close to each other
+        # Select a subset of points that are very close to each other, keeping the matching ids (several turns can share a point)
+        closest_ids = [turn_id for turn_id, distance in zip(collision_turns[0], collision_turns_distances) if abs(distance - min_distance) < TURN_COLLISION_ERROR]
         closest_points = [point for point, distance in zip(collision_turns[1], collision_turns_distances) if abs(distance - min_distance) < TURN_COLLISION_ERROR]
 
-        # Select the matching ids to the subset of points extracted from the original array
-        closest_ids = [collision_turns_dict[point] for point in closest_points]
-
         return (closest_ids, closest_points)
 
     def entry_turn(self, vehicle, turn_id, turning_direction, debug=False):
@@ -672,7 +918,7 @@ class Map:
         Args:
             vehicle (Vehicle): The vehicle for which to check the entry angle.
             turn_id (int): The ID of the turn to check.
-            turning_direction (str): The turning direction, either "Counterclockwise" or "Clockwise".
+            turning_direction (int): The turning direction, either math_utils.COUNTERCLOCKWISE or math_utils.CLOCKWISE.
             debug (bool): If True, print debug information.
 
         Returns:
@@ -680,63 +926,42 @@ class Map:
         """
         turn = self.turns[turn_id]
 
-        # Calculate the angle between the car and the turn point
-        car_turn_angle = math_utils.angle_point_to_point(turn.x, turn.y, vehicle.x, vehicle.y)
+        # Branchy check, compiled when the compiled kernels are available
+        return turn_kernels.entry_turn(turn.x, turn.y, turn.first_angle, turn.second_angle, vehicle.x, vehicle.y,
+                                       turning_direction, math.radians(TURN_ANGLE_ERROR))
+    
+    def lane_leader(self, vehicle):
+        """
+        Finds the vehicle in front of the given one using the lanes of the straight tiles.
 
-        # Checking if the car is outside of the allowed angles; bug if any of these distances is 0 it might cause issues
-        distance_to_first_angle = math_utils.closest_angular_distance(turn.first_angle, car_turn_angle, turning_direction)
-        distance_to_second_angle = math_utils.closest_angular_distance(turn.second_angle, car_turn_angle, turning_direction)
+        Parameters:
+        - vehicle: The vehicle looking for its leader, must be in a lane.
 
-        # Calculate the turn span of the turn
-        turn_span = math_utils.correct_radian(turn.second_angle - turn.first_angle)
+        Returns:
+        - Tuple with the leader (None if there is none) and the distance to it in pixels, or None if
+          the leader cannot be known from the lanes (the next tile is not a straight tile, or the
+          leader is not ahead, overlapping the vehicle).
+        """
+        lane = vehicle.lane
 
-        # Print debug information if requested
-        #if debug:
-        #    print(f"Turn angle {car_turn_angle}, dist_first {distance_to_first_angle}, dist_second {distance_to_second_angle}, turning_direction {turning_direction}, first angle {turn.first_angle}, second angle {turn.second_angle}, turn span {turn_span}")
+        # Vehicle in front on the same lane
+        if vehicle.lane_index + 1 < len(lane.vehicles):
+            leader = lane.vehicles[vehicle.lane_index + 1]
+            distance = lane.position(leader) - lane.position(vehicle)
+            return (leader, distance) if distance > 0 else None
 
-        # Checking if the angle is in the correct range
-        if abs(distance_to_first_angle) > math.radians(TURN_ANGLE_ERROR) and abs(distance_to_second_angle) > math.radians(TURN_ANGLE_ERROR):
-            return False
+        # Last vehicle on the lane of the next tile
+        next_lane = self.lanes.get((vehicle.direction_tile, lane.direction), None)
+        if next_lane == None:
+            return None
 
-        # What follows here is a mess that nobody will ever understand - Pablo Rivero Lázaro
-        if abs(distance_to_first_angle) <= math.radians(TURN_ANGLE_ERROR):
-            if turning_direction == "Counterclockwise":
-                # Inside the turn
-                if abs(distance_to_second_angle) < turn_span:
-                    if distance_to_first_angle < 0:
-                        return True
-                else:
-                    if distance_to_first_angle > 0:
-                        return True
-            elif turning_direction == "Clockwise":
-                # Inside the turn
-                if abs(distance_to_second_angle) < turn_span:
-                    if distance_to_first_angle > 0:
-                        return True
-                else:
-                    if distance_to_first_angle < 0:
-                        return True
-
-        if abs(distance_to_second_angle) <= math.radians(TURN_ANGLE_ERROR):
-            if turning_direction == "Clockwise":
-                # Inside the turn
-                if abs(distance_to_first_angle) < turn_span:
-                    if distance_to_second_angle < 0:
-                        return True
-                else:
-                    if distance_to_second_angle > 0:
-                        return True
-            elif turning_direction == "Counterclockwise":
-                # Inside the turn
-                if abs(distance_to_first_angle) < turn_span:
-                    if distance_to_second_angle > 0:
-                        return True
-                else:
-                    if distance_to_second_angle < 0:
-                        return True
+        if len(next_lane.vehicles) == 0:
+            return (None, -1)
+
+        leader = next_lane.vehicles[0]
+        distance = lane.position(leader) - lane.position(vehicle)
+        return (leader, distance) if distance > 0 else None
 
-        return False
-    
     # ==============================================================
     # SECTION: Optimization functions
     # Description: Functions that are intended to optimize the functionality of the game
@@ -756,13 +981,21 @@ class Map:
         if y_tile >= self.tile_row_count:
             y_tile = self.tile_row_count - 1
 
-        tile_id = x_tile + y_tile * self.tile_row_count
+        return x_tile + y_tile * self.tile_row_count
 
-        # Adding to the list of vehicles on tiles that this tile is occupied
-        if self.tile_contains(tile_id, "spawn") and tile_id not in self.vehicles_at_spawn_tiles:
-            self.vehicles_at_spawn_tiles.append(tile_id)
+    def tile_bounds(self, x, y):
+        """
+        Returns the boundaries of the tile cell a point is in, the tile of any point inside them is the same.
+
+        Parameters:
+        - x, y (float): The point in pixels.
 
-        return tile_id
+        Returns:
+        - tuple: The minimum x, minimum y, maximum x and maximum y of the cell, the maximums are excluded.
+        """
+        x_min = math.floor(x / self.tile_size) * self.tile_size
+        y_min = math.floor(y / self.tile_size) * self.tile_size
+        return (x_min, y_min, x_min + self.tile_size, y_min + self.tile_size)
     
     def next_tile(self, location_tile, direction):
 
@@ -865,4 +1098,41 @@ class Map:
             if element_start_id <= element_id < element_end_id and element_id != element_end_id:
                 return True
 
-        return False
\ No newline at end of file
+        return False
+
+    def update_vehicle_lane(self, vehicle):
+        """
+        Moves a vehicle to the lane of its location tile and direction, or out of any lane if
+        the tile is not straight or the vehicle is not aligned with it.
+
+        Parameters:
+        - vehicle: The vehicle that changed tile or direction.
+        """
+        lane = None
+
+        # Checking the vehicle is aligned with one of the four directions
+        direction = round(math.degrees(vehicle.direction) / 90) % 4 * 90
+        if abs((vehicle.direction - math.radians(direction) + math.pi) % (2 * math.pi) - math.pi) <= LANE_DIRECTION_ERROR:
+            lane = self.lanes.get((vehicle.location_tile, direction), None)
+
+        if lane == vehicle.lane:
+            return
+
+        if vehicle.lane != None:
+            vehicle.lane.remove(vehicle)
+
+        if lane != None:
+            lane.insert(vehicle)
+
+    def remove_vehicle(self, vehicle):
+        """
+        Removes a vehicle from the lane and the spawn tiles it is in, used when despawning it.
+
+        Parameters:
+        - vehicle: The vehicle leaving the map.
+        """
+        self.vehicle_tile_transition(vehicle, vehicle.occupied_tiles, ())
+        vehicle.occupied_tiles = ()
+
+        if vehicle.lane != None:
+            vehicle.lane.remove(vehicle)
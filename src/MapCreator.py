@@ -5,19 +5,22 @@ GNU GENERAL PUBLIC LICENSE
 
 import src.MapTile as MapTile
 import src.math_utils as math_utils
+import src.Routing as Routing
 import pygame
 import math
 import json
 
 TILE_SIZE = 21 # In meters, cannot be changed (Fixed to tile and vehicle image design)
 
-def create_map(map_descriptor, map_name):
+def create_map(map_descriptor, map_name, od_matrix = None):
     """
     Creates a map based on the provided map descriptor and saves it as an image and JSON file.
 
     Parameters:
     - map_descriptor (list of lists): Descriptor of the map layout.
     - map_name (str): Name of the map.
+    - od_matrix (list of lists, optional): Vehicles per second from every spawn point (rows) to every despawn point (columns).
+      Without it each spawn point spawns with the probability per second of its tile, towards no destination.
 
     Returns:
     - tuple: Screen width and height of the created map.
@@ -32,7 +35,7 @@ def create_map(map_descriptor, map_name):
 
     # Creating the final map
     map_image = pygame.Surface((screen_width, screen_heigth))
-    map_data = {"stops":[], "turns":[], "traffic-lights":[], "spawn-points":[], "despawn-points":[], "tile-data":[], "tile-size":0}
+    map_data = {"stops":[], "turns":[], "traffic-lights":[], "spawn-points":[], "despawn-points":[], "tile-data":[], "tile-road-connections":[], "tile-size":0}
 
     # Id incrementer
     spawn_point_id = 0
@@ -165,6 +168,7 @@ def create_map(map_descriptor, map_name):
             map_data["turns"].extend(tile_data["data"]["turns"])
             map_data["traffic-lights"].extend(tile_data["data"]["traffic-lights"])
             map_data["tile-data"].append([[elements_ids_snap["stops-ids"], elements_ids["stops-ids"]], [elements_ids_snap["turns-ids"], elements_ids["turns-ids"]], [spawn_point_id_snap, spawn_point_id]]) # Storing the first and last stop and turn ids
+            map_data["tile-road-connections"].append([round(math.degrees(angle)) % 360 for angle in road_connections_angles]) # In degrees
 
             # Increase x coordinate
             x += 1
@@ -179,6 +183,13 @@ def create_map(map_descriptor, map_name):
     map_data["tile-size"] = tile_pixel_size # In pixels
     map_data["tile-row-count"] = len(map_descriptor) # In amount
     map_data["tile-column-count"] = len(map_descriptor[0])
+
+    # Save the connectivity graph between the lanes of the tiles, to route the vehicles
+    map_data["tile-graph"] = Routing.create_graph_data(map_data)
+
+    # Save the demand between spawn and despawn points
+    if od_matrix != None:
+        map_data["od-matrix"] = od_matrix
     
     # Save the map as png
     pygame.image.save(map_image, "images/maps/" + map_name + ".png")
@@ -26,6 +26,7 @@ TILES = ["Grass", "Straight", "Turn", "Uncontrolled_crossroad",
          "Traffic_light_controlled_crossroad"]
 
 class Road_Connection():
+    __slots__ = ("angle",)
 
     def __init__(self, specs):
         """
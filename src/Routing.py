@@ -0,0 +1,345 @@
+"""
+Originally designed by pasblo
+GNU GENERAL PUBLIC LICENSE
+Routing of vehicles over the tiles of a map. The tiles and their road connections form a directed graph
+whose states are a tile and the heading a vehicle enters it with, so every state is a lane of the tile.
+The graph is compiled into the map JSON by the map creator, and a route is the sequence of tiles from a
+spawn point to a road leaving the map, with the turns used on every tile so the vehicles know in advance
+where they are going to turn.
+"""
+
+import collections
+import functools
+import random
+
+# Offset of the neighbour tile (column, row) for every road connection, in degrees
+CONNECTION_OFFSETS = {0: (1, 0), 90: (0, -1), 180: (-1, 0), 270: (0, 1)}
+
+ROUTE_CACHE_SIZE = 1024 # Amount of shortest path searches kept by every graph
+
+# ==============================================================
+# SECTION: Graph compilation
+# Description: Builds the connectivity graph stored in the map
+# JSON from the map data
+# ==============================================================
+
+def _tile_neighbours(tile_id, tile_road_connections, column_count, row_count):
+    """
+    Returns the tile reached through every road connection of a tile, -1 if the road leaves the map.
+    Connections without a matching connection on the neighbour tile are not roads.
+    """
+    column = tile_id % column_count
+    row = tile_id // column_count
+
+    neighbours = {}
+    for road_connection in tile_road_connections[tile_id]:
+        column_offset, row_offset = CONNECTION_OFFSETS[road_connection]
+        neighbour_column = column + column_offset
+        neighbour_row = row + row_offset
+
+        # Road leaving the map
+        if not (0 <= neighbour_column < column_count and 0 <= neighbour_row < row_count):
+            neighbours[road_connection] = -1
+            continue
+
+        # Both tiles must be connected to each other
+        neighbour_tile = neighbour_column + neighbour_row * column_count
+        if (road_connection + 180) % 360 in tile_road_connections[neighbour_tile]:
+            neighbours[road_connection] = neighbour_tile
+
+    return neighbours
+
+def _turns_for_movement(turns_specs, heading_in, heading_out):
+    """
+    Returns the ids of the turns that take a vehicle from one heading to another.
+
+    A turn from the first to the second angle is driven entering with the first angle plus 90 degrees
+    and leaving with the second angle plus 90 degrees, and the opposite way entering with the second
+    angle minus 90 degrees and leaving with the first angle minus 90 degrees.
+    """
+    turn_ids = []
+    for turn_specs in turns_specs:
+        first_angle = round(turn_specs["first-angle"])
+        second_angle = round(turn_specs["second-angle"])
+
+        if ((first_angle + 90) % 360, (second_angle + 90) % 360) == (heading_in, heading_out) or ((second_angle - 90) % 360, (first_angle - 90) % 360) == (heading_in, heading_out):
+            turn_ids.append(turn_specs["id"])
+
+    return turn_ids
+
+def _edge_exit(x, y, width, height, tile_size, column_count, row_count):
+    """
+    Returns the exit (tile id, heading leaving the map) of a point on the edge of the map.
+    """
+    column = min(max(int(x // tile_size), 0), column_count - 1)
+    row = min(max(int(y // tile_size), 0), row_count - 1)
+
+    if y <= 0:
+        heading = 90
+    elif x <= 0:
+        heading = 180
+    elif y >= height:
+        heading = 270
+    else:
+        heading = 0
+
+    return [column + row * column_count, heading]
+
+def create_graph_data(map_data):
+    """
+    Compiles the connectivity graph of a map from its tiles road connections, turns, spawn and despawn points.
+
+    Args:
+        map_data (dict): The map JSON data, with the tile road connections in degrees.
+
+    Returns:
+        dict: The graph, with the keys:
+            "movements": Lists [tile id, heading in, heading out, next tile id, turn ids] of every movement
+                allowed across a tile, the next tile is -1 when the road leaves the map and there are no
+                turn ids when the vehicle goes straight.
+            "spawn-states": The state [tile id, heading in] of every spawn point.
+            "despawn-exits": The exit [tile id, heading out] of every despawn point.
+        Empty lists when the map has no road connections.
+    """
+    tile_road_connections = map_data.get("tile-road-connections", [])
+    tile_data = map_data.get("tile-data", [])
+    turns_specs = map_data.get("turns", [])
+    column_count = map_data.get("tile-column-count", 0)
+    row_count = map_data.get("tile-row-count", 0)
+    tile_size = map_data.get("tile-size", 0)
+
+    graph_data = {"movements": [], "spawn-states": [], "despawn-exits": []}
+    if len(tile_road_connections) == 0 or len(tile_road_connections) != column_count * row_count:
+        return graph_data
+
+    # Every lane of every tile, never turning back
+    for tile_id, road_connections in enumerate(tile_road_connections):
+        neighbours = _tile_neighbours(tile_id, tile_road_connections, column_count, row_count)
+        tile_turns_specs = turns_specs[tile_data[tile_id][1][0]:tile_data[tile_id][1][1]]
+
+        for road_connection in road_connections:
+            heading_in = (road_connection + 180) % 360
+
+            for heading_out, neighbour_tile in neighbours.items():
+                if heading_out == road_connection:
+                    continue
+
+                # Going straight needs the opposite road connection, any other movement needs a turn doing it
+                turn_ids = [] if heading_out == heading_in else _turns_for_movement(tile_turns_specs, heading_in, heading_out)
+                if heading_out == heading_in or len(turn_ids) != 0:
+                    graph_data["movements"].append([tile_id, heading_in, heading_out, neighbour_tile, turn_ids])
+
+    # Tile and heading of every spawn point
+    spawn_tiles = {}
+    for tile_id, tile in enumerate(tile_data):
+        for spawn_id in range(tile[2][0], tile[2][1]):
+            spawn_tiles[spawn_id] = tile_id
+
+    for spawn_specs in map_data.get("spawn-points", []):
+        graph_data["spawn-states"].append([spawn_tiles.get(spawn_specs["id"], -1), round(spawn_specs["direction"]) % 360])
+
+    # Tile and heading of every despawn line, from its middle point on the edge of the map
+    width = column_count * tile_size
+    height = row_count * tile_size
+    for despawn_specs in map_data.get("despawn-points", []):
+        middle_x = (despawn_specs["start-x"] + despawn_specs["end-x"]) / 2
+        middle_y = (despawn_specs["start-y"] + despawn_specs["end-y"]) / 2
+        graph_data["despawn-exits"].append(_edge_exit(middle_x, middle_y, width, height, tile_size, column_count, row_count))
+
+    return graph_data
+
+# ==============================================================
+# SECTION: Routes
+# Description: Path of a vehicle and queries over the graph
+# ==============================================================
+
+class Route:
+    """
+    Class representing the path of a vehicle over the tiles of the map.
+    """
+    __slots__ = ("tiles", "headings", "turn_ids", "tile_turn_ids")
+
+    def __init__(self, steps, tile_turn_ids):
+        """
+        Initializes a Route object.
+
+        Args:
+            steps (list): Tuples of tile id, heading entering and heading leaving the tile, in degrees.
+            tile_turn_ids (dict): Turn ids used on every tile of the route, empty when crossing it straight.
+
+        Returns:
+            None
+        """
+        self.tiles = [tile_id for tile_id, _, _ in steps]
+        self.headings = [(heading_in, heading_out) for _, heading_in, heading_out in steps]
+        self.tile_turn_ids = tile_turn_ids
+
+        # All the turns of the route, a tile is only visited once so the turns of a tile are the ones of its step
+        self.turn_ids = frozenset(turn_id for turn_ids in tile_turn_ids.values() for turn_id in turn_ids)
+
+class TileGraph:
+    """
+    Class representing the connectivity between the lanes of the tiles of a map, with cached shortest path
+    and reachability queries.
+    """
+    def __init__(self, map):
+        """
+        Initializes a TileGraph object.
+
+        Args:
+            map (Map): The map, with the graph compiled in its JSON data. Maps compiled before the graph
+                was stored get it built from their road connections, if they have them.
+
+        Returns:
+            None
+        """
+        graph_data = map.json.get("tile-graph", None)
+        if graph_data == None:
+            graph_data = create_graph_data(map.json)
+
+        # Movements allowed from every state (tile, heading in), and turns realizing every movement
+        self.movements = collections.defaultdict(list)
+        self.movement_turns = {}
+        for tile_id, heading_in, heading_out, neighbour_tile, turn_ids in graph_data["movements"]:
+            self.movements[(tile_id, heading_in)].append((heading_out, neighbour_tile))
+            self.movement_turns[(tile_id, heading_in, heading_out)] = tuple(turn_ids)
+
+        # State of every spawn point and exit of every despawn point
+        self.spawn_states = [tuple(state) for state in graph_data["spawn-states"]]
+        self.despawn_exits = [tuple(exit) for exit in graph_data["despawn-exits"]]
+        self.exit_despawns = {exit: despawn_id for despawn_id, exit in enumerate(self.despawn_exits)}
+
+        # Searches are cached per graph, the results must not be modified
+        self.exits = functools.lru_cache(maxsize = ROUTE_CACHE_SIZE)(self._exits)
+
+    def turns_for_movement(self, tile_id, heading_in, heading_out):
+        """
+        Returns the turns of a tile that take a vehicle from one heading to another.
+
+        Args:
+            tile_id (int): The tile of the movement.
+            heading_in (int): Heading of the vehicle entering the tile, in degrees.
+            heading_out (int): Heading of the vehicle leaving the tile, in degrees.
+
+        Returns:
+            tuple: The ids of the turns, empty if no turn of the tile does the movement.
+        """
+        return self.movement_turns.get((tile_id, heading_in, heading_out), ())
+
+    def _exits(self, tile_id, heading_in):
+        """
+        Finds the shortest path to every road leaving the map, with a breadth first search over the
+        states (tile, heading entering the tile). Exits whose shortest path goes through a tile twice are skipped.
+
+        Args:
+            tile_id (int): The tile the vehicle is in.
+            heading_in (int): Heading of the vehicle entering the tile, in degrees.
+
+        Returns:
+            dict: Steps (tile id, heading in, heading out) of the path to every exit, indexed by the exit (tile id, heading out).
+        """
+        parents = {(tile_id, heading_in): None}
+        queue = collections.deque([(tile_id, heading_in)])
+        exits = {}
+
+        while len(queue) != 0:
+            state = queue.popleft()
+
+            for heading_out, neighbour_tile in self.movements.get(state, ()):
+
+                # Road leaving the map, rebuild the path to it
+                if neighbour_tile == -1:
+                    if (state[0], heading_out) not in exits:
+                        steps = [(state[0], state[1], heading_out)]
+                        parent = parents[state]
+                        while parent != None:
+                            steps.insert(0, (parent[0][0], parent[0][1], parent[1]))
+                            parent = parents[parent[0]]
+
+                        if len({tile_id for tile_id, _, _ in steps}) == len(steps):
+                            exits[(state[0], heading_out)] = tuple(steps)
+                    continue
+
+                next_state = (neighbour_tile, heading_out)
+                if next_state not in parents:
+                    parents[next_state] = (state, heading_out)
+                    queue.append(next_state)
+
+        return exits
+
+    def shortest_path(self, spawn_id, despawn_id):
+        """
+        Returns the shortest path from a spawn point to a despawn point.
+
+        Args:
+            spawn_id (int): The spawn point the vehicle starts at.
+            despawn_id (int): The despawn point the vehicle leaves the map through.
+
+        Returns:
+            tuple or None: Steps (tile id, heading in, heading out) of the path, None if the despawn point is not reachable.
+        """
+        if not (0 <= spawn_id < len(self.spawn_states) and 0 <= despawn_id < len(self.despawn_exits)):
+            return None
+
+        return self.exits(*self.spawn_states[spawn_id]).get(self.despawn_exits[despawn_id], None)
+
+    def reachable_despawns(self, spawn_id):
+        """
+        Returns the despawn points reachable from a spawn point.
+
+        Args:
+            spawn_id (int): The spawn point the vehicle starts at.
+
+        Returns:
+            list: The ids of the reachable despawn points, in id order.
+        """
+        if not 0 <= spawn_id < len(self.spawn_states):
+            return []
+
+        exits = self.exits(*self.spawn_states[spawn_id])
+        return sorted(self.exit_despawns[exit] for exit in exits if exit in self.exit_despawns)
+
+    def is_reachable(self, spawn_id, despawn_id):
+        """
+        Checks if a despawn point can be reached from a spawn point.
+
+        Args:
+            spawn_id (int): The spawn point the vehicle starts at.
+            despawn_id (int): The despawn point the vehicle leaves the map through.
+
+        Returns:
+            bool: True if there is a path between both points, False otherwise.
+        """
+        return self.shortest_path(spawn_id, despawn_id) != None
+
+    def create_route(self, steps):
+        """
+        Creates the route following the given steps, with the turns of every tile.
+
+        Args:
+            steps (list): Tuples of tile id, heading entering and heading leaving the tile, in degrees.
+
+        Returns:
+            Route: The route.
+        """
+        tile_turn_ids = {tile_id: self.turns_for_movement(tile_id, heading_in, heading_out) for tile_id, heading_in, heading_out in steps if heading_in != heading_out}
+        return Route(steps, tile_turn_ids)
+
+    def random_route(self, spawn):
+        """
+        Creates a route from a spawn point to a random road leaving the map.
+
+        Args:
+            spawn (Spawn_Point): The spawn point the vehicle starts at.
+
+        Returns:
+            Route or None: The route, None if the map has no road connections or no exit is reachable.
+        """
+        if not 0 <= spawn.id < len(self.spawn_states) or self.spawn_states[spawn.id][0] == -1:
+            return None
+
+        exits = self.exits(*self.spawn_states[spawn.id])
+        if len(exits) == 0:
+            return None
+
+        return self.create_route(exits[random.choice(sorted(exits))])
@@ -0,0 +1,256 @@
+"""
+Originally designed by pasblo
+GNU GENERAL PUBLIC LICENSE
+Snapshots of a running simulation, to checkpoint long experiments and to warm-start many experiments
+from the same steady-state traffic. A snapshot is a NumPy .npz file with a small JSON header identifying
+the map, and arrays with the state of the vehicles, traffic lights, demand and random generator.
+The beacons received through the VANET are not stored, they are sent again on the next beacon period.
+Run this module to check that a restored simulation continues exactly like the uninterrupted one: python -m src.Snapshot
+"""
+
+import numpy as np
+import random
+import json
+import os
+import src.Vehicle as Vehicle
+
+SNAPSHOT_VERSION = 1
+
+# State of the vehicles stored in the arrays of the snapshot, by type
+VEHICLE_FLOAT_FIELDS = ("x", "y", "direction", "speed", "max_comunications_range",
+                        "closest_stop_distance", "closest_turn_distance", "closest_vehicle_distance",
+                        "turn_enter_angle", "turn_enter_distance", "turn_angle_error", "turn_radius_distance", "turn_arc_length",
+                        "collision_x", "collision_y", "collision_segment1_x", "collision_segment1_y",
+                        "collision_turn_angle", "collision_turn_x", "collision_turn_y", "collision_segment2_x", "collision_segment2_y")
+VEHICLE_INT_FIELDS = ("id", "transceiver_id", "closest_stop_id", "closest_vehicle_id", "turning_direction", "turning_turn_id",
+                      "collision_turning_direction", "collision_status")
+VEHICLE_BOOL_FIELDS = ("braking", "waiting_for_stop", "waiting_for_vehicle", "turning", "skippingturn", "skipturn", "debug_detected")
+VEHICLE_PAIR_FIELDS = ("tangential_vector", "collision_turn_point", "collision_tangential_vector")
+
+TURN_ARC_SIZE = 7 # Values of a turn arc, see Vehicle.turn_arc
+
+def _map_identity(map):
+    """
+    Returns the values identifying a map, a snapshot can only be restored on the same map.
+    """
+    return {"name": map.name, "tiles": len(map.tile_data), "stops": len(map.stops), "turns": len(map.turns),
+            "traffic-lights": len(map.traffic_lights), "spawns": len(map.spawns), "despawns": len(map.despawns)}
+
+def save_snapshot(path, map, vehicles_list, latest_vehicle_id, simulation_time = 0, extra = None):
+    """
+    Saves the state of the simulation in a snapshot file.
+
+    Parameters:
+        path (str): The file to write, the directories are created if needed.
+        map (Map): The map being simulated.
+        vehicles_list (list): List of Vehicle objects.
+        latest_vehicle_id (int): The ID the next spawned vehicle gets.
+        simulation_time (float): Time simulated so far in nanoseconds.
+        extra (dict, optional): Values of the experiment to store with the snapshot, they must be JSON serializable.
+
+    Returns:
+        None
+    """
+    rng_version, rng_internal_state, rng_gauss_next = random.getstate()
+    header = {"version": SNAPSHOT_VERSION, "map": _map_identity(map), "latest-vehicle-id": latest_vehicle_id,
+              "simulation-time": simulation_time, "demand-time": map.demand.time,
+              "rng-version": rng_version, "rng-gauss-next": rng_gauss_next, "extra": extra if extra != None else {}}
+
+    arrays = {"header": np.array(json.dumps(header))}
+
+    # Vehicles, one row per vehicle
+    arrays["vehicle_type"] = np.array([[vehicle_type["Name"] for vehicle_type in Vehicle.VEHICLES].index(vehicle.name) for vehicle in vehicles_list], dtype=np.int64)
+    arrays["vehicle_float"] = np.array([[getattr(vehicle, field) for field in VEHICLE_FLOAT_FIELDS] for vehicle in vehicles_list], dtype=np.float64).reshape(-1, len(VEHICLE_FLOAT_FIELDS))
+    arrays["vehicle_int"] = np.array([[getattr(vehicle, field) for field in VEHICLE_INT_FIELDS] for vehicle in vehicles_list], dtype=np.int64).reshape(-1, len(VEHICLE_INT_FIELDS))
+    arrays["vehicle_bool"] = np.array([[getattr(vehicle, field) for field in VEHICLE_BOOL_FIELDS] for vehicle in vehicles_list], dtype=bool).reshape(-1, len(VEHICLE_BOOL_FIELDS))
+    arrays["vehicle_pair"] = np.array([[getattr(vehicle, field) for field in VEHICLE_PAIR_FIELDS] for vehicle in vehicles_list], dtype=np.float64).reshape(-1, len(VEHICLE_PAIR_FIELDS), 2)
+
+    # Values that can be missing, stored as NaN
+    arrays["vehicle_turn_enter_direction"] = np.array([np.nan if vehicle.turn_enter_direction == None else vehicle.turn_enter_direction for vehicle in vehicles_list], dtype=np.float64)
+    arrays["vehicle_turn_arc"] = np.array([vehicle.turn_arc if vehicle.turn_arc != None else (np.nan,) * TURN_ARC_SIZE for vehicle in vehicles_list], dtype=np.float64).reshape(-1, TURN_ARC_SIZE)
+
+    # Variable length values, one row per element with the index of its vehicle
+    arrays["vehicle_colliding"] = np.array([(index, vehicle_id) for index, vehicle in enumerate(vehicles_list) for vehicle_id in vehicle.colliding_vehicles], dtype=np.int64).reshape(-1, 2)
+    arrays["vehicle_route"] = np.array([(index, tile_id, heading_in, heading_out) for index, vehicle in enumerate(vehicles_list) if vehicle.route != None
+                                        for tile_id, (heading_in, heading_out) in zip(vehicle.route.tiles, vehicle.route.headings)], dtype=np.int64).reshape(-1, 4)
+
+    # Order of the vehicles in every lane, from the last one to the first one, rows (tile id, direction, vehicle index)
+    vehicle_indexes = {vehicle.id: index for index, vehicle in enumerate(vehicles_list)}
+    arrays["lane_vehicles"] = np.array([(tile_id, direction, vehicle_indexes[vehicle.id]) for (tile_id, direction), lane in map.lanes.items()
+                                        for vehicle in lane.vehicles if vehicle.id in vehicle_indexes], dtype=np.int64).reshape(-1, 3)
+
+    # Traffic lights, in id order
+    arrays["traffic_light_color"] = np.array([traffic_light.color for traffic_light in map.traffic_lights], dtype=np.int64)
+    arrays["traffic_light_time"] = np.array([traffic_light.time_passed_since_last_change for traffic_light in map.traffic_lights], dtype=np.float64)
+
+    # Demand, the next arrival of every stream and the arrivals waiting at the spawn points
+    arrays["demand_arrivals"] = np.array([(arrival_time, spawn_id, despawn_id) for arrival_time, (spawn_id, despawn_id) in map.demand.arrivals], dtype=np.float64).reshape(-1, 3)
+    arrays["demand_pending"] = np.array([(spawn_id, despawn_id) for spawn_id, destinations in map.demand.pending.items() for despawn_id in destinations], dtype=np.int64).reshape(-1, 2)
+    arrays["demand_dropped"] = np.array(sorted(map.demand.dropped.items()), dtype=np.int64).reshape(-1, 2)
+
+    # Random generator
+    arrays["rng_state"] = np.array(rng_internal_state, dtype=np.uint64)
+
+    directory = os.path.dirname(path)
+    if directory != "":
+        os.makedirs(directory, exist_ok=True)
+
+    with open(path, "wb") as file:
+        np.savez(file, **arrays)
+
+def load_snapshot(path, map):
+    """
+    Restores the state of the simulation from a snapshot file. The map must be freshly loaded, without
+    vehicles, and be the same map the snapshot was taken on.
+
+    Parameters:
+        path (str): The snapshot file.
+        map (Map): The map to restore the traffic lights and demand of, and to place the vehicles on.
+
+    Returns:
+        dict: A dictionary containing the restored list of vehicles, the ID the next spawned vehicle gets,
+              the simulated time in nanoseconds and the extra values stored with the snapshot.
+    """
+    with np.load(path) as snapshot:
+        header = json.loads(str(snapshot["header"]))
+
+        if header["version"] != SNAPSHOT_VERSION:
+            raise ValueError(f"Unsupported snapshot version {header['version']}")
+
+        if header["map"] != _map_identity(map):
+            raise ValueError(f"Snapshot taken on map {header['map']['name']} cannot be restored on map {map.name}")
+
+        # Vehicles, created on their position so they are placed on their tiles and lanes
+        vehicles = []
+        for index, vehicle_type in enumerate(snapshot["vehicle_type"]):
+            values = dict(zip(VEHICLE_FLOAT_FIELDS, snapshot["vehicle_float"][index].tolist()))
+            values.update(zip(VEHICLE_INT_FIELDS, snapshot["vehicle_int"][index].tolist()))
+            values.update(zip(VEHICLE_BOOL_FIELDS, snapshot["vehicle_bool"][index].tolist()))
+            values.update(zip(VEHICLE_PAIR_FIELDS, (tuple(pair) for pair in snapshot["vehicle_pair"][index].tolist())))
+
+            vehicle = Vehicle.Vehicle(Vehicle.VEHICLES[vehicle_type], {"id": values["id"], "x": values["x"], "y": values["y"], "direction": values["direction"],
+                                      "speed": values["speed"], "transceiver": values["transceiver_id"]}, map, values["max_comunications_range"])
+            for field, value in values.items():
+                setattr(vehicle, field, value)
+
+            turn_enter_direction = snapshot["vehicle_turn_enter_direction"][index]
+            vehicle.turn_enter_direction = None if np.isnan(turn_enter_direction) else int(turn_enter_direction)
+
+            turn_arc = snapshot["vehicle_turn_arc"][index]
+            if not np.isnan(turn_arc[0]):
+                turn_arc = turn_arc.tolist()
+                vehicle.turn_arc = tuple(turn_arc[:5]) + (int(turn_arc[5]), turn_arc[6])
+
+            vehicles.append(vehicle)
+
+        for index, vehicle_id in snapshot["vehicle_colliding"].tolist():
+            vehicles[index].colliding_vehicles.append(vehicle_id)
+
+        routes_steps = {}
+        for index, tile_id, heading_in, heading_out in snapshot["vehicle_route"].tolist():
+            routes_steps.setdefault(index, []).append((tile_id, heading_in, heading_out))
+        for index, steps in routes_steps.items():
+            vehicles[index].route = map.tile_graph.create_route(steps)
+
+        # Link the closest vehicles and recalculate what derives from the restored state
+        vehicles_by_id = {vehicle.id: vehicle for vehicle in vehicles}
+        for vehicle in vehicles:
+            vehicle.closest_vehicle = vehicles_by_id.get(vehicle.closest_vehicle_id, None)
+            vehicle.reset_derived_state(map)
+
+        # Lanes in the saved order, vehicles at the same position are not reordered by the sorted insertion
+        if "lane_vehicles" in snapshot.files:
+            lanes_vehicles = {}
+            for tile_id, direction, index in snapshot["lane_vehicles"].tolist():
+                lanes_vehicles.setdefault((tile_id, direction), []).append(vehicles[index])
+
+            # The vehicles were placed in the same lanes when created, only their order is restored
+            for key, lane_vehicles in lanes_vehicles.items():
+                lane = map.lanes[key]
+                if set(lane.vehicles) == set(lane_vehicles):
+                    lane.vehicles = lane_vehicles
+                    lane._update_indexes(0)
+
+        # Traffic lights
+        for traffic_light, color, time_passed in zip(map.traffic_lights, snapshot["traffic_light_color"].tolist(), snapshot["traffic_light_time"].tolist()):
+            traffic_light.color = color
+            traffic_light.time_passed_since_last_change = time_passed
+
+        # Demand
+        map.demand.time = header["demand-time"]
+        map.demand.arrivals = [(arrival_time, (int(spawn_id), int(despawn_id))) for arrival_time, spawn_id, despawn_id in snapshot["demand_arrivals"].tolist()]
+        map.demand.pending.clear()
+        for spawn_id, despawn_id in snapshot["demand_pending"].tolist():
+            map.demand.pending[spawn_id].append(despawn_id)
+        map.demand.dropped.clear()
+        for spawn_id, dropped in snapshot["demand_dropped"].tolist():
+            map.demand.dropped[spawn_id] = dropped
+
+        # Random generator
+        random.setstate((header["rng-version"], tuple(snapshot["rng_state"].tolist()), header["rng-gauss-next"]))
+
+    return {"vehicles": vehicles, "new_id": header["latest-vehicle-id"], "time": header["simulation-time"], "extra": header["extra"]}
+
+# ==============================================================
+# SECTION: Parity harness
+# Description: Checks that a restored simulation continues exactly
+# like the uninterrupted one
+# ==============================================================
+
+# Small map with spawn points on every side, turns and traffic lights
+_CHECK_MAP_DESCRIPTOR = [[{"Tile":1, "Rotation":0, "Spawn-speed":0.75, "Spawn-probability":1}, {"Tile":4, "Rotation":0}, {"Tile":1, "Rotation":0}, {"Tile":5, "Rotation":0}, {"Tile":2, "Rotation":180}],
+                         [{"Tile":0, "Rotation":0}, {"Tile":1, "Rotation":90}, {"Tile":0, "Rotation":0}, {"Tile":4, "Rotation":90}, {"Tile":3, "Rotation":0, "Spawn-speed":0.75, "Spawn-probability":1}],
+                         [{"Tile":2, "Rotation":270}, {"Tile":6, "Rotation":0}, {"Tile":4, "Rotation":0}, {"Tile":2, "Rotation":90}, {"Tile":1, "Rotation":90}],
+                         [{"Tile":2, "Rotation":90, "Spawn-speed":0.75, "Spawn-probability":1}, {"Tile":2, "Rotation":0}, {"Tile":3, "Rotation":0}, {"Tile":2, "Rotation":180}, {"Tile":1, "Rotation":90}],
+                         [{"Tile":0, "Rotation":0}, {"Tile":0, "Rotation":0}, {"Tile":1, "Rotation":90, "Spawn-speed":0.75, "Spawn-probability":1}, {"Tile":2, "Rotation":0}, {"Tile":2, "Rotation":90}]]
+
+def _check_parity(steps_before = 800, steps_after = 300, time_delta = 16000000, seed = 5):
+    import tempfile
+    import src.Map as Map
+    import src.MapCreator as MapCreator
+    import src.AutonomusControl as AutonomusControl
+
+    map_name = "SnapshotCheck"
+    map_size = MapCreator.create_map(_CHECK_MAP_DESCRIPTOR, map_name)
+    distances = [100] * len(Vehicle.VEHICLES)
+
+    def simulate(map, vehicles_list, latest_vehicle_id, steps):
+        for _ in range(steps):
+            new_spawns = AutonomusControl.spawn_vehicles(map, time_delta, latest_vehicle_id, distances)
+            vehicles_list.extend(new_spawns["vehicles"])
+            latest_vehicle_id = new_spawns["new_id"]
+            map.tick(time_delta)
+            vehicles_list = AutonomusControl.despawn_vehicles(map, vehicles_list, map_size)
+            AutonomusControl.move_vehicles(vehicles_list, map, time_delta, -1)
+            AutonomusControl.check_collisions(vehicles_list)
+        return vehicles_list, latest_vehicle_id
+
+    def state(vehicles_list):
+        return [(vehicle.id, vehicle.x, vehicle.y, vehicle.direction, vehicle.speed) for vehicle in vehicles_list]
+
+    use_routes = AutonomusControl.USE_ROUTES
+    try:
+        for AutonomusControl.USE_ROUTES in (False, True):
+            with tempfile.TemporaryDirectory() as directory:
+                path = os.path.join(directory, "check.npz")
+
+                random.seed(seed)
+                map = Map.Map(map_name)
+                vehicles_list, latest_vehicle_id = simulate(map, [], 0, steps_before)
+                save_snapshot(path, map, vehicles_list, latest_vehicle_id)
+                uninterrupted = state(simulate(map, vehicles_list, latest_vehicle_id, steps_after)[0])
+
+                restored_map = Map.Map(map_name)
+                restored = load_snapshot(path, restored_map)
+                resumed = state(simulate(restored_map, restored["vehicles"], restored["new_id"], steps_after)[0])
+
+            assert resumed == uninterrupted, f"Resumed run differs, routes: {AutonomusControl.USE_ROUTES}"
+            print(f"Save, load and step with routes {AutonomusControl.USE_ROUTES}: OK, {len(resumed)} vehicles")
+
+    finally:
+        AutonomusControl.USE_ROUTES = use_routes
+        os.remove("maps/" + map_name + ".json")
+        os.remove("images/maps/" + map_name + ".png")
+
+if __name__ == "__main__":
+    _check_parity()
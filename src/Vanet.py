@@ -1,20 +1,46 @@
 import libs.ComsChannelsSim.PowerElement as PowerElement
 import libs.ComsChannelsSim.ChannelElement as ChannelElement
 import libs.ComsChannelsSim.utils as rf_utils
+import src.math_utils as math_utils
+import numpy as np
+import random
 
-import matplotlib.pyplot as plt
+# Propagation model used for every link between vehicles
+STANDARD_DEVIATION_DB = 3
+LINK_MODEL = {"lossModel": "hataSuburban", "baseHeight": 2, "mobileHeight": 3}
 
-class Transceiver:
-    def __init__(self, tx_power, sensibility_dB, frequency):
+# Link budget tables, precomputed per transceiver pair and interpolated on every query
+LINK_TABLE_MIN_DISTANCE = 1 # In meters, closer links use the value at this distance
+LINK_TABLE_MAX_DISTANCE = 500 # In meters, farther links use the value at this distance
+LINK_TABLE_RESOLUTION = 0.25 # In meters, distance between two entries of the tables
+
+BEACON_PERIOD = 100000000 # In ns, time between two beacons of the same vehicle
+BEACON_LIFETIME = 300000000 # In ns, time a received beacon is considered fresh
+
+class Beacon:
+    """
+    Periodic message broadcasted by a vehicle with its position, speed and intended turn.
+    """
+    def __init__(self, vehicle, time):
+
+        # Sender and time of the broadcast
+        self.id = vehicle.id
+        self.time = time
 
-        # b
-        amp1 = PowerElement.powerElement(gain_dB = 10, figure = 3)
-        amp2 = PowerElement.powerElement(gain_dB = 10, figure = 3, previousElement = amp1)
-        cable1 = PowerElement.powerElement(attenuation_dB = 10, previousElement = amp2)
-        cable2 = PowerElement.powerElement(attenuation_dB = 10, previousElement = cable1)
+        # Kinematic state of the sender
+        self.x = vehicle.x
+        self.y = vehicle.y
+        self.direction = vehicle.direction
+        self.speed = vehicle.speed
+        self.size_x = vehicle.size_x
 
-        print("Exercise:")
-        cable2.printEquivalentValues()
+        # Intentions of the sender
+        self.turn_id = vehicle.turning_turn_id
+        self.waiting_for_stop = vehicle.waiting_for_stop
+        self.closest_vehicle_id = vehicle.closest_vehicle_id
+
+class Transceiver:
+    def __init__(self, tx_power, sensibility_dB, frequency):
 
         # Define the antenna and circulator to be used
         antenna = PowerElement.powerElement(gain_dB = 5)
@@ -51,6 +77,127 @@ class Vanet:
         
             # Defining the typical transceiver on any vehicle
             self.vehicle_transceivers.append(Transceiver(vehicle_transceiver_properties.get("tx_power", 0), vehicle_transceiver_properties.get("sensibility", 0), vehicle_transceiver_properties.get("frequency", 0)))
+
+        # Received power and packet success probability versus distance for every transceiver pair
+        self.link_distances = np.arange(LINK_TABLE_MIN_DISTANCE, LINK_TABLE_MAX_DISTANCE + LINK_TABLE_RESOLUTION, LINK_TABLE_RESOLUTION)
+        self.link_tables = {}
+        self._create_link_tables()
+
+        # Broadcasting state
+        self.time = 0 # In ns
+        self.last_broadcast_time = -BEACON_PERIOD
+        self.neighbours = {} # V2V neighbour graph, receivers in range of each sender id
+        self.inboxes = {} # Latest beacon received from each sender, indexed by receiver id
+
+    def _create_link_tables(self):
+        """
+        Precomputes the link budget of every transceiver pair at every distance of the tables.
+
+        Updates:
+            self.link_tables: Tuple of received power and success probability arrays, indexed by (tx, rx) transceiver ids.
+        """
+        for tx_transceiver_id, tx_transceiver in enumerate(self.vehicle_transceivers):
+
+            # The path loss only depends on the transmitter
+            received_powers = self.channel.sweepDistance(transmittedPower_dB = tx_transceiver.get_PIRE(), distances = self.link_distances,
+                                                         frequency = tx_transceiver.frequency, **LINK_MODEL)["receivedPower"]
+
+            for rx_transceiver_id, rx_transceiver in enumerate(self.vehicle_transceivers):
+                sensitivity_dB = rx_transceiver.get_sensibility()
+                success_probabilities = self._reception_probability(received_powers, sensitivity_dB)
+                self.link_tables[(tx_transceiver_id, rx_transceiver_id)] = (received_powers, success_probabilities)
+
+    def _reception_probability(self, received_powers_dB, sensitivity_dB):
+        """
+        Calculates the probability of a packet being received with the log-normal shadowing of the channel,
+        for an array of received powers: the shadowed power is above the sensitivity with probability
+        1 - F((sensitivity - power) / STANDARD_DEVIATION_DB), falling towards 0 below the sensitivity.
+
+        The Gaussian class of the channel library divides by the variance it is given as if it was the
+        standard deviation, so it is not used here, the shadowing is the STANDARD_DEVIATION_DB stated.
+        The communication ranges from calculate_max_distances still use the library model.
+        """
+        return rf_utils.Q((sensitivity_dB - received_powers_dB) / STANDARD_DEVIATION_DB)
+
+    def received_power(self, tx_transceiver_id, rx_transceiver_id, distance):
+        """
+        Looks up the received power at a given distance.
+
+        Parameters:
+            tx_transceiver_id (int): Transceiver type of the sender.
+            rx_transceiver_id (int): Transceiver type of the receiver.
+            distance (float or np.ndarray): Distance between both vehicles in meters.
+
+        Returns:
+            float or np.ndarray: Received power with the mean path loss in dB.
+        """
+        return np.interp(distance, self.link_distances, self.link_tables[(tx_transceiver_id, rx_transceiver_id)][0])
+
+    def link_success_probability(self, tx_transceiver_id, rx_transceiver_id, distance):
+        """
+        Looks up the probability of a packet being received at a given distance.
+
+        Parameters:
+            tx_transceiver_id (int): Transceiver type of the sender.
+            rx_transceiver_id (int): Transceiver type of the receiver.
+            distance (float or np.ndarray): Distance between both vehicles in meters.
+
+        Returns:
+            float or np.ndarray: Probability of a successful reception.
+        """
+        return np.interp(distance, self.link_distances, self.link_tables[(tx_transceiver_id, rx_transceiver_id)][1])
+
+    def broadcast(self, vehicles_list, time_delta):
+        """
+        Advances the VANET clock and, every beacon period, broadcasts a beacon from every vehicle
+        to the vehicles in its communication range, dropping packets as the channel model dictates.
+
+        Parameters:
+            vehicles_list (list): List of Vehicle objects.
+            time_delta (float): Time passed since the last update in nanoseconds.
+
+        Updates:
+            self.neighbours: The V2V neighbour graph.
+            self.inboxes: The beacons received by every vehicle.
+        """
+        self.time += time_delta
+
+        # Forget beacons that are not fresh anymore, or of vehicles that are gone
+        vehicle_ids = {vehicle.id for vehicle in vehicles_list}
+        self.inboxes = {receiver_id: {sender_id: beacon for sender_id, beacon in inbox.items() if sender_id in vehicle_ids and self.time - beacon.time <= BEACON_LIFETIME}
+                        for receiver_id, inbox in self.inboxes.items() if receiver_id in vehicle_ids}
+
+        # Wait for the next beacon period
+        if self.time - self.last_broadcast_time < BEACON_PERIOD:
+            return
+        self.last_broadcast_time = self.time
+
+        # Send a beacon to every vehicle in range
+        self.neighbours = {}
+        for sender in vehicles_list:
+            beacon = Beacon(sender, self.time)
+            communications_range = math_utils.meters_to_pixels(sender.max_comunications_range)
+            self.neighbours[sender.id] = []
+
+            for receiver in vehicles_list:
+                if receiver is sender:
+                    continue
+
+                distance = math_utils.distance_point_to_point(sender.x, sender.y, receiver.x, receiver.y)
+                if distance > communications_range:
+                    continue
+
+                self.neighbours[sender.id].append(receiver.id)
+
+                # Packet loss from the channel model
+                if random.random() < self.link_success_probability(sender.transceiver_id, receiver.transceiver_id, math_utils.pixels_to_meters(distance)):
+                    self.inboxes.setdefault(receiver.id, {})[sender.id] = beacon
+
+    def received_beacons(self, vehicle):
+        """
+        Returns the fresh beacons received by a vehicle, indexed by sender id.
+        """
+        return self.inboxes.get(vehicle.id, {})
     
     def calculate_max_distances(self):
 
@@ -63,11 +210,9 @@ class Vanet:
             # Calculating the distance with the hata Suburban model
             distance = self.channel.calculateDistance_sensitivity(transmittedPower_dB = vehicle_transceiver.get_PIRE(),
                                                                        sensitivity_dB = vehicle_transceiver.get_sensibility(),
-                                                                       standardDeviation_dB = 3,
-                                                                       lossModel = "hataSuburban",
-                                                                       baseHeight = 2,
-                                                                       mobileHeight = 3,
-                                                                       frequency = vehicle_transceiver.frequency)
+                                                                       standardDeviation_dB = STANDARD_DEVIATION_DB,
+                                                                       frequency = vehicle_transceiver.frequency,
+                                                                       **LINK_MODEL)
             
             # Add the distance
             max_distances.append(distance)
@@ -75,15 +220,14 @@ class Vanet:
         return max_distances
     
     def plot_distance_power(self):
+        import matplotlib.pyplot as plt
 
         for vehicle_transceiver in self.vehicle_transceivers:
             self.channel.plotDistance_ReceivedPower(transmittedPower_dB = vehicle_transceiver.get_PIRE(),
                                                                        sensitivity_dB = vehicle_transceiver.get_sensibility(),
-                                                                       standardDeviation_dB = 3,
-                                                                       lossModel = "hataSuburban",
-                                                                       baseHeight = 2,
-                                                                       mobileHeight = 3,
+                                                                       standardDeviation_dB = STANDARD_DEVIATION_DB,
                                                                        frequency = vehicle_transceiver.frequency,
+                                                                       **LINK_MODEL,
                                                                        minDistance = 1,
                                                                        maxDistance = 200)
         
@@ -6,8 +6,8 @@ GNU GENERAL PUBLIC LICENSE
 import pygame
 import math
 import src.math_utils as math_utils
+import src.turn_kernels as turn_kernels
 import random
-import libs.ComsChannelsSim.PowerElement as powerElement
 
 """
 - Name of the vehicle
@@ -40,8 +40,89 @@ All sizes and positions are in pixels
 DISTANCE_TO_STOP = 1 # Distance in meters to a stop where the vehicle will decide to stop or advance
 OBSERVING_DISTANCE = 10 # Distance in meters a vehicle can see in front of it
 OBSERVING_DETECTION_RANGE = 2 # Distance from the observing line to the car to be detected
+LOOK_AHEAD_HEADING_TOLERANCE = 0.001 # In radians, heading change that invalidates the cached look-ahead
+USE_LANE_QUEUES = True # Take the closest vehicle from the lane queues on straight tiles
+BEACON_SENSING_FALLBACK = False # Search the lane and the look-ahead lines when no beacon gives a leader, hiding the packet loss
+
+# Size in pixels of the image of each type of vehicle, loaded once
+_image_sizes = {}
+
+def _vehicle_image_size(name):
+    """
+    Returns the size in pixels of the image of a type of vehicle, loading it only the first time.
+
+    Parameters:
+        name (str): The name of the type of vehicle.
+
+    Returns:
+        tuple: Width and height of the image in pixels.
+    """
+    if name not in _image_sizes:
+        _image_sizes[name] = pygame.image.load("images/vehicles/" + name + ".png").get_size()
+    
+    return _image_sizes[name]
+
+class Vehicle_Renderer:
+    """
+    Rendering resources of a vehicle, only created when the vehicle is drawn on a display.
+
+    The scaled image of each type of vehicle and the font are shared between all vehicles.
+    """
+    scaled_images = {}
+    font = None
+
+    def __init__(self, vehicle):
+        """
+        Initializes the rendering resources for the given vehicle.
+
+        Parameters:
+            vehicle (Vehicle): The vehicle to be drawn.
+        """
+        # Loading and scaling the image once per type of vehicle
+        if vehicle.name not in Vehicle_Renderer.scaled_images:
+            image = pygame.image.load("images/vehicles/" + vehicle.name + ".png")
+            Vehicle_Renderer.scaled_images[vehicle.name] = pygame.transform.scale(image, (vehicle.size_x, vehicle.size_y))
+
+        if Vehicle_Renderer.font == None:
+            Vehicle_Renderer.font = pygame.font.Font(None, 36)
+
+        self.scaled_image = Vehicle_Renderer.scaled_images[vehicle.name]
+        self.font = Vehicle_Renderer.font
+        self.rotated_image = None
+        self.rotated_direction = None
+
+    def draw(self, screen, vehicle):
+        """
+        Draws the image of the vehicle, rotating it only when its direction changed.
+
+        Parameters:
+            screen: The Pygame screen surface to draw on.
+            vehicle (Vehicle): The vehicle to be drawn.
+        """
+        if self.rotated_direction != vehicle.corrected_direction:
+            self.rotated_image = pygame.transform.rotate(self.scaled_image, math.degrees(vehicle.corrected_direction))
+            self.rotated_direction = vehicle.corrected_direction
+
+        screen.blit(self.rotated_image, self.rotated_image.get_rect(center=(vehicle.x, vehicle.y)).topleft)
+
+class Vehicle:
+    __slots__ = ("id", "name", "max_speed", "acceleration", "brake_deceleration", "real_size", "resize_factor", "size_x", "size_y",
+                 "x", "y", "direction", "corrected_direction", "speed", "front_x", "front_y",
+                 "braking", "waiting_for_stop", "waiting_for_vehicle", "turning", "skippingturn", "skipturn", "route",
+                 "closest_stop_id", "closest_stop_distance", "closest_turn_distance",
+                 "tangential_vector", "turning_direction", "turning_turn_id",
+                 "turn_enter_direction", "turn_enter_angle", "turn_enter_distance", "turn_angle_error", "turn_radius_distance",
+                 "turn_arc", "turn_arc_length",
+                 "colliding_vehicles", "debug_detected", "closest_vehicle_distance", "closest_vehicle", "closest_vehicle_id",
+                 "look_ahead_key", "look_ahead_direction", "look_ahead_origin", "look_ahead_crossings", "look_ahead_turn_end",
+                 "collision_x", "collision_y", "collision_turn_point", "collision_segment1_x", "collision_segment1_y",
+                 "collision_turning_direction", "collision_tangential_vector", "collision_turn_angle", "collision_turn_x", "collision_turn_y",
+                 "collision_segment2_x", "collision_segment2_y", "collision_status", "turn_to_collision_angle",
+                 "lane", "lane_index", "lane_tile", "lane_direction",
+                 "location_tile", "direction_tile", "collision_tile", "occupied_tiles",
+                 "location_tile_bounds", "collision_tile_bounds",
+                 "max_comunications_range", "transceiver_id", "renderer")
 
-class Vehicle(pygame.sprite.Sprite):
     def __init__(self, type_of_vehicle, starting_state, map, max_coms_range):
         """
         Initializes a new instance of the Vehicle class.
@@ -50,9 +131,6 @@ class Vehicle(pygame.sprite.Sprite):
             type_of_vehicle (dict): A dictionary containing information about the vehicle type.
             starting_state (dict): A dictionary containing initial state information for the vehicle.
         """
-        # Call the superclass's __init__ method
-        super().__init__()
-
         # Basic vehicle data
         self.id = starting_state["id"]
         self.name = type_of_vehicle["Name"]
@@ -60,24 +138,22 @@ class Vehicle(pygame.sprite.Sprite):
         self.acceleration = type_of_vehicle["Acceleration"]  # In m/s^2
         self.brake_deceleration = type_of_vehicle["Brake-deceleration"]  # In m/s^2
         self.real_size = type_of_vehicle["Size"]  # In m
-        self.image_path = "images/vehicles/" + self.name + ".png"
-        self.image = pygame.image.load(self.image_path)
+        image_width, image_height = _vehicle_image_size(self.name)
 
         # Calculate resize factor based on real size and image width
-        self.resize_factor = self.real_size / math_utils.pixels_to_meters(self.image.get_rect().width)
+        self.resize_factor = self.real_size / math_utils.pixels_to_meters(image_width)
 
         # Vehicle size in pixels
-        self.size_x = self.image.get_rect().width * self.resize_factor # In pixels
-        self.size_y = self.image.get_rect().height * self.resize_factor # In pixels
+        self.size_x = image_width * self.resize_factor # In pixels
+        self.size_y = image_height * self.resize_factor # In pixels
 
         # Position data
         self.x = starting_state["x"]
         self.y = starting_state["y"]
         self.direction = starting_state["direction"]  # In radians
-        self.corrected_direction = math_utils.correct_radian(self.direction + math.pi)
+        self._calculate_corrected_direction()
         self.speed = starting_state["speed"]
         self._calculate_front_position()  # Calculate front position based on current state
-        self._rotate_image()  # Rotate the image based on the current direction
 
         # Status data
         self.braking = False
@@ -86,6 +162,7 @@ class Vehicle(pygame.sprite.Sprite):
         self.turning = False
         self.skippingturn = False
         self.skipturn = False
+        self.route = None  # Route over the tiles of the map, turns are chosen randomly without it
 
         # Map information
         self.closest_stop_id = -1
@@ -94,26 +171,36 @@ class Vehicle(pygame.sprite.Sprite):
 
         # Turning information
         self.tangential_vector = (0, 0)
-        self.turning_direction = 0  # "Clockwise, Counterclockwise, Tangential"
+        self.turning_direction = math_utils.NORMAL  # Clockwise, counterclockwise or normal, see math_utils
         self.turning_turn_id = -1  # Turn id of the selected turn to turn around
 
         # Turning alignment corrections
         self.turn_enter_direction = None
         self.turn_enter_angle = -1  # In radians
         self.turn_enter_distance = -1  # In pixels
-        self.turn_angle_error = -1
-        self.turn_distance_error = -1
+        self.turn_angle_error = -1  # In radians, direction corrected when leaving the last turn
         self.turn_radius_distance = -1 # In pixels
 
-        # Temporal variables
-        self.font = pygame.font.Font(None, 36)
+        # Arc followed while turning, (center x, center y, radius, start angle, start direction, sign, span)
+        self.turn_arc = None
+        self.turn_arc_length = 0  # In pixels, travelled along the arc
+
+        # Rendering resources, only created when drawn
+        self.renderer = None
 
         # Collision and avoidance variables
         self.colliding_vehicles = []
-        self.temporal_surface = None
         self.debug_detected = False
         self.closest_vehicle_distance = 1000000 # In meters
         self.closest_vehicle = None
+        self.closest_vehicle_id = -1
+
+        # Look-ahead geometry cache
+        self.look_ahead_key = None
+        self.look_ahead_direction = 0
+        self.look_ahead_origin = (0, 0)
+        self.look_ahead_crossings = []
+        self.look_ahead_turn_end = None
 
         # Colision turns
         self.collision_x = -1
@@ -121,7 +208,7 @@ class Vehicle(pygame.sprite.Sprite):
         self.collision_turn_point = (-1, -1)
         self.collision_segment1_x = self.front_x
         self.collision_segment1_y = self.front_y
-        self.collision_turning_direction = -1
+        self.collision_turning_direction = math_utils.NORMAL
         self.collision_tangential_vector = (0, 0)
         self.collision_turn_angle = -1
         self.collision_turn_x = -1
@@ -130,11 +217,25 @@ class Vehicle(pygame.sprite.Sprite):
         self.collision_segment2_y = self.x
         self.collision_status = 0 # 0 - Nothing detected, 1 - First time detecting turn, 2 - Approaching turn, 3 - Entered in turn, 4 - Turning inside turn
 
+        # Lane the vehicle is in when on a straight tile
+        self.lane = None
+        self.lane_index = -1
+        self.lane_tile = -1
+        self.lane_direction = None
+
+        # Tiles the vehicle is on (location and collision tiles), the map is told when they change
+        self.occupied_tiles = ()
+
+        # Boundaries of the location and collision tiles, the tiles are only recalculated when crossing them
+        self.location_tile_bounds = None
+        self.collision_tile_bounds = None
+
         # Calculate the tile the vehicle is in, aiming at and colliding with
         self._calculate_tile_location(map)
 
-        # Save the max comunicaction range
+        # Save the max comunicaction range and the transceiver used
         self.max_comunications_range = max_coms_range
+        self.transceiver_id = starting_state.get("transceiver", 0)
     
     def __str__(self):
         """
@@ -193,38 +294,87 @@ class Vehicle(pygame.sprite.Sprite):
         self.front_y = self.y - self.size_x * 0.5 * math.sin(self.direction)
     
     def _calculate_tile_location(self, map):
+        """
+        Recalculates the tiles the vehicle is in, aiming at and colliding with. The tiles only change
+        when crossing the boundary of a tile, so they are only recalculated then.
 
-        self.location_tile = map.tile_location(self.x, self.y)
-        self.direction_tile = map.next_tile(self.location_tile, self.direction)
-        self.collision_tile = map.tile_location(self.collision_segment2_x, self.collision_segment2_y)
+        Parameters:
+            map: The map object containing the tiles.
 
-    def _rotate_image(self):
+        Updates:
+            self.location_tile, self.direction_tile, self.collision_tile (int): The tiles of the vehicle.
+            self.occupied_tiles (tuple): The location and collision tiles, the map gets the tile enter and exit events.
         """
-        Rotates and scales the image and creates a rect.
-
-        This function is responsible for transforming the vehicle's image to match
-        its orientation and size. It performs scaling and rotation operations on the
-        original image and creates a rotated image along with a corresponding rect.
+        # Location tile, only when the vehicle crossed the boundary of its tile
+        bounds = self.location_tile_bounds
+        if bounds == None or not (bounds[0] <= self.x < bounds[2] and bounds[1] <= self.y < bounds[3]):
+            self.location_tile = map.tile_location(self.x, self.y)
+            self.location_tile_bounds = map.tile_bounds(self.x, self.y)
+
+        # Collision tile, only when the collision point crossed the boundary of its tile
+        bounds = self.collision_tile_bounds
+        if bounds == None or not (bounds[0] <= self.collision_segment2_x < bounds[2] and bounds[1] <= self.collision_segment2_y < bounds[3]):
+            self.collision_tile = map.tile_location(self.collision_segment2_x, self.collision_segment2_y)
+            self.collision_tile_bounds = map.tile_bounds(self.collision_segment2_x, self.collision_segment2_y)
+
+        # Changing direction tile and lane only when changing tile or direction
+        if self.location_tile != self.lane_tile or self.direction != self.lane_direction:
+            self.direction_tile = map.next_tile(self.location_tile, self.direction)
+            self.lane_tile = self.location_tile
+            self.lane_direction = self.direction
+            map.update_vehicle_lane(self)
+
+        # Keeping the lane sorted after moving along it
+        elif self.lane != None:
+            self.lane.reorder(self)
+
+        # Entering and exiting tiles
+        if self.occupied_tiles != (self.location_tile, self.collision_tile):
+            map.vehicle_tile_transition(self, self.occupied_tiles, (self.location_tile, self.collision_tile))
+            self.occupied_tiles = (self.location_tile, self.collision_tile)
+
+    def reset_derived_state(self, map):
+        """
+        Recalculates the state derived from the position, direction and collision line of the vehicle,
+        used after restoring it from a snapshot. The look-ahead geometry is calculated again on the next move.
 
-        Steps:
-            1. Scale the original image to the specified size.
-            2. Rotate the scaled image based on the corrected direction angle.
-            3. Create a rect for the rotated image centered at the current (x, y) position.
+        Parameters:
+            map: The map object containing the tiles.
+        """
+        self._calculate_corrected_direction()
+        self._calculate_front_position()
+        self.look_ahead_key = None
+        self.look_ahead_turn_end = None
 
-        Updates:
-            self.rotated_image (pygame.Surface): Rotated and scaled image of the vehicle.
-            self.rotated_rect (pygame.Rect): Rectangular bounding box for the rotated image.
+        # Forcing the tiles to be recalculated
+        self.location_tile_bounds = None
+        self.collision_tile_bounds = None
+        self._calculate_tile_location(map)
 
+    def _calculate_corrected_direction(self):
         """
-        # Step 1: Scale the original image to the specified size
-        scaled_image = pygame.transform.scale(self.image, (self.size_x, self.size_y))
+        Calculates the direction the look-ahead lines and the image of the vehicle use.
+
+        It must be called every time the direction of the vehicle changes.
 
-        # Step 2: Rotate the scaled image based on the corrected direction angle
+        Updates:
+            self.corrected_direction (float): Direction plus half a turn, in radians.
+        """
         self.corrected_direction = math_utils.correct_radian(self.direction + math.pi)
-        self.rotated_image = pygame.transform.rotate(scaled_image, math.degrees(self.corrected_direction))
 
-        # Step 3: Create a rect for the rotated image centered at the current (x, y) position
-        self.rotated_rect = self.rotated_image.get_rect(center=(self.x, self.y))
+    @property
+    def rotated_rect(self):
+        """
+        Returns the bounding box of the vehicle, the same as the rect of its rotated image.
+
+        Returns:
+            pygame.Rect: Rectangular bounding box of the vehicle centered at its position.
+        """
+        cos_direction = abs(math.cos(self.corrected_direction))
+        sin_direction = abs(math.sin(self.corrected_direction))
+        rect = pygame.Rect(0, 0, math.ceil(self.size_x * cos_direction + self.size_y * sin_direction), math.ceil(self.size_x * sin_direction + self.size_y * cos_direction))
+        rect.center = (self.x, self.y)
+        return rect
 
     def _tile_coincidence(self, tile_id, collision = False):
 
@@ -367,11 +517,23 @@ class Vehicle(pygame.sprite.Sprite):
     def select_turn(self, map, entered_turns):
         # Requires for a self.skipturn reset when not detecting turn
 
+        # Following the route, turning where it turns and going straight where it can
+        if self.route != None:
+            route_turns = [turn_id for turn_id in entered_turns if turn_id in self.route.turn_ids]
+            if len(route_turns) != 0:
+                self.skipturn = False
+                self.turning_turn_id = route_turns[0]
+                return
+
+            if any(map.turns[turn_id].can_skip for turn_id in entered_turns):
+                self.skipturn = True
+                return
+
         # Decide if the vehicle turns or not
         skip_turn = random.randint(0, 1)
 
         # Check for skippable turns
-        skippable_turns = [turn_id for turn_id in entered_turns if map.turns[turn_id].can_skip == "True"]
+        skippable_turns = [turn_id for turn_id in entered_turns if map.turns[turn_id].can_skip]
         if len(skippable_turns) != 0 and skip_turn == 1:
             self.skipturn = True
 
@@ -418,7 +580,7 @@ class Vehicle(pygame.sprite.Sprite):
         # Step 5: Return the result of the entry_turn check
         return result
 
-    def turn_around_map_turn(self, map, time_delta, first_turning=False, last_turning=False):
+    def turn_around_map_turn(self, map, first_turning=False, last_turning=False):
         """
         Turns the vehicle around a specified map turn.
 
@@ -428,62 +590,47 @@ class Vehicle(pygame.sprite.Sprite):
 
         Parameters:
             map (Map): The map object containing information about turns.
-            time_delta (float): The time passed since the last update.
             first_turning (bool): True if the vehicle is starting to turn, False otherwise (default is False).
             last_turning (bool): True if the vehicle just finished turning, False otherwise (default is False).
 
         Returns:
             bool: True if the turning process is successful, False otherwise.
 
+        The vehicle follows an arc around the turn point, its position and direction are calculated
+        in closed form from the distance travelled along the arc when it moves.
+
         Steps:
             1. Check if the vehicle just finished turning.
-            2. If it finished turning, correct angling and distance missalignments.
-            3. If it finished turning, return True.
+            2. If it finished turning, leave the arc with the exit direction of the turn and return True.
+            3. Mark the vehicle as turning.
             4. If it's starting to turn, calculate the direction from the turning point to the vehicle.
             5. Calculate the turning direction and tangential vector based on the calculated direction.
-            6. If it's starting to turn, save the entry point (angle and direction).
-            7. Rotate the vehicle around the turning point based on the turning direction.
-            8. If it's starting to turn, save the entry point (distance).
-            9. Return True.
+            6. Save the entry point (angle, direction and distance).
+            7. Define the arc around the turning point based on the turning direction.
+            8. Return True.
 
         """
         # Step 1: Check if the vehicle just finished turning
         if last_turning:
             if self.turning_turn_id != -1:
 
-                # Step 2: Correct angling and distance missalignments
-                """
-                It would be needed to detect what side entered and what side is going out
-                change the new direction to perform the modification or not.
-                """
-                """
-                Detect if it entered looking inwards or outwards, and if enetered looking out
-                revert the conditionals
-                """
-
-                # Correct angling missalignment
-                turn = map.turns[self.turning_turn_id]
-                if self.turn_enter_direction == "Clockwise":
-                    new_direction = math_utils.correct_radian(self.turn_enter_angle - (turn.first_angle - turn.second_angle))
-                    self.turn_angle_error = math_utils.percentage_difference(self.direction, new_direction)
-                    self.direction = new_direction
-                else:
-                    new_direction = math_utils.correct_radian(self.turn_enter_angle + (turn.first_angle - turn.second_angle))
-                    self.turn_angle_error = math_utils.percentage_difference(self.direction, new_direction)
-                    self.direction = new_direction
-
-                # Correct distance missalignments
-                new_position = math_utils.change_distance_without_angle_change(0, 0, self.x - turn.x, turn.y - self.y, self.turn_enter_distance)
-                new_x = new_position[0] + turn.x
-                new_y = turn.y - new_position[1]
-                self.turn_distance_error = math_utils.percentage_difference(self.x + self.y, new_x + new_y)
-                self.x = new_x
-                self.y = new_y
+                # Step 2: Leave the arc with the exit direction of the turn, the radius is exact already
+                if self.turn_arc != None:
+                    exit_direction = self._turn_arc_exit_direction()
+                    self.turn_angle_error = abs(math.remainder(exit_direction - self.direction, 2 * math.pi))
+                    self.direction = exit_direction
+                    self._calculate_corrected_direction()
+                    self._calculate_front_position()
+                    self.turn_arc = None
                 return True
 
-        # Step 3: If it didn't finish turning, return True
+        # Step 3: If it didn't finish turning, mark it as turning
         self.turning = True
 
+        # The arc is kept until the vehicle finishes turning
+        if self.turn_arc != None and not first_turning:
+            return True
+
         # Step 4: Calculate the direction from the turning point to the vehicle
         turn = map.turns[self.turning_turn_id]
         turn_to_vehicle_direction = math_utils.angle_point_to_point(turn.x, turn.y, self.x, self.y)
@@ -491,87 +638,55 @@ class Vehicle(pygame.sprite.Sprite):
         # Step 5: Calculate the turning direction and tangential vector based on the calculated direction
         self.turning_direction, self.tangential_vector = math_utils.movement_rotational_direction(turn_to_vehicle_direction, self.direction)
 
-        # Step 6: If it's starting to turn, save the entry point (angle and direction)
-        if first_turning:
-            self.turn_enter_angle = self.direction
-            self.turn_enter_direction = self.turning_direction
+        # Step 6: Save the entry point (angle, direction and distance)
+        self.turn_enter_angle = self.direction
+        self.turn_enter_direction = self.turning_direction
+        self.turn_enter_distance = math_utils.distance_point_to_point(turn.x, turn.y, self.x, self.y)
+        self.closest_turn_distance = self.turn_enter_distance
 
-        # Step 7: Rotate the vehicle around the turning point based on the turning direction
-        self.rotate_around_point(turn.x, turn.y, time_delta, self.turning_direction)
+        # Step 7: Define the arc, moving tangentially the vehicle keeps going straight
+        sign = self.turning_direction if self.turning_direction in (math_utils.CLOCKWISE, math_utils.COUNTERCLOCKWISE) else 0
 
-        # Step 8: If it's starting to turn, save the entry point (distance)
-        if first_turning:
-            self.turn_enter_distance = self.closest_turn_distance
+        if sign != 0 and self.turn_enter_distance > 0:
+            self.turn_arc = (turn.x, turn.y, self.turn_enter_distance, turn_to_vehicle_direction, self.direction, sign, turn.turn_span)
+            self.turn_arc_length = 0
 
-        # Step 9: Return True
+        # Step 8: Return True
         return True
 
-    def rotate(self, angular_speed, time_delta):
+    def _turn_arc_exit_direction(self):
         """
-        Rotates the vehicle.
-
-        Parameters:
-            angular_speed (float): The angular speed in radians per second.
-            time_delta (float): The time passed since the last update.
-
-        Steps:
-            1. Update the direction based on the angular speed and time_delta.
-            2. Correct the direction angle to ensure it remains within the valid radian range.
-            3. Recalculate the front position of the vehicle.
-
-        Updates:
-            self.direction (float): The updated direction angle of the vehicle.
+        Returns the direction of the vehicle once it has turned the whole span of the turn.
         """
-        # Step 1: Update the direction based on the angular speed and time_delta
-        self.direction += angular_speed * time_delta / 1000000000
-        
-        # Step 2: Correct the direction angle to ensure it remains within the valid radian range
-        self.direction = math_utils.correct_radian(self.direction)
+        _, _, _, _, start_direction, sign, span = self.turn_arc
+        return math_utils.correct_radian(start_direction + sign * span)
 
-        # Step 3: Recalculate the front position of the vehicle
-        self._calculate_front_position()
-    
-    def rotate_around_point(self, point_x, point_y, time_delta, direction):
+    def _move_along_turn(self, pixels):
         """
-        Rotates the vehicle around a specified point on the map.
+        Moves the vehicle along its turn arc, once the whole span of the turn is travelled it
+        keeps going straight with the exit direction.
 
         Parameters:
-            point_x (float): The x-coordinate of the rotation point.
-            point_y (float): The y-coordinate of the rotation point.
-            time_delta (float): The time passed since the last update.
-            direction (str): The direction of rotation ("Clockwise", "Counterclockwise", or "Normal").
-
-        Steps:
-            1. Calculate the distance between the vehicle and the rotation point in pixels and meters.
-            2. Save the turn distance for future reference.
-            3. Calculate the angular speed in radians per second based on the vehicle's speed and distance.
-            4. Adjust the angular speed based on the specified rotation direction.
-            5. Rotate the vehicle using the calculated angular speed and time_delta.
+            pixels (float): The distance travelled in pixels.
 
         Updates:
-            self.closest_turn_distance (float): The saved turn distance for future reference.
-            self.direction (float): The updated direction angle of the vehicle.
+            self.turn_arc_length (float): The distance travelled along the arc.
+            self.x, self.y (float): The position on the arc.
+            self.direction (float): The direction tangent to the arc.
         """
-        # Step 1: Calculate the distance between the vehicle and the rotation point in pixels and meters
-        distance_pixels = math_utils.distance_point_to_point(point_x, point_y, self.x, self.y)
-        distance = math_utils.pixels_to_meters(distance_pixels)
-
-        # Step 2: Save the turn distance for future reference
-        self.closest_turn_distance = distance_pixels
+        center_x, center_y, radius, start_angle, start_direction, sign, span = self.turn_arc
+        self.turn_arc_length += pixels
 
-        # Step 3: Calculate the angular speed in radians per second based on the vehicle's speed and distance
-        angular_speed = self.speed / distance
+        # Angle travelled around the turn point, and what is left of the distance after the arc
+        arc_angle = min(self.turn_arc_length / radius, span)
+        straight = self.turn_arc_length - arc_angle * radius
 
-        # Step 4: Adjust the angular speed based on the specified rotation direction
-        if direction == "Clockwise":
-            angular_speed *= 1
-        elif direction == "Counterclockwise":
-            angular_speed *= -1
-        elif direction == "Normal":
-            angular_speed *= 0
+        angle = start_angle + sign * arc_angle
+        self.direction = math_utils.correct_radian(start_direction + sign * arc_angle)
+        self._calculate_corrected_direction()
 
-        # Step 5: Rotate the vehicle using the calculated angular speed and time_delta
-        self.rotate(angular_speed, time_delta)
+        self.x = center_x + radius * math.cos(angle) + straight * math.cos(self.direction)
+        self.y = center_y - radius * math.sin(angle) - straight * math.sin(self.direction)
 
     # ==============================================================
     # SECTION: Collisions functions
@@ -682,11 +797,223 @@ class Vehicle(pygame.sprite.Sprite):
 
         return final_rect
     
-    def detect_closest_vehicle(self, map, vehicles_list, debug):
+    def detect_closest_vehicle(self, map, vehicles_list, debug, beacons=None, time=0):
+        """
+        Detects the closest vehicle in front of this one along its look-ahead lines.
+
+        Parameters:
+            map (Map): The map object containing information about turns.
+            vehicles_list (list): List of Vehicle objects.
+            debug (bool): Flag to mark the detected vehicle for rendering.
+            beacons (dict): Fresh beacons received through the VANET, indexed by sender id, None when not
+                braking cooperatively (default is None).
+            time (float): Current VANET time in nanoseconds, used to age the beacons (default is 0).
+
+        Returns:
+            tuple: The closest vehicle (or the beacon describing it) and its distance in meters, (-1, -1) if none.
+
+        Steps:
+            1. Update the look-ahead lines and the turn state machine, which also selects the next turn.
+            2. When braking cooperatively, take the leader state from the beacons only, unless
+               BEACON_SENSING_FALLBACK is enabled and no beacon gives a leader.
+            3. On a straight tile, take the leader from the lane, skipping the geometric search.
+            4. Otherwise search all vehicles along the look-ahead lines.
+        """
+        # Step 1: Update the look-ahead lines and the turn state machine
+        self._update_look_ahead(map)
+
+        # Step 2: When braking cooperatively, take the leader state from the beacons
+        if beacons is not None:
+            closest_beacon, beacon_distance = self.closest_vehicle_from_beacons(beacons, time)
+            self.closest_vehicle = None
+
+            if closest_beacon != None:
+                self.closest_vehicle_id = closest_beacon.id
+                self.closest_vehicle_distance = math_utils.pixels_to_meters(beacon_distance)
+                return (closest_beacon, self.closest_vehicle_distance)
+
+            # A leader whose beacons were lost stays hidden
+            if not BEACON_SENSING_FALLBACK:
+                self.closest_vehicle_id = -1
+                return (-1, -1)
 
+        # Step 3: On a straight tile, take the leader from the lane
+        lane_leader = None
+        if USE_LANE_QUEUES and self.lane != None and not self.turning and self.turning_turn_id == -1 and self.collision_status == 0:
+            lane_leader = map.lane_leader(self)
+
+        if lane_leader != None:
+            closest_vehicle, smallest_distance = lane_leader
+
+            # Only vehicles inside the look-ahead line
+            if smallest_distance > math_utils.meters_to_pixels(OBSERVING_DISTANCE) + self.size_x:
+                closest_vehicle, smallest_distance = (None, -1)
+
+        # Step 4: Otherwise search all vehicles along the look-ahead lines
+        else:
+            closest_vehicle, smallest_distance = self._search_closest_vehicle(map, vehicles_list)
+
+        if debug:
+            if closest_vehicle != None: closest_vehicle.trigger_detected()
+        
+        # Setting the internal closest vehicle for external refference
+        self.closest_vehicle = closest_vehicle
+        
+        # If detecting any closest vehicle
+        if closest_vehicle != None:
+            self.closest_vehicle_id = closest_vehicle.id
+            self.closest_vehicle_distance = math_utils.pixels_to_meters(smallest_distance)
+            return (closest_vehicle, self.closest_vehicle_distance)
+
+        else:
+            self.closest_vehicle_id = -1
+            return (-1, -1)
+
+    def closest_vehicle_from_beacons(self, beacons, time):
+        """
+        Finds the closest vehicle in front of this one using the beacons received through the VANET.
+
+        The position of each sender is extrapolated to the current time with the speed and
+        direction it advertised, and it is accepted as a leader if it lies on the straight
+        look-ahead line of this vehicle.
+
+        Parameters:
+            beacons (dict): Beacons received through the VANET, indexed by sender id.
+            time (float): Current VANET time in nanoseconds.
+
+        Returns:
+            tuple: The beacon of the closest vehicle and its distance in pixels, (None, -1) if none.
+        """
+        # Only a straight look-ahead line can be checked against the beacons
+        if self.turning or self.turning_turn_id != -1:
+            return (None, -1)
+
+        look_ahead_distance = math_utils.meters_to_pixels(OBSERVING_DISTANCE) + self.size_x
+        detection_range = math_utils.meters_to_pixels(OBSERVING_DETECTION_RANGE)
+        direction_x, direction_y = self._calculate_direction_vector()
+
+        closest_beacon = None
+        smallest_distance = -1
+
+        for beacon in beacons.values():
+
+            # Extrapolate the position of the sender to the current time
+            travelled = math_utils.meters_to_pixels(beacon.speed * (time - beacon.time) / 1000000000)
+            beacon_x = beacon.x + travelled * math.cos(beacon.direction)
+            beacon_y = beacon.y - travelled * math.sin(beacon.direction)
+
+            # Longitudinal and lateral offsets with respect to this vehicle, minus for the fourth quadrant
+            delta_x = beacon_x - self.x
+            delta_y = self.y - beacon_y
+            longitudinal = math_utils.dot_product(delta_x, delta_y, direction_x, direction_y)
+            lateral = abs(delta_y * direction_x - delta_x * direction_y)
+
+            # Checking the sender is in front of the vehicle and inside the look-ahead line
+            if 0 < longitudinal <= look_ahead_distance and lateral <= detection_range:
+                distance = math_utils.distance_point_to_point(self.x, self.y, beacon_x, beacon_y)
+                if smallest_distance == -1 or distance < smallest_distance:
+                    smallest_distance = distance
+                    closest_beacon = beacon
+
+        return (closest_beacon, smallest_distance)
+
+    def _look_ahead_cached(self, key):
+        """
+        Checks if the cached look-ahead geometry is still valid, and if not, takes the new key.
+
+        The geometry is valid while the key (collision state and tiles) is the same and the
+        heading did not change more than LOOK_AHEAD_HEADING_TOLERANCE.
+
+        Parameters:
+            key (tuple): Identifies the state the geometry was calculated for.
+
+        Returns:
+            bool: True if the cached geometry can be used.
+        """
+        if key == self.look_ahead_key and abs(self.corrected_direction - self.look_ahead_direction) <= LOOK_AHEAD_HEADING_TOLERANCE:
+            return True
+
+        self.look_ahead_key = key
+        self.look_ahead_direction = self.corrected_direction
+        return False
+
+    def _look_ahead_turn_crossings(self, map):
+        """
+        Finds the turn borders crossed by the collision line in front of the vehicle.
+
+        Instead of intersecting the collision line with every turn each frame, a ray long enough
+        to cover the location and direction tiles is intersected once, storing the crossings as
+        distances along the ray. The crossings of the collision line are the ones between the
+        distance already travelled and the look-ahead distance.
+
+        Parameters:
+            map (Map): The map object containing information about turns.
+
+        Returns:
+            tuple: The crossed turn ids and the crossing points.
+        """
+        look_ahead_distance = math_utils.meters_to_pixels(OBSERVING_DISTANCE) + self.size_x
+
+        # Casting a new ray if the tiles, heading or collision state changed, unless it was already cast in a batch
+        ray = self.look_ahead_ray(map)
+        if ray != None:
+            turn_ids, points = map.collision_turns(self, ray[0], ray[1])
+            self.set_look_ahead_crossings(ray[0], turn_ids, points)
+
+        # Distance travelled along the ray
+        travelled = (self.look_ahead_origin[0] - self.x) * math.cos(self.corrected_direction) + (self.y - self.look_ahead_origin[1]) * math.sin(self.corrected_direction)
+
+        turn_ids = []
+        points = []
+        for distance, turn_id, point in self.look_ahead_crossings:
+            if travelled <= distance <= travelled + look_ahead_distance:
+                turn_ids.append(turn_id)
+                points.append(point)
+
+        return (turn_ids, points)
+
+    def look_ahead_ray(self, map):
+        """
+        Returns the ray to cast while searching for turns if the cached one is outdated, taking the new cache key.
+
+        Parameters:
+            map (Map): The map object, the ray covers the location and direction tiles.
+
+        Returns:
+            tuple: Origin and end points of the ray, None if the cached crossings are still valid.
+        """
+        if self._look_ahead_cached(("Searching", self.location_tile, self.direction_tile)):
+            return None
+
+        ray_length = 2 * map.tile_size + math_utils.meters_to_pixels(OBSERVING_DISTANCE) + self.size_x
+        return ((self.x, self.y), (self.x - ray_length * math.cos(self.corrected_direction), self.y + ray_length * math.sin(self.corrected_direction)))
+
+    def set_look_ahead_crossings(self, origin, turn_ids, points):
+        """
+        Stores the turn borders crossed by a cast look-ahead ray as distances along the ray.
+
+        Parameters:
+            origin (tuple): Origin of the ray, the vehicle position when it was cast.
+            turn_ids (list): Crossed turn ids.
+            points (list): Crossing points.
+        """
+        self.look_ahead_origin = origin
+        self.look_ahead_crossings = [(math_utils.distance_point_to_point(origin[0], origin[1], point[0], point[1]), turn_id, point) for turn_id, point in zip(turn_ids, points)]
+
+    def _update_look_ahead(self, map):
+        """
+        Updates the look-ahead lines (segment, arc, segment) in front of the vehicle and the
+        turn collision state machine.
+
+        Parameters:
+            map (Map): The map object containing information about turns.
+        """
         # Check if the vehicle is on any turn
         if self.turning:
 
+            # The geometry changes every frame while turning
+            self.look_ahead_key = None
+
             # Reset skipturn in case is enabled
             if self.collision_status == 0:
                 self.skipturn = False
@@ -752,10 +1079,10 @@ class Vehicle(pygame.sprite.Sprite):
                 self.collision_turn_y = - self.collision_turn_y + turn.y
 
                 # Getting the corrected angle for the new segment
-                if self.collision_turning_direction == "Clockwise":
+                if self.collision_turning_direction == math_utils.CLOCKWISE:
                     segment_2_angle_change = self.corrected_direction - self.collision_turn_angle
                 
-                elif self.collision_turning_direction == "Counterclockwise":
+                elif self.collision_turning_direction == math_utils.COUNTERCLOCKWISE:
                     segment_2_angle_change = self.corrected_direction + self.collision_turn_angle
                 
                 else:
@@ -790,8 +1117,8 @@ class Vehicle(pygame.sprite.Sprite):
                 self.collision_x = self.x - (math_utils.meters_to_pixels(OBSERVING_DISTANCE) + self.size_x) * math.cos(self.corrected_direction)
                 self.collision_y = self.y + (math_utils.meters_to_pixels(OBSERVING_DISTANCE) + self.size_x) * math.sin(self.corrected_direction)
 
-                # Check what turns the vehicle collided with
-                collided_turns_ids, collided_turn_points = map.closest_collision_turns(self)
+                # Check what turns the vehicle collided with, using the cached look-ahead ray
+                collided_turns_ids, collided_turn_points = map.closest_collision_turns(self, self._look_ahead_turn_crossings(map))
 
                 #if debug:
                 #    print(f"Collided turn ids: {collided_turns_ids}, collided turn positions: {collided_turn_points}")
@@ -845,15 +1172,21 @@ class Vehicle(pygame.sprite.Sprite):
                 # Obtain the turn itself that we are dealing with
                 turn = map.turns[self.turning_turn_id]
 
-                # Calculating the distance to the center of the turn
-                self.turn_radius_distance = math_utils.distance_point_to_point(self.collision_segment1_x, self.collision_segment1_y, turn.x, turn.y)
+                # The turn geometry only changes with the tile, heading or collision state
+                if not self._look_ahead_cached(("Turn", self.collision_status, self.turning_turn_id, self.location_tile, self.direction_tile)):
 
-                #if debug:
-                #    print(f"Distance to center: {self.turn_radius_distance}")
+                    # Calculating the distance to the center of the turn
+                    self.turn_radius_distance = math_utils.distance_point_to_point(self.collision_segment1_x, self.collision_segment1_y, turn.x, turn.y)
+
+                    #if debug:
+                    #    print(f"Distance to center: {self.turn_radius_distance}")
 
-                # Calculating the turning direction
-                self.turn_to_collision_angle = math_utils.angle_point_to_point(turn.x, turn.y, self.collision_segment1_x, self.collision_segment1_y)
-                self.collision_turning_direction, tangential_vector = math_utils.movement_rotational_direction(self.turn_to_collision_angle, self.corrected_direction)
+                    # Calculating the turning direction
+                    self.turn_to_collision_angle = math_utils.angle_point_to_point(turn.x, turn.y, self.collision_segment1_x, self.collision_segment1_y)
+                    self.collision_turning_direction, tangential_vector = math_utils.movement_rotational_direction(self.turn_to_collision_angle, self.corrected_direction)
+
+                    # End of the whole turn, calculated when needed
+                    self.look_ahead_turn_end = None
 
                 # Total distance for going all around the turn
                 turn_arc_distance = turn.turn_span * self.turn_radius_distance
@@ -869,23 +1202,27 @@ class Vehicle(pygame.sprite.Sprite):
 
                     # Reduce the remaining distance
                     remaining_distance -= turn_arc_distance
+
+                    # The end of the whole turn does not depend on the vehicle position
+                    if self.look_ahead_turn_end == None:
                 
-                    # Calculating new turning point
-                    self.collision_turn_x, self.collision_turn_y = math_utils.rotate_point(self.collision_segment1_x - turn.x, turn.y - self.collision_segment1_y, self.collision_turn_angle, self.collision_turning_direction) # math_utils bruh
+                        # Calculating new turning point
+                        collision_turn_x, collision_turn_y = math_utils.rotate_point(self.collision_segment1_x - turn.x, turn.y - self.collision_segment1_y, self.collision_turn_angle, self.collision_turning_direction) # math_utils bruh
+
+                        # Getting the corrected angle for the new segment
+                        if self.collision_turning_direction == math_utils.CLOCKWISE:
+                            segment_2_angle_change = self.corrected_direction - self.collision_turn_angle
+                        
+                        elif self.collision_turning_direction == math_utils.COUNTERCLOCKWISE:
+                            segment_2_angle_change = self.corrected_direction + self.collision_turn_angle
 
-                    # Recentering the collision point
-                    self.collision_turn_x = self.collision_turn_x + turn.x
-                    self.collision_turn_y = -self.collision_turn_y + turn.y
+                        else:
+                            segment_2_angle_change = 0
 
-                    # Getting the corrected angle for the new segment
-                    if self.collision_turning_direction == "Clockwise":
-                        segment_2_angle_change = self.corrected_direction - self.collision_turn_angle
-                    
-                    elif self.collision_turning_direction == "Counterclockwise":
-                        segment_2_angle_change = self.corrected_direction + self.collision_turn_angle
+                        # Recentering the collision point
+                        self.look_ahead_turn_end = (collision_turn_x + turn.x, -collision_turn_y + turn.y, segment_2_angle_change)
 
-                    else:
-                        segment_2_angle_change = 0
+                    self.collision_turn_x, self.collision_turn_y, segment_2_angle_change = self.look_ahead_turn_end
 
                     # Getting the second point of the second segment
                     self.collision_segment2_x = self.collision_turn_x - (remaining_distance) * math.cos(segment_2_angle_change)
@@ -931,7 +1268,7 @@ class Vehicle(pygame.sprite.Sprite):
                 self.collision_turn_angle = 0
 
                 # Direction is tangential
-                self.collision_turning_direction = "Tangential"
+                self.collision_turning_direction = math_utils.TANGENTIAL
 
                 # Second segment gone
                 self.collision_turn_x = self.x
@@ -942,6 +1279,17 @@ class Vehicle(pygame.sprite.Sprite):
                 # Remaining distance is 0
                 remaining_distance = 0
 
+    def _search_closest_vehicle(self, map, vehicles_list):
+        """
+        Searches all vehicles along the look-ahead lines of the vehicle.
+
+        Parameters:
+            map (Map): The map object containing information about turns.
+            vehicles_list (list): List of Vehicle objects.
+
+        Returns:
+            tuple: The closest vehicle and the distance to it in pixels, (None, -1) if none.
+        """
         # Check collisions with the rect, and get the closest vehicle
         smallest_distance = -1
         closest_vehicle = None
@@ -997,28 +1345,10 @@ class Vehicle(pygame.sprite.Sprite):
                         # Calculate the maximum angle difference, TO-DO now the max_angle_difference depends on the radius
                         max_angle_difference = OBSERVING_DETECTION_RANGE / math_utils.pixels_to_meters(self.turn_radius_distance) # In pixels
 
-                        # Calculating both angles of the view arc
-                        if self.collision_turning_direction == "Clockwise":
-                            first_angle = self.turn_to_collision_angle - self.collision_turn_angle
-                            second_angle = self.turn_to_collision_angle
-                        
-                        elif self.collision_turning_direction == "Counterclockwise":
-                            first_angle = self.turn_to_collision_angle + self.collision_turn_angle
-                            second_angle = self.turn_to_collision_angle
-                        
-                        # Calculate limits for the first and second angles
-                        
-                        #if debug:
-                        #    print(f"Detected vehicle turn angle: {vehicle_turn_angle}, First angle: {first_angle}, Second angle: {second_angle}, max difference: {max_angle_difference}")
-                        
-                        # Check that the vehicle is in the correct angle span, either inside, or just outside within the max angle difference
-                        if math_utils.angle_in_between(first_angle, second_angle, vehicle_turn_angle) or (first_angle - max_angle_difference < vehicle_turn_angle < first_angle + max_angle_difference) or (second_angle - max_angle_difference < vehicle_turn_angle < second_angle + max_angle_difference):
-                            
-                            # Calculating the distance provided by the angle to the car
-                            vehicle_angle_distance = abs(math_utils.closest_angular_distance(self.turn_to_collision_angle, vehicle_turn_angle, self.collision_turning_direction))
-
-                            #if debug:
-                            #    print(f"Angle distance: {vehicle_angle_distance}")
+                        # Angular distance to the vehicle if it is in the view arc, either inside, or just outside within the max angle difference
+                        vehicle_angle_distance = turn_kernels.turn_window_distance(self.turn_to_collision_angle, self.collision_turn_angle, self.collision_turning_direction,
+                                                                                    vehicle_turn_angle, max_angle_difference)
+                        if vehicle_angle_distance != -1:
 
                             # Calculate the total distance to the detected vehicle
                             new_distance = first_segment_length + vehicle_angle_distance * self.turn_radius_distance
@@ -1062,19 +1392,7 @@ class Vehicle(pygame.sprite.Sprite):
                             smallest_distance = new_distance
                             closest_vehicle = vehicle
 
-        if debug:
-            if closest_vehicle != None: closest_vehicle.trigger_detected()
-        
-        # Setting the internal closest vehicle for external refference
-        self.closest_vehicle = closest_vehicle
-        
-        # If detecting any closest vehicle
-        if closest_vehicle != None:
-            self.closest_vehicle_distance = math_utils.pixels_to_meters(smallest_distance)
-            return (closest_vehicle, self.closest_vehicle_distance)
-
-        else:
-            return (-1, -1)
+        return (closest_vehicle, smallest_distance)
 
     # ==============================================================
     # SECTION: Moving functions
@@ -1091,12 +1409,14 @@ class Vehicle(pygame.sprite.Sprite):
         Steps:
             1. Calculate the distance traveled in meters based on the current speed and time_delta.
             2. Convert the distance from meters to pixels using math_utils.meters_to_pixels().
-            3. Update the x and y coordinates based on the calculated distance and direction.
+            3. Update the x and y coordinates based on the calculated distance and direction,
+               along the turn arc if the vehicle is turning.
             4. Recalculate the front position of the vehicle.
 
         Updates:
             self.x (float): The updated x-coordinate of the vehicle.
             self.y (float): The updated y-coordinate of the vehicle.
+            self.direction (float): The updated direction if the vehicle is turning.
         """
         # Step 1: Calculate the distance traveled in meters based on the current speed and time_delta
         meters = self.speed * time_delta / 1000000000
@@ -1105,8 +1425,15 @@ class Vehicle(pygame.sprite.Sprite):
         pixels = math_utils.meters_to_pixels(meters)
 
         # Step 3: Update the x and y coordinates based on the calculated distance and direction
-        self.x += pixels * math.cos(self.direction)
-        self.y -= pixels * math.sin(self.direction)
+        if self.turn_arc != None and not self.turning:
+            self.turn_arc = None
+
+        if self.turn_arc != None:
+            self._move_along_turn(pixels)
+
+        else:
+            self.x += pixels * math.cos(self.direction)
+            self.y -= pixels * math.sin(self.direction)
 
         # Step 4: Recalculate the front position of the vehicle
         self._calculate_front_position()
@@ -1128,9 +1455,12 @@ class Vehicle(pygame.sprite.Sprite):
             - Center front position point.
             - Debugging information if debug is True.
         """
+        # Create the rendering resources the first time the vehicle is drawn
+        if self.renderer == None:
+            self.renderer = Vehicle_Renderer(self)
+
         # Render the rotated vehicle image
-        self._rotate_image()
-        screen.blit(self.rotated_image, self.rotated_rect.topleft)
+        self.renderer.draw(screen, self)
 
         # Render a point for the center front position
         pygame.draw.circle(screen, (0, 0, 255), (int(self.front_x), int(self.front_y)), 1)
@@ -1141,25 +1471,25 @@ class Vehicle(pygame.sprite.Sprite):
 
         """
         # Render the speed
-        text_1 = self.font.render(str(self.speed), True, (0, 0, 0))  # Black color
+        text_1 = self.renderer.font.render(str(self.speed), True, (0, 0, 0))  # Black color
         text_1_rect = text_1.get_rect()
         text_1_rect.topleft = (10, pygame.display.Info().current_h - text_1_rect.height - 10)  # Adjust the position here
         screen.blit(text_1, text_1_rect)
 
         # Render the closest stop distance
-        text_2 = self.font.render(str(self.closest_stop_distance), True, (0, 0, 0))  # Black color
+        text_2 = self.renderer.font.render(str(self.closest_stop_distance), True, (0, 0, 0))  # Black color
         text_2_rect = text_2.get_rect()
         text_2_rect.topleft = (10, pygame.display.Info().current_h - text_2_rect.height - 40)  # Adjust the position here
         screen.blit(text_2, text_2_rect)
 
         # Render the direction
-        text_3 = self.font.render(str(self.turn_angle_error), True, (0, 0, 0))  # Black color
+        text_3 = self.renderer.font.render(str(self.turn_angle_error), True, (0, 0, 0))  # Black color
         text_3_rect = text_3.get_rect()
         text_3_rect.topleft = (10, pygame.display.Info().current_h - text_3_rect.height - 70)  # Adjust the position here
         screen.blit(text_3, text_3_rect)
 
         # Render the distance to turn point
-        text_4 = self.font.render(str(math.degrees(self.direction)), True, (0, 0, 0))  # Black color
+        text_4 = self.renderer.font.render(str(math.degrees(self.direction)), True, (0, 0, 0))  # Black color
         text_4_rect = text_4.get_rect()
         text_4_rect.topleft = (10, pygame.display.Info().current_h - text_4_rect.height - 100)  # Adjust the position here
         screen.blit(text_4, text_4_rect)
@@ -1192,12 +1522,12 @@ class Vehicle(pygame.sprite.Sprite):
                 #start_angle = math_utils.angle_point_to_point(turn.x, turn.y, self.collision_segment1_x, self.collision_segment1_y)
                 rect = pygame.Rect(turn.x - radius, turn.y - radius, 2 * radius, 2 * radius)
 
-                if self.collision_turning_direction == "Clockwise":
+                if self.collision_turning_direction == math_utils.CLOCKWISE:
                     first_angle = self.turn_to_collision_angle - self.collision_turn_angle
                     second_angle = self.turn_to_collision_angle
                     pygame.draw.arc(screen, (0, 0, 255), rect, first_angle, second_angle, 1)
                 
-                elif self.collision_turning_direction == "Counterclockwise":
+                elif self.collision_turning_direction == math_utils.COUNTERCLOCKWISE:
                     first_angle = self.turn_to_collision_angle + self.collision_turn_angle
                     second_angle = self.turn_to_collision_angle
                     pygame.draw.arc(screen, (0, 0, 255), rect, second_angle, first_angle, 1)
@@ -1240,11 +1570,11 @@ class Vehicle(pygame.sprite.Sprite):
         # Debugging information for turning
         if debug and self.turning and self.turning_turn_id != -1:
             turn = map.turns[self.turning_turn_id]
-            if self.turning_direction == "Clockwise":
+            if self.turning_direction == math_utils.CLOCKWISE:
                 color = (0, 0, 255)
-            elif self.turning_direction == "Counterclockwise":
+            elif self.turning_direction == math_utils.COUNTERCLOCKWISE:
                 color = (0, 255, 0)
-            elif self.turning_direction == "Normal":
+            elif self.turning_direction == math_utils.NORMAL:
                 color = (255, 0, 0)
             else:
                 color = (0, 0, 0)
@@ -1343,6 +1673,7 @@ class Vehicle(pygame.sprite.Sprite):
         """
         # Set the direction of the vehicle to the specified angle
         self.direction = direction
+        self._calculate_corrected_direction()
 
     def trigger_detected(self):
         self.debug_detected = True
\ No newline at end of file
@@ -0,0 +1,323 @@
+"""
+Originally designed by pasblo
+GNU GENERAL PUBLIC LICENSE
+Vectorized counterparts of math_utils, every function accepts numpy arrays (or scalars)
+that broadcast together and follows exactly the same semantics as its scalar version.
+Run this module to check the parity with math_utils: python -m src.math_kernels
+"""
+
+import numpy as np
+
+from src.math_utils import NORMAL, CLOCKWISE, COUNTERCLOCKWISE
+
+TWO_PI = 2 * np.pi
+
+# ==============================================================
+# SECTION: Angular functions
+# Description: Functions relating angular operations and logic
+# ==============================================================
+
+def correct_radian(angle):
+    """Ensures the angles are within 0 to 2*pi radians."""
+    return np.mod(angle, TWO_PI)
+
+def ordered_angles(start_angle, end_angle, side = "small"):
+    """Orders pairs of angles based on the specified side (small or big)."""
+    start_angle, end_angle = np.broadcast_arrays(np.asarray(start_angle, dtype = float), np.asarray(end_angle, dtype = float))
+
+    # Checking what angle should we assign as first and second angle
+    start_first = correct_radian(start_angle - end_angle) < correct_radian(end_angle - start_angle)
+    if side == "big":
+        start_first = ~start_first
+
+    elif side != "small":
+        return (np.zeros_like(start_angle), np.zeros_like(start_angle))
+
+    return (np.where(start_first, start_angle, end_angle), np.where(start_first, end_angle, start_angle))
+
+def angle_in_between(start_angle = 0, end_angle = 0, angle = 0, side = "small", first_angle_forced = None, second_angle_forced = None):
+    """Checks if the angles are between two other angles."""
+    if first_angle_forced is not None and second_angle_forced is not None:
+        first_angle = np.asarray(first_angle_forced, dtype = float)
+        second_angle = np.asarray(second_angle_forced, dtype = float)
+
+    else:
+        first_angle, second_angle = ordered_angles(start_angle, end_angle, side)
+
+    # Check if the angle is between start_angle and end_angle in the clockwise direction
+    end = second_angle - first_angle
+    end = np.where(end <= 0, end + TWO_PI, end)
+
+    angle = np.asarray(angle, dtype = float) - first_angle
+    angle = np.where(angle <= 0, angle + TWO_PI, angle)
+
+    return angle >= end
+
+def angle_point_to_point(origin_x, origin_y, far_x, far_y):
+    """Calculates the angles between pairs of points."""
+    return correct_radian(np.arctan2(np.subtract(origin_y, far_y), np.subtract(far_x, origin_x)))
+
+def closest_angular_distance(static_angle, moving_angle, turning_direction = CLOCKWISE):
+    """Returns positive numbers where the moving angle is moving towards the static one, and negative numbers where moving away"""
+    static_angle, moving_angle = np.broadcast_arrays(np.asarray(static_angle, dtype = float), np.asarray(moving_angle, dtype = float))
+
+    if turning_direction == CLOCKWISE:
+
+        # Fixing 0 - 360 angle problem
+        static_angle = np.where((static_angle == TWO_PI) & (moving_angle != TWO_PI), 0, static_angle)
+        diff = moving_angle - static_angle
+
+    elif turning_direction == COUNTERCLOCKWISE:
+
+        # Fixing 0 - 360 angle problem
+        static_angle = np.where((static_angle == 0) & (moving_angle != 0), TWO_PI, static_angle)
+        diff = static_angle - moving_angle
+
+    else:
+        return np.zeros_like(static_angle)
+
+    # Finding the distance in radians
+    return np.where(diff > np.pi, diff - TWO_PI, diff)
+
+# ==============================================================
+# SECTION: Distance functions
+# Description: Functions to calculate distances between
+# matematical objects.
+# ==============================================================
+
+def distance_point_to_line(point_x, point_y, line_x1, line_y1, line_x2, line_y2):
+    """Calculate the CLOSEST distance between points and lines"""
+    numerator = np.abs((line_y2 - line_y1) * point_x - (line_x2 - line_x1) * point_y + line_x2 * line_y1 - line_y2 * line_x1)
+    denominator = np.sqrt(np.square(line_y2 - line_y1) + np.square(line_x2 - line_x1))
+    return numerator / denominator
+
+def distance_point_to_segment(point_x, point_y, line_x1, line_y1, line_x2, line_y2):
+    """Calculates the shortest distance from points to line segments defined
+    by their start and end points in a two-dimensional space"""
+    point_x, point_y, line_x1, line_y1, line_x2, line_y2 = np.broadcast_arrays(*(np.asarray(value, dtype = float) for value in (point_x, point_y, line_x1, line_y1, line_x2, line_y2)))
+
+    # Check if the perpendicular projection of the points onto the line segments lie within the segments
+    dot_product = (point_x - line_x1) * (line_x2 - line_x1) + (point_y - line_y1) * (line_y2 - line_y1)
+    squared_length = np.square(line_x2 - line_x1) + np.square(line_y2 - line_y1)
+
+    # Calculate the parameter 't' for the projection onto the line segments, segments that are points project on their start
+    t = np.divide(dot_product, squared_length, out = np.zeros_like(dot_product), where = squared_length != 0)
+    t = np.clip(t, 0, 1)
+
+    # Calculate the coordinates of the perpendicular projection on the line segments
+    projection_x = line_x1 + t * (line_x2 - line_x1)
+    projection_y = line_y1 + t * (line_y2 - line_y1)
+
+    return distance_point_to_point(point_x, point_y, projection_x, projection_y)
+
+def distance_point_to_point(point1_x, point1_y, point2_x, point2_y):
+    """Calculate the distances between pairs of points"""
+    return np.sqrt(np.square(np.subtract(point2_x, point1_x)) + np.square(np.subtract(point2_y, point1_y)))
+
+def distance_matrix(points1_x, points1_y, points2_x, points2_y):
+    """Calculate the distances between every point of the first set and every point of the second one,
+    with the first set on the rows"""
+    return distance_point_to_point(np.asarray(points1_x, dtype = float)[:, None], np.asarray(points1_y, dtype = float)[:, None],
+                                   np.asarray(points2_x, dtype = float)[None, :], np.asarray(points2_y, dtype = float)[None, :])
+
+# ==============================================================
+# SECTION: Movement and rotation functions
+# Description: Functions to calculate directions of movement
+# ==============================================================
+
+def movement_rotational_direction(point_to_object_direction, object_direction):
+    """Determines the rotational directions of movement, returns an array of direction codes and
+    the tangential components with shape (..., 2)."""
+    point_to_object_direction, object_direction = np.broadcast_arrays(np.asarray(point_to_object_direction, dtype = float), np.asarray(object_direction, dtype = float))
+
+    # Get vector directions to and of the objects
+    to_object_x, to_object_y = np.cos(point_to_object_direction), np.sin(point_to_object_direction)
+    of_object_x, of_object_y = np.cos(object_direction), np.sin(object_direction)
+
+    # Get tangential projection of direction of object to direction to object
+    scalar = (to_object_x * of_object_x + to_object_y * of_object_y) / (to_object_x * to_object_x + to_object_y * to_object_y)
+    tangential_x = of_object_x - scalar * to_object_x
+    tangential_y = of_object_y - scalar * to_object_y
+
+    # Cross product with the reference axis of every local quadrant
+    cross_product_result = np.select([(0 <= point_to_object_direction) & (point_to_object_direction < np.pi/2),
+                                      (np.pi/2 <= point_to_object_direction) & (point_to_object_direction < np.pi),
+                                      (np.pi <= point_to_object_direction) & (point_to_object_direction < 3*np.pi/2),
+                                      (3*np.pi/2 <= point_to_object_direction) & (point_to_object_direction < TWO_PI)],
+                                     [-tangential_y, tangential_x, tangential_y, -tangential_x], 0)
+
+    directions = np.select([cross_product_result > 0, cross_product_result < 0], [COUNTERCLOCKWISE, CLOCKWISE], NORMAL)
+    return (directions, np.stack((tangential_x, tangential_y), axis = -1))
+
+def rotate_point(x, y, angle, direction = COUNTERCLOCKWISE):
+    """
+    Rotates points (x, y) around the origin.
+
+    Parameters:
+        x (float or np.ndarray): x-coordinates of the points.
+        y (float or np.ndarray): y-coordinates of the points.
+        angle (float or np.ndarray): Angles of rotation in radians.
+        direction (int): Direction of rotation, CLOCKWISE or COUNTERCLOCKWISE.
+
+    Returns:
+        tuple: Rotated coordinates (x_rotated, y_rotated).
+    """
+    x, y, angle = np.broadcast_arrays(np.asarray(x, dtype = float), np.asarray(y, dtype = float), np.asarray(angle, dtype = float))
+    cos, sin = np.cos(angle), np.sin(angle)
+
+    if direction == CLOCKWISE:
+        return (x * cos + y * sin, -x * sin + y * cos)
+
+    elif direction == COUNTERCLOCKWISE:
+        return (x * cos - y * sin, x * sin + y * cos)
+
+    return (np.full_like(x, -1), np.full_like(y, -1))
+
+# ==============================================================
+# SECTION: Location functions
+# Description: Functions to obtain points in objects or lines
+# ==============================================================
+
+def get_point_on_circle(circle_x, circle_y, radius, angle):
+    """Calculates points in the radius of circles"""
+    x = circle_x + radius * np.cos(angle)
+    y = circle_y - radius * np.sin(angle)
+    return np.trunc(x).astype(int), np.trunc(y).astype(int)
+
+def are_lines_intersecting(start1_x, start1_y, end1_x, end1_y, start2_x, start2_y, end2_x, end2_y):
+    """Check if pairs of line segments are intersecting"""
+
+    # Using cross product to determine if the lines are intersecting
+    cross_product1 = (end2_x - start2_x) * (start1_y - start2_y) - (end2_y - start2_y) * (start1_x - start2_x)
+    cross_product2 = (end1_x - start1_x) * (start1_y - start2_y) - (end1_y - start1_y) * (start1_x - start2_x)
+    cross_product3 = (end1_x - start1_x) * (end2_y - start2_y) - (end1_y - start1_y) * (end2_x - start2_x)
+
+    # Lines are intersecting if cross products have different signs
+    return (cross_product1 * cross_product2 > 0) & (cross_product1 * cross_product3 > 0)
+
+def _orientation(p_x, p_y, q_x, q_y, r_x, r_y):
+    """Orientation of the triplets, 0 when collinear and opposite signs for clockwise and counterclockwise."""
+    return np.sign((q_y - p_y) * (r_x - q_x) - (q_x - p_x) * (r_y - q_y))
+
+def _on_segment(p_x, p_y, q_x, q_y, r_x, r_y):
+    """Checks if the points q lie inside the bounding boxes of the segments p-r."""
+    return (q_x <= np.maximum(p_x, r_x)) & (q_x >= np.minimum(p_x, r_x)) & (q_y <= np.maximum(p_y, r_y)) & (q_y >= np.minimum(p_y, r_y))
+
+def find_intersection(seg1_start, seg1_end, seg2_start, seg2_end):
+    """
+    Finds the intersection point of pairs of segments.
+
+    Parameters:
+        seg1_start, seg1_end, seg2_start, seg2_end (np.ndarray): Points of the segments with shape (..., 2).
+
+    Returns:
+        tuple: x and y coordinates of the intersections, and a boolean array with the pairs that intersect.
+               Coordinates of pairs that do not intersect are nan.
+    """
+    seg1_start, seg1_end, seg2_start, seg2_end = np.broadcast_arrays(*(np.asarray(point, dtype = float) for point in (seg1_start, seg1_end, seg2_start, seg2_end)))
+    x1, y1 = seg1_start[..., 0], seg1_start[..., 1]
+    x2, y2 = seg1_end[..., 0], seg1_end[..., 1]
+    x3, y3 = seg2_start[..., 0], seg2_start[..., 1]
+    x4, y4 = seg2_end[..., 0], seg2_end[..., 1]
+
+    o1 = _orientation(x1, y1, x2, y2, x3, y3)
+    o2 = _orientation(x1, y1, x2, y2, x4, y4)
+    o3 = _orientation(x3, y3, x4, y4, x1, y1)
+    o4 = _orientation(x3, y3, x4, y4, x2, y2)
+
+    # Intersection of the supporting lines, only used where the segments properly intersect
+    with np.errstate(divide = "ignore", invalid = "ignore"):
+        denominator = (x1 - x2) * (y3 - y4) - (y1 - y2) * (x3 - x4)
+        crossing_x = ((x1 * y2 - y1 * x2) * (x3 - x4) - (x1 - x2) * (x3 * y4 - y3 * x4)) / denominator
+        crossing_y = ((x1 * y2 - y1 * x2) * (y3 - y4) - (y1 - y2) * (x3 * y4 - y3 * x4)) / denominator
+
+    # Same priority as the scalar version, proper intersections first and then the collinear cases
+    conditions = [(o1 != o2) & (o3 != o4),
+                  (o1 == 0) & _on_segment(x1, y1, x3, y3, x2, y2),
+                  (o2 == 0) & _on_segment(x1, y1, x4, y4, x2, y2),
+                  (o3 == 0) & _on_segment(x3, y3, x1, y1, x4, y4),
+                  (o4 == 0) & _on_segment(x3, y3, x2, y2, x4, y4)]
+    choices = [(crossing_x, crossing_y), (x3, y3), (x4, y4), (x1, y1), (x2, y2)]
+
+    intersection_x = np.full(x1.shape, np.nan)
+    intersection_y = np.full(y1.shape, np.nan)
+    for condition, (choice_x, choice_y) in zip(reversed(conditions), reversed(choices)):
+        intersection_x = np.where(condition, choice_x, intersection_x)
+        intersection_y = np.where(condition, choice_y, intersection_y)
+
+    return (intersection_x, intersection_y, np.logical_or.reduce(conditions))
+
+# ==============================================================
+# SECTION: Parity harness
+# Description: Checks every kernel against its scalar version
+# ==============================================================
+
+def _check_parity(samples = 2000, seed = 0):
+    import src.math_utils as math_utils
+
+    rng = np.random.default_rng(seed)
+
+    # Random angles, with the 0 and 2*pi edge cases of the scalar versions mixed in
+    angles = rng.uniform(0, TWO_PI, (4, samples))
+    angles[:, ::50] = 0
+    angles[:, 25::50] = TWO_PI
+    angles[:, 10::50] = np.pi/2
+
+    # Random points on a grid, so collinear and touching segments show up
+    points = rng.integers(0, 20, (8, samples)).astype(float)
+
+    def check(name, vectorized, scalar):
+        assert np.allclose(vectorized, scalar, equal_nan = True), name
+        print(f"{name}: OK")
+
+    check("correct_radian", correct_radian(angles[0] - 7), [math_utils.correct_radian(a - 7) for a in angles[0]])
+
+    for side in ("small", "big"):
+        check(f"ordered_angles {side}", np.stack(ordered_angles(angles[0], angles[1], side), axis = -1),
+              [math_utils.ordered_angles(a, b, side) for a, b in zip(angles[0], angles[1])])
+        check(f"angle_in_between {side}", angle_in_between(angles[0], angles[1], angles[2], side),
+              [math_utils.angle_in_between(a, b, c, side) for a, b, c in zip(angles[0], angles[1], angles[2])])
+
+    check("angle_in_between forced", angle_in_between(angle = angles[2], first_angle_forced = angles[0], second_angle_forced = angles[1]),
+          [math_utils.angle_in_between(angle = c, first_angle_forced = a, second_angle_forced = b) for a, b, c in zip(angles[0], angles[1], angles[2])])
+
+    check("angle_point_to_point", angle_point_to_point(*points[:4]), [math_utils.angle_point_to_point(*p) for p in points[:4].T])
+
+    for turning_direction in (math_utils.CLOCKWISE, math_utils.COUNTERCLOCKWISE, math_utils.TANGENTIAL):
+        check(f"closest_angular_distance {turning_direction}", closest_angular_distance(angles[0], angles[1], turning_direction),
+              [math_utils.closest_angular_distance(a, b, turning_direction) for a, b in zip(angles[0], angles[1])])
+
+        check(f"rotate_point {turning_direction}", np.stack(rotate_point(points[0], points[1], angles[0], turning_direction), axis = -1),
+              [math_utils.rotate_point(x, y, a, turning_direction) for x, y, a in zip(points[0], points[1], angles[0])])
+
+    segments = points[2:6].copy()
+    segments[2:, ::20] = segments[:2, ::20] # Segments that are points
+    check("distance_point_to_segment", distance_point_to_segment(points[0], points[1], *segments),
+          [math_utils.distance_point_to_segment(*p) for p in zip(points[0], points[1], *segments)])
+
+    valid = (points[2] != points[4]) | (points[3] != points[5])
+    check("distance_point_to_line", distance_point_to_line(*points[:6, valid]),
+          [math_utils.distance_point_to_line(*p) for p in points[:6].T[valid]])
+
+    check("distance_point_to_point", distance_point_to_point(*points[:4]), [math_utils.distance_point_to_point(*p) for p in points[:4].T])
+    check("distance_matrix", distance_matrix(points[0, :50], points[1, :50], points[2, :40], points[3, :40]),
+          [[math_utils.distance_point_to_point(a, b, c, d) for c, d in zip(points[2, :40], points[3, :40])] for a, b in zip(points[0, :50], points[1, :50])])
+
+    directions, tangentials = movement_rotational_direction(angles[0], angles[1])
+    scalar_results = [math_utils.movement_rotational_direction(a, b) for a, b in zip(angles[0], angles[1])]
+    assert list(directions) == [result[0] for result in scalar_results], "movement_rotational_direction"
+    check("movement_rotational_direction", tangentials, [result[1] for result in scalar_results])
+
+    check("get_point_on_circle", np.stack(get_point_on_circle(points[0] * 10, points[1] * 10, points[2], angles[0]), axis = -1),
+          [math_utils.get_point_on_circle(x * 10, y * 10, r, a) for x, y, r, a in zip(points[0], points[1], points[2], angles[0])])
+
+    check("are_lines_intersecting", are_lines_intersecting(*points), [math_utils.are_lines_intersecting(*p) for p in points.T])
+
+    intersection_x, intersection_y, intersecting = find_intersection(points[0:2].T, points[2:4].T, points[4:6].T, points[6:8].T)
+    scalar_intersections = [math_utils.find_intersection(tuple(p[0:2]), tuple(p[2:4]), tuple(p[4:6]), tuple(p[6:8])) for p in points.T]
+    assert list(intersecting) == [intersection is not None for intersection in scalar_intersections], "find_intersection"
+    check("find_intersection", np.stack((intersection_x, intersection_y), axis = -1)[intersecting],
+          [intersection for intersection in scalar_intersections if intersection is not None])
+
+if __name__ == "__main__":
+    _check_parity()
@@ -8,6 +8,12 @@ import math
 
 MAP_SCALE = 5 # x pixels = 1 meter
 
+# Rotational directions, clockwise and counterclockwise are the sign of the change in direction
+NORMAL = 0
+CLOCKWISE = 1
+COUNTERCLOCKWISE = -1
+TANGENTIAL = 2
+
 # ==============================================================
 # SECTION: Map conversion functions
 # Description: Functions to convert map measures to real measures
@@ -104,10 +110,10 @@ def angle_between_vectors(angle, vector):
     """Calculates the angle between a given angle and a vector."""
     return math.atan2(vector[1], vector[0]) - angle
 
-def closest_angular_distance(static_angle, moving_angle, turning_direction = "Clockwise"):
+def closest_angular_distance(static_angle, moving_angle, turning_direction = CLOCKWISE):
     """Returns a positive number if the moving angle is moving towards the static one, and negative number if moving away"""
 
-    if turning_direction == "Clockwise":
+    if turning_direction == CLOCKWISE:
 
         # Fixing 0 - 360 angle problem
         if static_angle == 2*math.pi and moving_angle != 2*math.pi:
@@ -119,7 +125,7 @@ def closest_angular_distance(static_angle, moving_angle, turning_direction = "Cl
             diff -= 2*math.pi
         return diff
 
-    elif turning_direction == "Counterclockwise":
+    elif turning_direction == COUNTERCLOCKWISE:
 
         # Fixing 0 - 360 angle problem
         if static_angle == 0 and moving_angle != 0:
@@ -266,11 +272,11 @@ def movement_rotational_direction(point_to_object_direction, object_direction):
     #print("Vdto: " + str(vector_direction_to_object) + ", Cdoo: " + str(vector_direction_of_object))
 
     if cross_product_result > 0:
-        return ("Counterclockwise", tangential_component)
+        return (COUNTERCLOCKWISE, tangential_component)
     elif cross_product_result < 0:
-        return ("Clockwise", tangential_component)
+        return (CLOCKWISE, tangential_component)
     else:
-        return ("Normal", tangential_component)
+        return (NORMAL, tangential_component)
 
 def change_distance_without_angle_change(x1, y1, x2, y2, d_new):
     """Calculates a new coordinate for the second point to fix the
@@ -288,7 +294,7 @@ def change_distance_without_angle_change(x1, y1, x2, y2, d_new):
 
     return x2_new, y2_new
 
-def rotate_point(x, y, angle, direction = "Counterclockwise"): # Works properly
+def rotate_point(x, y, angle, direction = COUNTERCLOCKWISE): # Works properly
     """
     Helper function to rotate a point (x, y) around the origin.
 
@@ -296,17 +302,17 @@ def rotate_point(x, y, angle, direction = "Counterclockwise"): # Works properly
         x (float): x-coordinate of the point.
         y (float): y-coordinate of the point.
         angle (float): Angle of rotation in radians.
-        direction (str): Direction of rotation, "clockwise" or "counterclockwise".
-                        Default is "clockwise".
+        direction (int): Direction of rotation, CLOCKWISE or COUNTERCLOCKWISE.
+                        Default is COUNTERCLOCKWISE.
 
     Returns:
         tuple: Rotated coordinates (x_rotated, y_rotated).
     """
-    if direction == "Clockwise":
+    if direction == CLOCKWISE:
         x_rotated = x * math.cos(angle) + y * math.sin(angle)
         y_rotated = -x * math.sin(angle) + y * math.cos(angle)
         
-    elif direction == "Counterclockwise":
+    elif direction == COUNTERCLOCKWISE:
         x_rotated = x * math.cos(angle) - y * math.sin(angle)
         y_rotated = x * math.sin(angle) + y * math.cos(angle)
     
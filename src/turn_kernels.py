@@ -0,0 +1,321 @@
+"""
+Originally designed by pasblo
+GNU GENERAL PUBLIC LICENSE
+Branchy turning kernels, compiled with Numba when it is installed and USE_NUMBA is enabled,
+plain Python otherwise. Every kernel only takes and returns numbers so both backends behave the same.
+The backend is selected on import, after changing USE_NUMBA call select_kernels() to apply it.
+Run this module to check the kernels against math_utils: python -m src.turn_kernels
+"""
+
+import math
+
+from src.math_utils import CLOCKWISE, COUNTERCLOCKWISE
+
+USE_NUMBA = True # Run the compiled kernels when Numba is available, False to run them in Python, see select_kernels
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+COMPILED = False # Backend in use, set by select_kernels
+
+def _kernel(function):
+    """Wraps the function to be compiled with Numba when available, compilation only happens on the first call."""
+    if numba is not None:
+        return numba.njit(cache = True)(function)
+    return function
+
+def _python(kernel):
+    """Returns the Python function of a kernel."""
+    return getattr(kernel, "py_func", kernel)
+
+# ==============================================================
+# SECTION: Angular helpers
+# Description: Scalar copies of the math_utils angular functions
+# that can be called from compiled kernels
+# ==============================================================
+
+@_kernel
+def _correct_radian(angle):
+    return angle % (2 * math.pi)
+
+@_kernel
+def _angle_in_between(start_angle, end_angle, angle):
+    """math_utils.angle_in_between on the small side."""
+
+    # Order the angles
+    if _correct_radian(start_angle - end_angle) >= _correct_radian(end_angle - start_angle):
+        first_angle = end_angle
+        second_angle = start_angle
+    else:
+        first_angle = start_angle
+        second_angle = end_angle
+
+    # Check if the angle is between start_angle and end_angle in the clockwise direction
+    end = second_angle - first_angle
+    if end <= 0:
+        end += 2 * math.pi
+
+    angle = angle - first_angle
+    if angle <= 0:
+        angle += 2 * math.pi
+
+    return angle >= end
+
+@_kernel
+def _closest_angular_distance(static_angle, moving_angle, turning_direction):
+    """math_utils.closest_angular_distance."""
+    if turning_direction == CLOCKWISE:
+
+        # Fixing 0 - 360 angle problem
+        if static_angle == 2 * math.pi and moving_angle != 2 * math.pi:
+            static_angle = 0.0
+        diff = moving_angle - static_angle
+
+    elif turning_direction == COUNTERCLOCKWISE:
+
+        # Fixing 0 - 360 angle problem
+        if static_angle == 0 and moving_angle != 0:
+            static_angle = 2 * math.pi
+        diff = static_angle - moving_angle
+
+    else:
+        return 0.0
+
+    if diff > math.pi:
+        diff -= 2 * math.pi
+    return diff
+
+# ==============================================================
+# SECTION: Turning kernels
+# Description: Kernels used by the map and the vehicles
+# ==============================================================
+
+@_kernel
+def _entry_turn(turn_x, turn_y, first_angle, second_angle, vehicle_x, vehicle_y, turning_direction, angle_error):
+    """
+    Checks if a vehicle is on any of the entry angles of a turn, see Map.entry_turn.
+
+    Args:
+        turn_x, turn_y (float): Center of the turn.
+        first_angle, second_angle (float): Angles of the turn in radians.
+        vehicle_x, vehicle_y (float): Position of the vehicle.
+        turning_direction (int): math_utils.CLOCKWISE or math_utils.COUNTERCLOCKWISE.
+        angle_error (float): Maximum angular distance to an entry angle in radians.
+
+    Returns:
+        bool: True if the vehicle is on the entry angle of the turn, False otherwise.
+    """
+
+    # Calculate the angle between the car and the turn point
+    car_turn_angle = _correct_radian(math.atan2(turn_y - vehicle_y, vehicle_x - turn_x))
+
+    # Checking if the car is outside of the allowed angles
+    distance_to_first_angle = _closest_angular_distance(first_angle, car_turn_angle, turning_direction)
+    distance_to_second_angle = _closest_angular_distance(second_angle, car_turn_angle, turning_direction)
+    if abs(distance_to_first_angle) > angle_error and abs(distance_to_second_angle) > angle_error:
+        return False
+
+    turn_span = _correct_radian(second_angle - first_angle)
+
+    # Entering through the first angle
+    if abs(distance_to_first_angle) <= angle_error:
+        if turning_direction == COUNTERCLOCKWISE:
+            # Inside the turn
+            if abs(distance_to_second_angle) < turn_span:
+                if distance_to_first_angle < 0:
+                    return True
+            elif distance_to_first_angle > 0:
+                return True
+
+        elif turning_direction == CLOCKWISE:
+            # Inside the turn
+            if abs(distance_to_second_angle) < turn_span:
+                if distance_to_first_angle > 0:
+                    return True
+            elif distance_to_first_angle < 0:
+                return True
+
+    # Entering through the second angle
+    if abs(distance_to_second_angle) <= angle_error:
+        if turning_direction == CLOCKWISE:
+            # Inside the turn
+            if abs(distance_to_first_angle) < turn_span:
+                if distance_to_second_angle < 0:
+                    return True
+            elif distance_to_second_angle > 0:
+                return True
+
+        elif turning_direction == COUNTERCLOCKWISE:
+            # Inside the turn
+            if abs(distance_to_first_angle) < turn_span:
+                if distance_to_second_angle > 0:
+                    return True
+            elif distance_to_second_angle < 0:
+                return True
+
+    return False
+
+@_kernel
+def _turn_window_distance(turn_to_collision_angle, collision_turn_angle, turning_direction, vehicle_turn_angle, max_angle_difference):
+    """
+    Checks if a vehicle is inside the arc a vehicle is looking ahead along a turn, see Vehicle.detect_closest_vehicle.
+
+    Args:
+        turn_to_collision_angle (float): Angle from the turn to the start of the arc in radians.
+        collision_turn_angle (float): Angular length of the arc in radians.
+        turning_direction (int): math_utils.CLOCKWISE or math_utils.COUNTERCLOCKWISE.
+        vehicle_turn_angle (float): Angle from the turn to the vehicle to check in radians.
+        max_angle_difference (float): Tolerance around both ends of the arc in radians.
+
+    Returns:
+        float: Angular distance from the start of the arc to the vehicle, -1 if the vehicle is outside of the arc.
+    """
+
+    # Calculating both angles of the view arc
+    if turning_direction == CLOCKWISE:
+        first_angle = turn_to_collision_angle - collision_turn_angle
+
+    elif turning_direction == COUNTERCLOCKWISE:
+        first_angle = turn_to_collision_angle + collision_turn_angle
+
+    else:
+        return -1.0
+
+    second_angle = turn_to_collision_angle
+
+    # Check that the vehicle is in the correct angle span, either inside, or just outside within the max angle difference
+    if (_angle_in_between(first_angle, second_angle, vehicle_turn_angle)
+            or first_angle - max_angle_difference < vehicle_turn_angle < first_angle + max_angle_difference
+            or second_angle - max_angle_difference < vehicle_turn_angle < second_angle + max_angle_difference):
+        return abs(_closest_angular_distance(turn_to_collision_angle, vehicle_turn_angle, turning_direction))
+
+    return -1.0
+
+def select_kernels():
+    """
+    Selects the backend of the public kernels from USE_NUMBA and the availability of Numba.
+
+    Updates:
+        COMPILED (bool): True if the compiled kernels are in use.
+        entry_turn, turn_window_distance (function): The kernels used by the map and the vehicles.
+    """
+    global COMPILED, entry_turn, turn_window_distance
+
+    COMPILED = USE_NUMBA and numba is not None
+    if COMPILED:
+        entry_turn = _entry_turn
+        turn_window_distance = _turn_window_distance
+    else:
+        entry_turn = _python(_entry_turn)
+        turn_window_distance = _python(_turn_window_distance)
+
+select_kernels()
+
+# ==============================================================
+# SECTION: Parity harness
+# Description: Checks the helpers and kernels against math_utils
+# ==============================================================
+
+def _reference_entry_turn(turn_x, turn_y, first_angle, second_angle, vehicle_x, vehicle_y, turning_direction, angle_error):
+    """Map.entry_turn as written with math_utils."""
+    import src.math_utils as math_utils
+
+    car_turn_angle = math_utils.angle_point_to_point(turn_x, turn_y, vehicle_x, vehicle_y)
+    distance_to_first_angle = math_utils.closest_angular_distance(first_angle, car_turn_angle, turning_direction)
+    distance_to_second_angle = math_utils.closest_angular_distance(second_angle, car_turn_angle, turning_direction)
+    turn_span = math_utils.correct_radian(second_angle - first_angle)
+
+    if abs(distance_to_first_angle) > angle_error and abs(distance_to_second_angle) > angle_error:
+        return False
+
+    if abs(distance_to_first_angle) <= angle_error:
+        if turning_direction == COUNTERCLOCKWISE:
+            if abs(distance_to_second_angle) < turn_span:
+                if distance_to_first_angle < 0:
+                    return True
+            elif distance_to_first_angle > 0:
+                return True
+        elif turning_direction == CLOCKWISE:
+            if abs(distance_to_second_angle) < turn_span:
+                if distance_to_first_angle > 0:
+                    return True
+            elif distance_to_first_angle < 0:
+                return True
+
+    if abs(distance_to_second_angle) <= angle_error:
+        if turning_direction == CLOCKWISE:
+            if abs(distance_to_first_angle) < turn_span:
+                if distance_to_second_angle < 0:
+                    return True
+            elif distance_to_second_angle > 0:
+                return True
+        elif turning_direction == COUNTERCLOCKWISE:
+            if abs(distance_to_first_angle) < turn_span:
+                if distance_to_second_angle > 0:
+                    return True
+            elif distance_to_second_angle < 0:
+                return True
+
+    return False
+
+def _reference_turn_window_distance(turn_to_collision_angle, collision_turn_angle, turning_direction, vehicle_turn_angle, max_angle_difference):
+    """The view arc check of Vehicle.detect_closest_vehicle as written with math_utils."""
+    import src.math_utils as math_utils
+
+    if turning_direction == CLOCKWISE:
+        first_angle = turn_to_collision_angle - collision_turn_angle
+    elif turning_direction == COUNTERCLOCKWISE:
+        first_angle = turn_to_collision_angle + collision_turn_angle
+    else:
+        return -1.0
+    second_angle = turn_to_collision_angle
+
+    if (math_utils.angle_in_between(first_angle, second_angle, vehicle_turn_angle)
+            or first_angle - max_angle_difference < vehicle_turn_angle < first_angle + max_angle_difference
+            or second_angle - max_angle_difference < vehicle_turn_angle < second_angle + max_angle_difference):
+        return abs(math_utils.closest_angular_distance(turn_to_collision_angle, vehicle_turn_angle, turning_direction))
+
+    return -1.0
+
+def _check_parity(samples = 20000, seed = 0):
+    import random
+    import src.math_utils as math_utils
+
+    rng = random.Random(seed)
+    angles = [0, math.pi/2, math.pi, 3*math.pi/2, 2*math.pi]
+
+    def angle():
+        return rng.choice(angles) if rng.random() < 0.1 else rng.uniform(0, 2*math.pi)
+
+    # Both backends when Numba is available, the Python one otherwise
+    backends = [("python", _python(_entry_turn), _python(_turn_window_distance))]
+    if numba is not None:
+        backends.append(("compiled", _entry_turn, _turn_window_distance))
+
+    for _ in range(samples):
+        a, b, c = angle(), angle(), angle()
+        direction = rng.choice((math_utils.CLOCKWISE, math_utils.COUNTERCLOCKWISE, math_utils.NORMAL))
+
+        assert _angle_in_between(a, b, c) == math_utils.angle_in_between(a, b, c), "angle_in_between"
+        assert _closest_angular_distance(a, b, direction) == math_utils.closest_angular_distance(a, b, direction), "closest_angular_distance"
+
+        # Vehicle around a turn, often exactly on its entry angles
+        turn_x, turn_y = rng.uniform(0, 500), rng.uniform(0, 500)
+        first_angle = rng.choice(angles[:4])
+        second_angle = math_utils.correct_radian(first_angle + math.pi/2)
+        vehicle_angle = rng.choice((first_angle, second_angle)) if rng.random() < 0.2 else angle()
+        radius = rng.uniform(1, 60)
+        vehicle_x, vehicle_y = turn_x + radius * math.cos(vehicle_angle), turn_y - radius * math.sin(vehicle_angle)
+        entry_args = (turn_x, turn_y, first_angle, second_angle, vehicle_x, vehicle_y, direction, math.radians(44))
+        window_args = (a, rng.uniform(0, math.pi), direction, c, rng.uniform(0, 0.2))
+
+        for name, entry_kernel, window_kernel in backends:
+            assert entry_kernel(*entry_args) == _reference_entry_turn(*entry_args), f"entry_turn, {name}"
+            assert window_kernel(*window_args) == _reference_turn_window_distance(*window_args), f"turn_window_distance, {name}"
+
+    print(f"Angular helpers and turning kernels: OK, backends: {[name for name, _, _ in backends]}, compiled in use: {COMPILED}")
+
+if __name__ == "__main__":
+    _check_parity()